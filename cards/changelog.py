@@ -0,0 +1,359 @@
+"""Compact storage for `CardChangeLog`.
+
+Every edit used to persist full `{field, label, before, after}` dicts, so
+the same label strings and the same (often unchanged-elsewhere) values
+were repeated on every row. Entries are now stored as
+`[field_ref, before_ref, after_ref]` triples where each ref is the id of
+a `ChangeLogValue` row — field keys and values are interned once, by
+digest, and shared across every log. `0` stands for an empty value.
+
+Labels are not stored at all; they are resolved from the card forms at
+read time by `expand_logs()`, which also still understands the legacy
+dict entries so old rows render during a rolling deploy.
+
+`fold_changes()` collapses a run of entries into their net effect;
+`compact_history()` uses it to replace old entries with one snapshot per
+card per week/month (`manage.py compact_card_history`).
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .forms import BusinessCardForm, CardForm
+from .models import CardChangeLog, ChangeLogValue
+
+
+def _build_card_field_labels():
+    excluded = {'avatar', 'logo', 'whatsapp_country', 'whatsapp_number', 'phone_country', 'phone_number'}
+    labels: dict[str, str] = {}
+    for form_cls in (CardForm, BusinessCardForm):
+        for name, field in form_cls.base_fields.items():
+            if name in excluded:
+                continue
+            label = field.label or name.replace('_', ' ').title()
+            labels[name] = label
+
+    # Manual overrides for fields that have special casing or hidden widgets
+    overrides = {
+        'firstName': 'First name',
+        'lastName': 'Last name',
+        'jobTitle': 'Job title',
+        'logo_name': 'Logo / company name',
+        'phone': 'Phone number',
+        'whatsapp': 'WhatsApp link',
+        'background_style': 'Background style',
+    }
+    labels.update(overrides)
+    return labels
+
+
+CARD_FIELD_LABELS = _build_card_field_labels()
+CARD_TRACKED_CARD_KEYS = set(CARD_FIELD_LABELS.keys())
+
+# Image uploads are logged too but aren't part of card_data.
+IMAGE_FIELD_LABELS = {
+    'avatar': 'Avatar image',
+    'logo': 'Logo image',
+}
+
+
+def field_label(key: str) -> str:
+    return (
+        CARD_FIELD_LABELS.get(key)
+        or IMAGE_FIELD_LABELS.get(key)
+        or key.replace('_', ' ').title()
+    )
+
+
+def normalize_change_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        cleaned = value.strip()
+        return cleaned[:180] + '…' if len(cleaned) > 181 else cleaned
+    return str(value)
+
+
+def build_card_change_entries(old_data: dict, new_data: dict):
+    if not isinstance(old_data, dict):
+        old_data = {}
+    if not isinstance(new_data, dict):
+        new_data = {}
+
+    entries = []
+    for key in CARD_TRACKED_CARD_KEYS:
+        before = normalize_change_value(old_data.get(key))
+        after = normalize_change_value(new_data.get(key))
+        if before == after:
+            continue
+        if not before and not after:
+            continue
+        entries.append({
+            'field': key,
+            'label': field_label(key),
+            'before': before,
+            'after': after,
+        })
+    return entries
+
+
+def summarize_change_entries(entries):
+    if not entries:
+        return ''
+    labels = [entry['label'] for entry in entries]
+    if len(labels) == 1:
+        summary = f"Updated {labels[0]}"
+    elif len(labels) == 2:
+        summary = f"Updated {labels[0]} and {labels[1]}"
+    else:
+        summary = f"Updated {', '.join(labels[:-1])}, and {labels[-1]}"
+    return summary[:255]
+
+
+# ==========================================================================
+# Interning
+# ==========================================================================
+
+def value_digest(value: str) -> str:
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+# An interned value's `last_referenced_at` is at most VALUE_TOUCH_INTERVAL
+# behind its latest use, and pruning spares anything touched within
+# VALUE_PRUNE_GRACE of the scan: an edit that re-uses an old value while
+# the scan runs keeps it alive.
+VALUE_TOUCH_INTERVAL = timedelta(hours=1)
+VALUE_PRUNE_GRACE = timedelta(days=1)
+
+
+def intern_values(values) -> dict:
+    """Map each non-empty string to its `ChangeLogValue` id, creating rows as needed."""
+    by_digest = {value_digest(v): v for v in set(values) if v}
+    if not by_digest:
+        return {}
+    now = timezone.now()
+    ChangeLogValue.objects.filter(
+        digest__in=by_digest, last_referenced_at__lt=now - VALUE_TOUCH_INTERVAL,
+    ).update(last_referenced_at=now)
+    ids = dict(
+        ChangeLogValue.objects.filter(digest__in=by_digest).values_list('digest', 'id')
+    )
+    missing = [d for d in by_digest if d not in ids]
+    if missing:
+        ChangeLogValue.objects.bulk_create(
+            [ChangeLogValue(digest=d, value=by_digest[d]) for d in missing],
+            ignore_conflicts=True,
+        )
+        ids.update(
+            ChangeLogValue.objects.filter(digest__in=missing).values_list('digest', 'id')
+        )
+    return {value: ids[digest] for digest, value in by_digest.items()}
+
+
+def compact_entries(entries) -> list:
+    """Encode `{field, before, after}` dicts as `[field_ref, before_ref, after_ref]`."""
+    strings = []
+    for entry in entries:
+        strings.extend((entry['field'], entry.get('before') or '', entry.get('after') or ''))
+    refs = intern_values(strings)
+    return [
+        [refs[entry['field']], refs.get(entry.get('before') or '', 0), refs.get(entry.get('after') or '', 0)]
+        for entry in entries
+    ]
+
+
+def is_compact(changes) -> bool:
+    return all(isinstance(item, list) for item in changes or [])
+
+
+def fold_changes(change_lists) -> list:
+    """Net effect of compact change lists given oldest first.
+
+    Each field keeps its earliest `before` and latest `after`; fields that
+    ended up back where they started are dropped.
+    """
+    net = {}
+    for changes in change_lists:
+        for field_ref, before_ref, after_ref in changes or []:
+            if field_ref in net:
+                net[field_ref][1] = after_ref
+            else:
+                net[field_ref] = [before_ref, after_ref]
+    return [[field_ref, before, after] for field_ref, (before, after) in net.items() if before != after]
+
+
+def record_card_change(card, user, entries: list[dict]):
+    if not entries:
+        return
+    CardChangeLog.objects.create(
+        card=card,
+        user=user if user.is_authenticated else None,
+        summary=summarize_change_entries(entries),
+        changes=compact_entries(entries),
+    )
+
+
+# ==========================================================================
+# Reading
+# ==========================================================================
+
+def expand_logs(logs):
+    """Attach `.entries` (label/before/after dicts) to each log.
+
+    One query resolves the refs for the whole batch.
+    """
+    refs = set()
+    for log in logs:
+        for item in log.changes or []:
+            if isinstance(item, list):
+                refs.update(ref for ref in item if ref)
+    strings = dict(
+        ChangeLogValue.objects.filter(pk__in=refs).values_list('id', 'value')
+    ) if refs else {}
+
+    for log in logs:
+        entries = []
+        for item in log.changes or []:
+            if isinstance(item, dict):
+                field = item.get('field', '')
+                entries.append({
+                    'field': field,
+                    'label': item.get('label') or field_label(field),
+                    'before': item.get('before', ''),
+                    'after': item.get('after', ''),
+                })
+                continue
+            field_ref, before_ref, after_ref = item
+            field = strings.get(field_ref, '')
+            entries.append({
+                'field': field,
+                'label': field_label(field),
+                'before': strings.get(before_ref, ''),
+                'after': strings.get(after_ref, ''),
+            })
+        log.entries = entries
+    return logs
+
+
+def recent_logs_prefetch(limit: int) -> Prefetch:
+    """Top `limit` logs per card as `card.recent_logs`, without the changes JSON.
+
+    A sliced Prefetch, so Django issues one ROW_NUMBER() window query.
+    """
+    queryset = (
+        CardChangeLog.objects.order_by('-created_at', '-id')
+        .only('id', 'card_id', 'summary', 'edit_count', 'created_at')[:limit]
+    )
+    return Prefetch('change_logs', queryset=queryset, to_attr='recent_logs')
+
+
+# ==========================================================================
+# Retention
+# ==========================================================================
+
+def _period_start(moment, period: str):
+    day = timezone.localtime(moment).date()
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _fold_group(logs) -> None:
+    changes = fold_changes(
+        log.changes if is_compact(log.changes) else compact_entries(log.changes)
+        for log in logs
+    )
+    field_keys = dict(
+        ChangeLogValue.objects.filter(pk__in=[item[0] for item in changes]).values_list('id', 'value')
+    )
+    summary = summarize_change_entries([
+        {'label': field_label(field_keys.get(item[0], ''))} for item in changes
+    ])
+    last = logs[-1]
+    with transaction.atomic():
+        snapshot = CardChangeLog.objects.create(
+            card_id=last.card_id,
+            user_id=last.user_id,
+            summary=summary,
+            changes=changes,
+            edit_count=sum(log.edit_count for log in logs),
+        )
+        # created_at is auto_now_add; pin the snapshot to the last folded edit.
+        CardChangeLog.objects.filter(pk=snapshot.pk).update(created_at=last.created_at)
+        CardChangeLog.objects.filter(pk__in=[log.pk for log in logs]).delete()
+
+
+def compact_history(cutoff, *, period: str = 'month', dry_run: bool = False) -> dict:
+    """Fold entries older than `cutoff` into one snapshot per card per period."""
+    stats = {'cards': 0, 'folded': 0, 'snapshots': 0, 'values_pruned': 0}
+    old = CardChangeLog.objects.filter(created_at__lt=cutoff)
+    card_ids = list(old.order_by().values_list('card_id', flat=True).distinct())
+
+    for card_id in card_ids:
+        groups = {}
+        for log in old.filter(card_id=card_id).order_by('created_at', 'id'):
+            groups.setdefault(_period_start(log.created_at, period), []).append(log)
+        foldable = [logs for logs in groups.values() if len(logs) > 1]
+        if not foldable:
+            continue
+        stats['cards'] += 1
+        for logs in foldable:
+            stats['folded'] += len(logs)
+            stats['snapshots'] += 1
+            if not dry_run:
+                _fold_group(logs)
+
+    if not dry_run:
+        stats['values_pruned'] = prune_unreferenced_values()
+    return stats
+
+
+def prune_unreferenced_values(chunk_size: int = 500) -> int:
+    """Delete interned strings no log points at any more.
+
+    Only rows not referenced within VALUE_PRUNE_GRACE of the scan are
+    candidates, and the delete re-checks that, so a value an edit interns
+    (new or re-used) while the logs are being scanned survives.
+    """
+    cutoff = timezone.now() - VALUE_PRUNE_GRACE
+    candidates = set(
+        ChangeLogValue.objects.filter(last_referenced_at__lt=cutoff).values_list('id', flat=True)
+    )
+    if not candidates:
+        return 0
+    for changes in CardChangeLog.objects.values_list('changes', flat=True).iterator(chunk_size=1000):
+        for item in changes or []:
+            if isinstance(item, list):
+                candidates.difference_update(item)
+    dead = sorted(candidates)
+    pruned = 0
+    for start in range(0, len(dead), chunk_size):
+        pruned += ChangeLogValue.objects.filter(
+            pk__in=dead[start:start + chunk_size], last_referenced_at__lt=cutoff,
+        ).delete()[0]
+    return pruned
+
+
+def history_storage_bytes(card_ids=None) -> dict:
+    """Approximate payload bytes of the change history (JSON + summaries + interned strings)."""
+    logs = CardChangeLog.objects.all()
+    if card_ids is not None:
+        logs = logs.filter(card_id__in=card_ids)
+    rows = log_bytes = 0
+    refs = set()
+    for summary, changes in logs.values_list('summary', 'changes').iterator(chunk_size=1000):
+        rows += 1
+        log_bytes += len(summary.encode('utf-8')) + len(json.dumps(changes, ensure_ascii=False).encode('utf-8'))
+        for item in changes or []:
+            if isinstance(item, list):
+                refs.update(ref for ref in item if ref)
+    value_bytes = sum(
+        len(digest) + len(value.encode('utf-8'))
+        for digest, value in ChangeLogValue.objects.filter(pk__in=refs).values_list('digest', 'value').iterator()
+    ) if refs else 0
+    return {'rows': rows, 'log_bytes': log_bytes, 'value_bytes': value_bytes, 'total': log_bytes + value_bytes}
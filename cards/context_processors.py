@@ -41,10 +41,8 @@ def sidebar(request):
         .first()
         or ''
     )
-    new_leads = LeadCapture.objects.filter(
-        card__user=user,
-        status=LeadCapture.STATUS_NEW,
-    ).count()
+    from .metrics import lead_histogram
+    new_leads = lead_histogram(user.id).get(LeadCapture.STATUS_NEW, 0)
 
     from .models import UserNotification
     unread_notifications = UserNotification.objects.filter(
@@ -85,7 +83,7 @@ def live_offers(request):
         .order_by('-discount_value')
     )
 
-    landing_offer = live_qs.filter(show_on_landing=True).first()
+    landing_offer = _landing_offer(now)
     dashboard_offer = None
     dashboard_popup_offer = None
     user = getattr(request, 'user', None)
@@ -100,3 +98,54 @@ def live_offers(request):
         'dashboard_offer': dashboard_offer,
         'dashboard_popup_offer': dashboard_popup_offer,
     }
+
+
+LANDING_OFFER_CACHE_KEY = 'cards:landing-offer:v1:{generation}'
+
+
+def _landing_offer(now):
+    """Best live landing offer, cached until the next landing offer starts or ends.
+
+    Keyed on the offer generation, so saving an Offer takes effect at once;
+    the landing page (with its demo card cached) then renders without a query.
+    """
+    from datetime import timedelta
+    from django.core.cache import cache
+    from .models import Offer
+    from .versioning import offer_generation
+
+    key = LANDING_OFFER_CACHE_KEY.format(generation=offer_generation())
+    cached = cache.get(key)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    current = list(
+        Offer.objects
+        .filter(is_active=True, show_on_landing=True, ends_at__gte=now)
+        .order_by('-discount_value')
+    )
+    live = [offer for offer in current if offer.starts_at <= now]
+    valid_until = min(
+        [offer.ends_at for offer in live] + [offer.starts_at for offer in current if offer.starts_at > now],
+        default=now + timedelta(days=1),
+    )
+    valid_until = min(valid_until, now + timedelta(days=1))
+    offer = live[0] if live else None
+    cache.set(key, (offer, valid_until), max(1, int((valid_until - now).total_seconds())))
+    return offer
+
+
+def fragment_cache(request):
+    """Version + TTL for the `{% cache %}` fragments in the heavy templates.
+
+    The version is resolved lazily, so templates without fragments never
+    touch the cache for it.
+    """
+    from django.conf import settings
+    from django.utils.functional import SimpleLazyObject
+    from .versioning import fragment_version
+
+    return {
+        'fragment_version': SimpleLazyObject(fragment_version),
+        'fragment_cache_seconds': getattr(settings, 'FRAGMENT_CACHE_SECONDS', 60 * 60 * 24),
+    }
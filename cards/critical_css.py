@@ -0,0 +1,89 @@
+"""Build-time critical CSS for the public card pages.
+
+`view_card.html` is what a printed QR code opens, usually on a phone on a
+slow network, and until the CSS bundle and Bootstrap's stylesheet have
+both arrived the browser paints nothing. `manage.py build_critical_css`
+renders each page in CRITICAL_PAGES for a throwaway sample card, keeps
+the bundle rules that can match the markup above the fold, and writes
+them to `cards/dist/critical/<page>.<hash>.css` (recorded in the dist
+manifest).
+
+`{% critical_css %}` inlines that file into `<head>`; `base.html` then
+loads the full bundle and Bootstrap without blocking render
+(`rel=preload` + `onload`, with a `<noscript>` fallback). Pages without
+a critical file keep the blocking `<link>`s.
+
+The fold is the `<!-- critical-fold -->` comment in the template (the
+whole page when there is none). Matching reuses `css_build.purge_css`,
+so it is as conservative as the bundle purge: a rule is kept when all of
+its classes appear above the fold, and rules without classes (elements,
+`:root`, keyframes, font faces) are always kept.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from .css_build import DIST_DIR, MANIFEST_PATH, STATIC_DIR, minify_css, purge_css, write_manifest_entry
+
+CRITICAL_NAME = 'critical'
+CRITICAL_PAGES = ('view_card', 'card_inactive_public')
+FOLD_MARKER = '<!-- critical-fold -->'
+
+_STYLE_SCRIPT_RE = re.compile(r'<(style|script)\b.*?</\1>', re.S | re.I)
+_CLASS_ATTR_RE = re.compile(r'\bclass="([^"]*)"')
+_TAG_RE = re.compile(r'<([a-zA-Z][\w-]*)')
+_ID_RE = re.compile(r'\bid="([^"]*)"')
+
+
+def above_the_fold(html: str) -> str:
+    """Markup up to the fold marker, without inline `<style>`/`<script>` bodies."""
+    head, marker, _rest = html.partition(FOLD_MARKER)
+    return _STYLE_SCRIPT_RE.sub('', head if marker else html)
+
+
+def html_words(html: str) -> set:
+    """Class names, tag names and ids used in `html` — the words purge_css matches on."""
+    words = set(_TAG_RE.findall(html))
+    words.update(_ID_RE.findall(html))
+    for value in _CLASS_ATTR_RE.findall(html):
+        words.update(value.split())
+    return words
+
+
+def extract_critical(css: str, html: str) -> str:
+    """The rules of `css` that can apply to the part of `html` above the fold, minified."""
+    return minify_css(purge_css(css, html_words(above_the_fold(html))))
+
+
+def write_critical(pages: dict, static_dir: Path = STATIC_DIR) -> dict:
+    """Write `{page: css}` as hashed files under `static_dir` and record them in the dist manifest."""
+    dist_dir = Path(static_dir) / DIST_DIR.relative_to(STATIC_DIR) / 'critical'
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    entries = {}
+    for page, css in pages.items():
+        digest = hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]
+        filename = f'{page}.{digest}.css'
+        (dist_dir / filename).write_text(css, encoding='utf-8')
+        entries[page] = (dist_dir / filename).relative_to(static_dir).as_posix()
+    for old in dist_dir.glob('*.css'):
+        if old.relative_to(static_dir).as_posix() not in entries.values():
+            old.unlink()
+    write_manifest_entry(Path(static_dir) / MANIFEST_PATH.relative_to(STATIC_DIR), CRITICAL_NAME, entries)
+    return entries
+
+
+def critical_css_for(page: str, entries: dict, static_dir: Path = STATIC_DIR) -> str:
+    """Inline-ready CSS for `page`, or '' when none was built."""
+    relative = (entries or {}).get(page)
+    return _read_css(str(Path(static_dir) / relative)) if relative else ''
+
+
+@lru_cache(maxsize=8)
+def _read_css(path: str) -> str:
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return fh.read()
+    except OSError:
+        return ''
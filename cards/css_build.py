@@ -0,0 +1,252 @@
+"""Build-time CSS bundle (replaces the Tailwind Play CDN).
+
+`base.html` used to load `cdn.tailwindcss.com`, which ships the whole
+Tailwind compiler to the visitor and JIT-builds utilities in the browser
+before first paint. `manage.py build_css` does that work once per deploy
+instead:
+
+  1. the Tailwind CLI compiles only the utilities used in the templates,
+     Python sources (form widget classes) and static JS
+  2. `tokens.css`, `components.css` and `motion.css` are purged of rules
+     whose class selectors never appear in those same sources
+  3. everything is minified into one `cards/dist/app.<hash>.css` and the
+     name is recorded in `cards/dist/manifest.json`
+
+The `{% css_bundle %}` tag reads the manifest; until a bundle has been
+built (fresh checkout, local dev) `base.html` falls back to the separate
+stylesheets plus the CDN script.
+
+The purge is deliberately conservative: a rule is kept when every class
+in at least one of its selectors appears somewhere in the sources as a
+bare word, and a word ending in `-` (e.g. `'mc-toast--' + tag` in JS)
+keeps every class starting with it. Rules without class selectors
+(elements, `:root`, `@keyframes`, `@font-face`) are always kept.
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent
+STATIC_DIR = APP_DIR / 'static'
+DIST_DIR = STATIC_DIR / 'cards' / 'dist'
+MANIFEST_PATH = DIST_DIR / 'manifest.json'
+BUNDLE_NAME = 'app.css'
+
+# Same cascade order base.html used for the separate <link>s.
+SOURCE_STYLESHEETS = ('cards/css/tokens.css', 'cards/css/components.css', 'cards/css/motion.css')
+CONTENT_GLOBS = ('templates/**/*.html', 'templates/**/*.svg', '**/*.py', 'static/cards/js/**/*.js')
+TAILWIND_INPUT = '@tailwind base;\n@tailwind components;\n@tailwind utilities;\n'
+
+_NESTED_AT_RULES = {'@media', '@supports', '@layer', '@container'}
+_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_WORD_RE = re.compile(r'[A-Za-z_][\w-]*')
+_CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+_ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+
+
+class CssBuildError(Exception):
+    pass
+
+
+# ==========================================================================
+# Sources
+# ==========================================================================
+
+def content_files():
+    seen = set()
+    for pattern in CONTENT_GLOBS:
+        for path in sorted(APP_DIR.glob(pattern)):
+            if path.is_file() and 'migrations' not in path.parts and path not in seen:
+                seen.add(path)
+                yield path
+
+
+def used_words(paths) -> set:
+    words = set()
+    for path in paths:
+        words.update(_WORD_RE.findall(Path(path).read_text(encoding='utf-8', errors='ignore')))
+    return words
+
+
+# ==========================================================================
+# Purge + minify
+# ==========================================================================
+
+def _blocks(css: str):
+    """Top-level (prelude, body) pairs; body is None for `@import ...;`-style statements."""
+    i, n = 0, len(css)
+    while i < n:
+        brace = css.find('{', i)
+        semi = css.find(';', i)
+        if brace == -1:
+            rest = css[i:].strip()
+            if rest:
+                yield rest.rstrip(';'), None
+            return
+        if semi != -1 and semi < brace and css[i:semi].strip().startswith('@'):
+            yield css[i:semi].strip(), None
+            i = semi + 1
+            continue
+        depth, j, quote = 1, brace + 1, None
+        while j < n and depth:
+            ch = css[j]
+            if quote:
+                if ch == '\\':
+                    j += 1
+                elif ch == quote:
+                    quote = None
+            elif ch in '"\'':
+                quote = ch
+            elif ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+            j += 1
+        if depth:
+            raise CssBuildError(f'Unbalanced braces near: {css[i:brace + 40]!r}')
+        yield css[i:brace].strip(), css[brace + 1:j - 1]
+        i = j
+
+
+def _split_selectors(prelude: str):
+    parts, depth, start = [], 0, 0
+    for index, ch in enumerate(prelude):
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(prelude[start:index].strip())
+            start = index + 1
+    parts.append(prelude[start:].strip())
+    return [part for part in parts if part]
+
+
+def _class_used(name: str, words: set, prefixes: tuple) -> bool:
+    return name in words or name.startswith(prefixes)
+
+
+def purge_css(css: str, words: set) -> str:
+    prefixes = tuple(word for word in words if word.endswith('-'))
+    return _purge(_COMMENT_RE.sub('', css), words, prefixes)
+
+
+def _purge(css: str, words: set, prefixes: tuple) -> str:
+    out = []
+    for prelude, body in _blocks(css):
+        if body is None:
+            out.append(f'{prelude};')
+        elif prelude.startswith('@'):
+            if prelude.split(None, 1)[0].lower() in _NESTED_AT_RULES:
+                inner = _purge(body, words, prefixes)
+                if inner.strip():
+                    out.append(f'{prelude}{{{inner}}}')
+            else:
+                out.append(f'{prelude}{{{body}}}')
+        else:
+            kept = [
+                selector for selector in _split_selectors(prelude)
+                if all(_class_used(name, words, prefixes)
+                       for name in _CLASS_RE.findall(_ATTRIBUTE_RE.sub('', selector)))
+            ]
+            if kept:
+                out.append(f"{','.join(kept)}{{{body}}}")
+    return '\n'.join(out)
+
+
+def minify_css(css: str) -> str:
+    css = _COMMENT_RE.sub('', css)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+# ==========================================================================
+# Tailwind + bundle
+# ==========================================================================
+
+def run_tailwind(cli: str, paths) -> str:
+    """Compile the Tailwind utilities used in `paths` with the standalone CLI (v3)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'input.css')
+        target = os.path.join(tmp, 'tailwind.css')
+        with open(source, 'w', encoding='utf-8') as fh:
+            fh.write(TAILWIND_INPUT)
+        command = [
+            *cli.split(), '-i', source, '-o', target, '--minify',
+            '--content', ','.join(str(path) for path in paths),
+        ]
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=300)
+        except FileNotFoundError as exc:
+            raise CssBuildError(f'Tailwind CLI not found ({cli}); install it or set TAILWIND_CLI.') from exc
+        if result.returncode != 0:
+            raise CssBuildError(f'Tailwind CLI failed: {result.stderr.strip()[-500:]}')
+        with open(target, encoding='utf-8') as fh:
+            return fh.read()
+
+
+def build_bundle(tailwind_css: str, words: set, static_dir: Path = STATIC_DIR) -> dict:
+    """Write the purged, minified, content-hashed bundle and its manifest under `static_dir`."""
+    sources = [(STATIC_DIR / name).read_text(encoding='utf-8') for name in SOURCE_STYLESHEETS]
+    purged = [purge_css(css, words) for css in sources]
+    bundle = '\n'.join(minify_css(css) for css in (*purged, tailwind_css)) + '\n'
+    digest = hashlib.sha256(bundle.encode('utf-8')).hexdigest()[:12]
+
+    dist_dir = Path(static_dir) / DIST_DIR.relative_to(STATIC_DIR)
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    filename = f'app.{digest}.css'
+    for old in dist_dir.glob('app.*.css'):
+        if old.name != filename:
+            old.unlink()
+    (dist_dir / filename).write_text(bundle, encoding='utf-8')
+    relative = (dist_dir / filename).relative_to(static_dir).as_posix()
+    write_manifest_entry(dist_dir / MANIFEST_PATH.name, BUNDLE_NAME, relative)
+    return {
+        'path': relative,
+        'source_bytes': sum(len(css.encode('utf-8')) for css in sources),
+        'tailwind_bytes': len(tailwind_css.encode('utf-8')),
+        'bundle_bytes': len(bundle.encode('utf-8')),
+    }
+
+
+# ==========================================================================
+# Manifest (shared with icon_sprite and font_build)
+# ==========================================================================
+
+def write_manifest_entry(manifest_path: Path, name: str, value):
+    """Record `name -> value` in the dist manifest, keeping the other entries."""
+    try:
+        with open(manifest_path, encoding='utf-8') as fh:
+            entries = json.load(fh)
+    except (OSError, ValueError):
+        entries = {}
+    entries[name] = value
+    Path(manifest_path).write_text(json.dumps(entries, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+
+
+def manifest_entry(name: str, manifest_path: Path = MANIFEST_PATH) -> str:
+    """Entry recorded for `name` (a static path, or a list for fonts), or '' when not built."""
+    try:
+        mtime = manifest_path.stat().st_mtime
+    except OSError:
+        return ''
+    return _read_manifest(str(manifest_path), mtime).get(name, '')
+
+
+def bundle_path(manifest_path: Path = MANIFEST_PATH) -> str:
+    """Static path of the built bundle, or '' when none has been built."""
+    return manifest_entry(BUNDLE_NAME, manifest_path)
+
+
+@lru_cache(maxsize=4)
+def _read_manifest(path: str, mtime: float) -> dict:
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
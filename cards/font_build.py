@@ -0,0 +1,151 @@
+"""Build-time WOFF2 font subsets (replaces the full TTFs and Google Fonts).
+
+The pages used to load four families from Google Fonts (a render-blocking
+third-party stylesheet) and `tokens.css` pointed at the full bundled TTFs:
+1.3 MB of variable Anek Bangla plus two 80 KB Bai Jamjuree cuts.
+Bai Jamjuree leads every font stack and Anek Bangla only fills in Bengali,
+so Inter, Space Grotesk and Poppins were never picked for a glyph.
+`manage.py build_fonts` does the work once per deploy instead:
+
+  1. every face in FACES is cut down to the Unicode ranges it serves
+     (Latin for Bai Jamjuree, Bengali for Anek Bangla); variable fonts
+     are pinned to the axis ranges the CSS uses
+  2. each subset is saved as WOFF2 under `cards/dist/fonts/` with a content
+     hash in its name and recorded in the dist manifest
+
+`{% font_faces %}` then renders the `@font-face` rules inline with
+`<link rel="preload">` hints for the faces the current language paints
+above the fold. Until fonts have been built, `base.html` falls back to
+`cards/css/fonts.css` (the TTFs) and the Google Fonts stylesheet.
+
+JetBrains Mono (used by `--mc-font-mono`) is not bundled; drop
+`JetBrainsMono[wght].ttf` into FONT_SOURCES_DIR to self-host it as well,
+otherwise the mono stack falls through to the system monospace.
+"""
+
+import hashlib
+import io
+from dataclasses import dataclass
+from pathlib import Path
+
+from .css_build import DIST_DIR, MANIFEST_PATH, STATIC_DIR, write_manifest_entry
+
+FONTS_NAME = 'fonts'
+BUNDLED_FONTS_DIR = STATIC_DIR / 'cards' / 'fonts'
+
+# Google Fonts' own subset ranges.
+UNICODE_RANGES = {
+    'latin': 'U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, U+0308, '
+             'U+0329, U+2000-206F, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD',
+    'bengali': 'U+0951-0952, U+0964-0965, U+0980-09FE, U+1CD0-1CF9, U+200C-200D, U+20B9, U+25CC, U+A8F1',
+}
+
+
+class FontBuildError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Face:
+    family: str
+    source: str
+    weight: str
+    subset: str
+    axes: tuple = ()        # (tag, min, default, max) limits for variable sources
+    preload_for: tuple = ()  # language codes whose first paint uses this face
+    optional: bool = False
+
+
+FACES = (
+    Face('Bai Jamjuree', 'BaiJamjuree-Regular.ttf', '400', 'latin', preload_for=('en', 'bn')),
+    Face('Bai Jamjuree', 'BaiJamjuree-Bold.ttf', '700', 'latin', preload_for=('en', 'bn')),
+    Face('Anek Bangla', 'AnekBangla-Regular.ttf', '400 700', 'bengali',
+         axes=(('wght', 400, 400, 700), ('wdth', 100, 100, 100)), preload_for=('bn',)),
+    Face('JetBrains Mono', 'JetBrainsMono[wght].ttf', '400 600', 'latin',
+         axes=(('wght', 400, 400, 600),), optional=True),
+)
+
+
+# ==========================================================================
+# Subsetting
+# ==========================================================================
+
+def parse_unicode_range(value: str) -> list:
+    codepoints = []
+    for part in value.split(','):
+        part = part.strip().upper().removeprefix('U+')
+        start, _, end = part.partition('-')
+        codepoints.extend(range(int(start, 16), int(end or start, 16) + 1))
+    return codepoints
+
+
+def subset_woff2(source: Path, face: Face) -> bytes:
+    """WOFF2 bytes of `source` limited to the face's Unicode range and axis limits."""
+    try:
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+        from fontTools.varLib import instancer
+    except ImportError as exc:
+        raise FontBuildError('fontTools (with brotli) is required: pip install fonttools brotli') from exc
+
+    font = TTFont(source, recalcTimestamp=False)   # stable bytes -> stable hash across deploys
+    options = subset.Options()
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    options.hinting = False
+    options.desubroutinize = True
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=parse_unicode_range(UNICODE_RANGES[face.subset]))
+    subsetter.subset(font)
+
+    if face.axes and 'fvar' in font:
+        present = {axis.axisTag for axis in font['fvar'].axes}
+        limits = {
+            tag: (minimum if minimum == maximum else instancer.AxisTriple(minimum, default, maximum))
+            for tag, minimum, default, maximum in face.axes if tag in present
+        }
+        font = instancer.instantiateVariableFont(font, limits)
+
+    buffer = io.BytesIO()
+    font.flavor = 'woff2'
+    font.save(buffer)
+    return buffer.getvalue()
+
+
+def build_fonts(source_dirs=(BUNDLED_FONTS_DIR,), faces=FACES, static_dir: Path = STATIC_DIR) -> dict:
+    """Write every available face as a hashed WOFF2 subset and record the set in the dist manifest."""
+    dist_dir = Path(static_dir) / DIST_DIR.relative_to(STATIC_DIR) / 'fonts'
+    dist_dir.mkdir(parents=True, exist_ok=True)
+
+    entries, written, source_bytes = [], set(), 0
+    for face in faces:
+        source = next((Path(d) / face.source for d in source_dirs if (Path(d) / face.source).exists()), None)
+        if source is None:
+            if face.optional:
+                continue
+            raise FontBuildError(f'Font source not found: {face.source}')
+        data = subset_woff2(source, face)
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        filename = f"{Path(face.source).stem.replace('[', '-').replace(']', '')}-{face.subset}.{digest}.woff2"
+        (dist_dir / filename).write_bytes(data)
+        written.add(filename)
+        source_bytes += source.stat().st_size
+        entries.append({
+            'family': face.family,
+            'weight': face.weight,
+            'unicode_range': UNICODE_RANGES[face.subset],
+            'path': (dist_dir / filename).relative_to(static_dir).as_posix(),
+            'preload_for': list(face.preload_for),
+            'bytes': len(data),
+        })
+
+    for old in dist_dir.glob('*.woff2'):
+        if old.name not in written:
+            old.unlink()
+    write_manifest_entry(Path(static_dir) / MANIFEST_PATH.relative_to(STATIC_DIR), FONTS_NAME, entries)
+    return {
+        'faces': len(entries),
+        'source_bytes': source_bytes,
+        'woff2_bytes': sum(entry['bytes'] for entry in entries),
+    }
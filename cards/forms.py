@@ -236,6 +236,11 @@ class CardForm(forms.ModelForm):
 
         return cleaned_data
 
+    def card_data_payload(self):
+        """`cleaned_data` as stored in `Card.card_data` (files and split phone inputs dropped)."""
+        excluded_keys = {'avatar', 'logo', 'whatsapp_country', 'whatsapp_number', 'phone_country', 'phone_number'}
+        return {key: value for key, value in self.cleaned_data.items() if key not in excluded_keys}
+
 
 BUSINESS_HIGHLIGHT_CHOICES = [
     ('', 'No extra highlight'),
@@ -0,0 +1,204 @@
+"""Unique visitors per card, from HyperLogLog sketches.
+
+`card_analytics` only had raw view counts. Exact unique visitors over a
+90-day window would be a `COUNT(DISTINCT session_id)` across the whole
+interaction table on every page load. Instead, each counted view also
+adds its visitor id (visitors.py) to a HyperLogLog sketch for that card
+and day (`CardVisitorSketch`):
+
+  - PRECISION = 12 gives 4096 one-byte registers and a standard error of
+    about 1.6%; small counts are exact-ish through linear counting
+  - a sketch is stored sparse (index/value pairs) while that is smaller
+    than the dense register array, so a quiet card costs a few bytes a
+    day and a busy one at most 4 KB
+  - sketches merge by taking the register-wise max, so any window is the
+    union of its day rows: one indexed query and at most 91 small merges,
+    whatever the traffic
+
+Adding the same visitor twice is a no-op, so the write path needs no
+de-duplication of its own. `exact_unique_visitors()` is the slow
+`COUNT(DISTINCT)` path, kept for tests and spot checks.
+`manage.py backfill_visitor_sketches` rebuilds the sketches from the
+stored interactions; sketches older than `RETENTION_DAYS` are pruned by
+the daily `card_lifecycle_tick`.
+
+A day is a UTC date, so a window is whole days: `day_window()` gives the
+start that `card_analytics` also uses for its raw counts, keeping views
+and unique visitors over the same span.
+"""
+
+import hashlib
+import struct
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from math import log
+
+from django.db import transaction
+from django.utils import timezone
+
+PRECISION = 12
+RETENTION_DAYS = 90         # the longest analytics window
+REGISTERS = 1 << PRECISION
+_VALUE_BITS = 64 - PRECISION
+_ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+_DENSE = b'\x01'
+_SPARSE = b'\x02'
+_PAIR = struct.Struct('>HB')
+
+
+class HyperLogLog:
+    """A HyperLogLog sketch over strings."""
+
+    __slots__ = ('registers',)
+
+    def __init__(self):
+        self.registers = bytearray(REGISTERS)
+
+    def add(self, value: str) -> bool:
+        """Add `value`; True when a register changed (and the sketch needs saving)."""
+        digest = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = digest >> _VALUE_BITS
+        rank = _VALUE_BITS - (digest & ((1 << _VALUE_BITS) - 1)).bit_length() + 1
+        if rank <= self.registers[index]:
+            return False
+        self.registers[index] = rank
+        return True
+
+    def update(self, blob: bytes) -> None:
+        """Merge a serialized sketch into this one."""
+        if not blob:
+            return
+        if blob[:1] == _DENSE:
+            self.registers = bytearray(map(max, self.registers, blob[1:]))
+            return
+        registers = self.registers
+        for index, rank in _PAIR.iter_unpack(blob[1:]):
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def count(self) -> int:
+        registers = self.registers
+        estimate = _ALPHA * REGISTERS * REGISTERS / sum(2.0 ** -rank for rank in registers)
+        zeros = registers.count(0)
+        if estimate <= 2.5 * REGISTERS and zeros:
+            estimate = REGISTERS * log(REGISTERS / zeros)   # linear counting for small sets
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        pairs = [(index, rank) for index, rank in enumerate(self.registers) if rank]
+        if len(pairs) * _PAIR.size < REGISTERS:
+            return _SPARSE + b''.join(_PAIR.pack(index, rank) for index, rank in pairs)
+        return _DENSE + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> 'HyperLogLog':
+        sketch = cls()
+        sketch.update(blob)
+        return sketch
+
+
+# ==========================================================================
+# Per-card, per-day sketches
+# ==========================================================================
+
+def record_visitor(card_id: int, visitor: str, day=None) -> None:
+    """Add `visitor` to the card's sketch for `day` (today, UTC, by default)."""
+    from .models import CardVisitorSketch
+
+    if not visitor:
+        return
+    day = day or timezone.now().date()
+    with transaction.atomic():
+        row, _created = CardVisitorSketch.objects.select_for_update().get_or_create(
+            card_id=card_id, day=day, defaults={'registers': b''},
+        )
+        sketch = HyperLogLog.from_bytes(bytes(row.registers))
+        if sketch.add(visitor):
+            row.registers = sketch.to_bytes()
+            row.save(update_fields=['registers'])
+
+
+def day_window(days: int, now=None):
+    """Start of a `days`-day window ending today: midnight UTC, `days - 1` days ago."""
+    today = (now or timezone.now()).astimezone(dt_timezone.utc).date()
+    return datetime.combine(today - timedelta(days=days - 1), time.min, tzinfo=dt_timezone.utc)
+
+
+def window_days(since, until=None) -> tuple:
+    """(first, last) UTC dates covered by the datetime window `since`..`until` (now)."""
+    until = until or timezone.now()
+    return since.astimezone(dt_timezone.utc).date(), until.astimezone(dt_timezone.utc).date()
+
+
+def unique_visitors(card_id: int, since, until=None) -> int:
+    """Estimated distinct visitors of a card between two datetimes, merged from the day sketches."""
+    from .models import CardVisitorSketch
+
+    first, last = window_days(since, until)
+    sketch = HyperLogLog()
+    for blob in CardVisitorSketch.objects.filter(card_id=card_id, day__range=(first, last)).values_list(
+        'registers', flat=True,
+    ):
+        sketch.update(bytes(blob))
+    return sketch.count()
+
+
+def exact_unique_visitors(card_id: int, since, until=None) -> int:
+    """`COUNT(DISTINCT session_id)` over the views in the same days — slow; for tests and checks."""
+    from .models import CardInteraction
+
+    first, last = window_days(since, until)
+    return (
+        CardInteraction.objects
+        .filter(
+            card_id=card_id, kind=CardInteraction.KIND_VIEW,
+            created_at__gte=datetime.combine(first, time.min, tzinfo=dt_timezone.utc),
+            created_at__lt=datetime.combine(last + timedelta(days=1), time.min, tzinfo=dt_timezone.utc),
+        )
+        .exclude(session_id='')
+        .values('session_id').distinct().count()
+    )
+
+
+def prune_sketches(days: int = RETENTION_DAYS, now=None) -> int:
+    """Delete the sketches that fall outside every analytics window; returns the row count."""
+    from .models import CardVisitorSketch
+
+    deleted, _ = CardVisitorSketch.objects.filter(day__lt=day_window(days, now).date()).delete()
+    return deleted
+
+
+def rebuild_sketches(card_ids=None, days: int = RETENTION_DAYS) -> dict:
+    """Recompute the sketches of the last `days` days from stored VIEW interactions."""
+    from .models import CardInteraction, CardVisitorSketch
+
+    since = day_window(days)      # whole days: the first one is replaced too
+    first = since.date()
+    views = (
+        CardInteraction.objects
+        .filter(kind=CardInteraction.KIND_VIEW, created_at__gte=since)
+        .exclude(session_id='')
+        .values_list('card_id', 'created_at', 'session_id')
+    )
+    if card_ids is not None:
+        views = views.filter(card_id__in=card_ids)
+
+    sketches = {}
+    for card_id, created_at, visitor in views.iterator(chunk_size=2000):
+        key = (card_id, created_at.astimezone(dt_timezone.utc).date())
+        sketches.setdefault(key, HyperLogLog()).add(visitor)
+
+    with transaction.atomic():
+        stale = CardVisitorSketch.objects.filter(day__gte=first)
+        if card_ids is not None:
+            stale = stale.filter(card_id__in=card_ids)
+        stale.delete()
+        CardVisitorSketch.objects.bulk_create(
+            [CardVisitorSketch(card_id=card_id, day=day, registers=sketch.to_bytes())
+             for (card_id, day), sketch in sketches.items()],
+            batch_size=500,
+        )
+    return {
+        'sketches': len(sketches),
+        'bytes': sum(len(sketch.to_bytes()) for sketch in sketches.values()),
+    }
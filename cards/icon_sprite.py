@@ -0,0 +1,154 @@
+"""Build-time SVG icon sprite (replaces `unpkg.com/lucide@latest`).
+
+`base.html` used to load the whole, unversioned Lucide bundle from unpkg
+in `<head>` and let `lucide.createIcons()` turn every `<i data-lucide>`
+into inline SVG, while `view_card.html`, `physical_card.html` and
+`_social_icon.svg` pasted full brand path data into every render.
+`manage.py build_icons` collects the icons actually used instead:
+
+  1. names are scanned from the templates, Python sources and static JS
+     (`data-lucide="..."`, `{% block page_icon %}...`, `'icon': '...'`),
+     plus the dynamic sets: `Offer.ICON_CHOICES` and the tracked click
+     targets the analytics page renders as icons
+  2. each name is read from a Lucide SVG directory (`LUCIDE_ICONS_DIR`,
+     e.g. `node_modules/lucide-static/icons`) and the brand glyphs from
+     `cards/icons/brands/`
+  3. they are written as `<symbol>`s into one
+     `cards/dist/icons.<hash>.svg`, recorded in the same manifest as the
+     CSS bundle, so WhiteNoise serves it as immutable
+
+Pages reference symbols with `<use href="sprite#name">`: `{% brand_icon %}`
+for the brand glyphs and `static/cards/js/icons.js`, a small
+`window.lucide.createIcons()` stand-in, for the existing `<i data-lucide>`
+markup. `<use>` only resolves same-origin sprites, so STATIC_URL must be
+served from the site's own host. Until a sprite has been built,
+`base.html` falls back to a pinned Lucide UMD build and `{% brand_icon %}`
+inlines the path data.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from .css_build import APP_DIR, DIST_DIR, MANIFEST_PATH, STATIC_DIR, write_manifest_entry
+
+SPRITE_NAME = 'icons.svg'
+BRANDS_DIR = APP_DIR / 'icons' / 'brands'
+BRAND_PREFIX = 'brand-'
+DEFAULT_BRAND = 'globe'
+
+_LUCIDE_ATTR_RE = re.compile(r'data-lucide="([^"]*)"')
+_PAGE_ICON_RE = re.compile(r'{%\s*block page_icon\s*%}([a-z0-9-]+){%\s*endblock')
+_PY_ICON_RE = re.compile(r"""['"]icon['"]\s*:\s*['"]([a-z0-9-]+)['"]""")
+_TRACK_TARGET_RE = re.compile(r'data-track-target="([a-z0-9-]+)"')
+_TEMPLATE_TAG_RE = re.compile(r'{%.*?%}|{{.*?}}', re.S)
+_NAME_RE = re.compile(r'^[a-z0-9]+(?:-[a-z0-9]+)*$')
+_SVG_RE = re.compile(r'<svg\b([^>]*)>(.*)</svg>', re.S)
+_VIEWBOX_RE = re.compile(r'viewBox="([^"]+)"')
+
+
+class IconBuildError(Exception):
+    pass
+
+
+# ==========================================================================
+# Sources
+# ==========================================================================
+
+def used_icons(paths) -> tuple:
+    """(static, dynamic) icon names referenced by `paths`.
+
+    Static names must exist in the Lucide set; dynamic ones (values only
+    known at render time, e.g. offer icons and tracked targets) are included
+    when they exist and skipped quietly otherwise — the same blank icon
+    the client-side library used to render.
+    """
+    from .models import Offer
+
+    static, dynamic = set(), {value for value, _label in Offer.ICON_CHOICES}
+    for path in paths:
+        text = Path(path).read_text(encoding='utf-8', errors='ignore')
+        for value in _LUCIDE_ATTR_RE.findall(text):
+            # `{% if a %}briefcase{% else %}user{% endif %}` -> briefcase, user
+            static.update(word for word in _TEMPLATE_TAG_RE.sub(' ', value).split() if _NAME_RE.match(word))
+        static.update(_PAGE_ICON_RE.findall(text))
+        static.update(_PY_ICON_RE.findall(text))
+        dynamic.update(_TRACK_TARGET_RE.findall(text))
+    return static, dynamic - static
+
+
+def brand_names() -> list:
+    return sorted(path.stem for path in BRANDS_DIR.glob('*.svg'))
+
+
+def read_symbol(path: Path, symbol_id: str) -> str:
+    """Turn one standalone SVG file into a `<symbol>` keeping only its viewBox and content."""
+    match = _SVG_RE.search(path.read_text(encoding='utf-8'))
+    if not match:
+        raise IconBuildError(f'{path} is not an SVG file.')
+    viewbox = _VIEWBOX_RE.search(match.group(1))
+    inner = re.sub(r'>\s+<', '><', match.group(2).strip())
+    return f'<symbol id="{symbol_id}" viewBox="{viewbox.group(1) if viewbox else "0 0 24 24"}">{inner}</symbol>'
+
+
+@lru_cache(maxsize=1)
+def _known_brands() -> frozenset:
+    return frozenset(brand_names())
+
+
+def brand_name(net: str) -> str:
+    """The brand glyph shown for a social network; unknown networks get the globe."""
+    return net if net in _known_brands() else DEFAULT_BRAND
+
+
+@lru_cache(maxsize=64)
+def brand_svg(net: str, css_class: str = '') -> str:
+    """Standalone inline SVG for a brand glyph (used before a sprite exists)."""
+    path = BRANDS_DIR / f'{brand_name(net)}.svg'
+    match = _SVG_RE.search(path.read_text(encoding='utf-8'))
+    class_attr = f' class="{css_class}"' if css_class else ''
+    return f'<svg{class_attr} viewBox="0 0 24 24" fill="currentColor" aria-hidden="true">{match.group(2).strip()}</svg>'
+
+
+# ==========================================================================
+# Sprite
+# ==========================================================================
+
+def build_sprite(lucide_dir, static_names, dynamic_names=(), static_dir: Path = STATIC_DIR) -> dict:
+    """Write the hashed `<symbol>` sprite and record it in the dist manifest under `static_dir`."""
+    lucide_dir = Path(lucide_dir)
+    if not lucide_dir.is_dir():
+        raise IconBuildError(f'Lucide icon directory not found ({lucide_dir}); set LUCIDE_ICONS_DIR.')
+    missing = sorted(name for name in static_names if not (lucide_dir / f'{name}.svg').exists())
+    if missing:
+        raise IconBuildError(f"Icons not found in {lucide_dir}: {', '.join(missing)}")
+
+    lucide = sorted(
+        name for name in set(static_names) | set(dynamic_names)
+        if (lucide_dir / f'{name}.svg').exists()
+    )
+    symbols = [read_symbol(lucide_dir / f'{name}.svg', name) for name in lucide]
+    symbols += [read_symbol(BRANDS_DIR / f'{name}.svg', BRAND_PREFIX + name) for name in brand_names()]
+    sprite = (
+        '<svg xmlns="http://www.w3.org/2000/svg">'
+        + ''.join(symbols)
+        + '</svg>\n'
+    )
+    digest = hashlib.sha256(sprite.encode('utf-8')).hexdigest()[:12]
+
+    dist_dir = Path(static_dir) / DIST_DIR.relative_to(STATIC_DIR)
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    filename = f'icons.{digest}.svg'
+    for old in dist_dir.glob('icons.*.svg'):
+        if old.name != filename:
+            old.unlink()
+    (dist_dir / filename).write_text(sprite, encoding='utf-8')
+    relative = (dist_dir / filename).relative_to(static_dir).as_posix()
+    write_manifest_entry(dist_dir / MANIFEST_PATH.name, SPRITE_NAME, relative)
+    return {
+        'path': relative,
+        'icons': len(lucide),
+        'brands': len(symbols) - len(lucide),
+        'sprite_bytes': len(sprite.encode('utf-8')),
+    }
@@ -0,0 +1,263 @@
+"""Avatar / logo image processing.
+
+Uploads are re-encoded once on receipt so the stored original carries no
+EXIF (GPS, device serials) and is already rotated upright. After the
+card is saved, fixed-width WebP derivatives plus a JPEG (or PNG, when the
+image has transparency) fallback are written under
+`derivatives/<sha256>/<width>.<ext>`. Identical uploads therefore share
+one set of files, and the paths never change content, so they can be
+served with immutable cache headers.
+
+The card keeps a small manifest per field in `Card.image_variants`,
+which the `card_images` template tags turn into `<picture>`/`srcset`
+markup. Cards without a manifest (older uploads, or a file Pillow could
+not read) fall back to the original URL.
+
+Layouts that need some other size (print sheet, landing preview, admin
+tables) use the `resized_media` endpoint instead, which renders into a
+size-bounded disk cache under `MEDIA_ROOT/r/<w>x<h>/` — see
+`render_resized()` and `note_resized()`.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_ROOT = 'derivatives'
+DERIVATIVE_WIDTHS = (128, 256, 512)
+IMAGE_FIELDS = ('avatar', 'logo')
+
+_REENCODE_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+
+
+def _has_alpha(img) -> bool:
+    return img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+
+
+def _open(fileobj):
+    from PIL import Image, ImageOps
+
+    img = Image.open(fileobj)
+    fmt = img.format
+    img = ImageOps.exif_transpose(img)
+    return img, fmt
+
+
+def sanitize_upload(fileobj):
+    """Return an EXIF-free, upright re-encode of an uploaded image, or None to keep it as is."""
+    try:
+        fileobj.seek(0)
+        img, fmt = _open(fileobj)
+    except Exception as exc:
+        logger.warning("Could not read uploaded image for EXIF stripping: %s", exc)
+        return None
+    finally:
+        fileobj.seek(0)
+    if fmt not in _REENCODE_FORMATS:
+        # GIF/animated and exotic formats are left untouched.
+        return None
+
+    buffer = BytesIO()
+    if fmt == 'JPEG':
+        img.convert('RGB').save(buffer, format='JPEG', quality=90, optimize=True, progressive=True)
+    elif fmt == 'WEBP':
+        img.save(buffer, format='WEBP', quality=90)
+    else:
+        img.save(buffer, format='PNG', optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def _encode(img, ext: str, alpha: bool) -> bytes:
+    buffer = BytesIO()
+    if ext == 'webp':
+        img.convert('RGBA' if alpha else 'RGB').save(buffer, format='WEBP', quality=80, method=4)
+    elif ext == 'png':
+        img.convert('RGBA').save(buffer, format='PNG', optimize=True)
+    else:
+        img.convert('RGB').save(buffer, format='JPEG', quality=82, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def build_derivatives(name: str, source_storage=default_storage, storage=default_storage) -> dict:
+    """Write the derivative set for a stored image and return its manifest."""
+    from PIL import Image
+
+    with source_storage.open(name, 'rb') as fh:
+        data = fh.read()
+    digest = hashlib.sha256(data).hexdigest()
+    base = f'{DERIVATIVE_ROOT}/{digest[:2]}/{digest}'
+
+    img, _fmt = _open(BytesIO(data))
+    alpha = _has_alpha(img)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if alpha else 'RGB')
+    fallback = 'png' if alpha else 'jpg'
+
+    widths = sorted({min(w, img.width) for w in DERIVATIVE_WIDTHS})
+    for width in widths:
+        height = max(1, round(img.height * width / img.width))
+        resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+        for ext in ('webp', fallback):
+            path = f'{base}/{width}.{ext}'
+            if not storage.exists(path):
+                storage.save(path, ContentFile(_encode(resized, ext, alpha)))
+
+    return {
+        'source': name,
+        'base': base,
+        'fallback': fallback,
+        'widths': widths,
+        'width': img.width,
+        'height': img.height,
+    }
+
+
+def refresh_image_variants(card) -> bool:
+    """Bring `card.image_variants` in line with its current files. Returns True if it changed."""
+    variants = dict(card.image_variants or {})
+    changed = False
+    for field in IMAGE_FIELDS:
+        file = getattr(card, field)
+        name = file.name if file else ''
+        current = variants.get(field) or {}
+        if name == current.get('source', ''):
+            continue
+        changed = True
+        variants.pop(field, None)
+        if not name:
+            continue
+        try:
+            variants[field] = build_derivatives(name, source_storage=file.storage)
+        except Exception as exc:
+            logger.warning("Skipping %s derivatives for card %s: %s", field, card.pk, exc)
+    if changed:
+        card.image_variants = variants
+    return changed
+
+
+def variant_url(manifest: dict, width: int, ext: str, storage=default_storage) -> str:
+    return storage.url(f"{manifest['base']}/{width}.{ext}")
+
+
+def best_width(manifest: dict, target: int) -> int:
+    """Smallest derivative at least `target` px wide (or the largest there is)."""
+    for width in manifest['widths']:
+        if width >= target:
+            return width
+    return manifest['widths'][-1]
+
+
+def jpeg_thumbnail(name: str, storage=default_storage, size: int = 128, quality: int = 80) -> bytes:
+    """Small square-bounded JPEG of a stored image (transparency flattened onto white)."""
+    from PIL import Image
+
+    with storage.open(name, 'rb') as fh:
+        img, _fmt = _open(fh)
+        img.thumbnail((size, size), Image.LANCZOS)
+        if _has_alpha(img):
+            rgba = img.convert('RGBA')
+            img = Image.new('RGB', rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel('A'))
+        buffer = BytesIO()
+        img.convert('RGB').save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+# ==========================================================================
+# On-the-fly resizes
+# ==========================================================================
+
+RESIZE_CACHE_DIR = 'r'
+RESIZE_CACHE_BYTES_KEY = 'cards:resize-cache-bytes:v1'
+RESIZE_CACHE_LOW_WATER = 0.9    # evict down to this share of the budget
+_FORMAT_BY_EXT = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.webp': 'WEBP'}
+
+
+def resize_cache_path(root: str, width: int, height: int, name: str) -> str:
+    return os.path.join(root, RESIZE_CACHE_DIR, f'{width}x{height}', name)
+
+
+def render_resized(source: str, dest: str, width: int, height: int) -> None:
+    """Fit `source` inside width x height (never upscaling) and write it atomically to `dest`."""
+    from PIL import Image
+
+    fmt = _FORMAT_BY_EXT.get(os.path.splitext(dest)[1].lower(), 'PNG')
+    with open(source, 'rb') as fh:
+        img, _fmt = _open(fh)
+        img.thumbnail((width, height), Image.LANCZOS)
+        alpha = _has_alpha(img)
+        buffer = BytesIO()
+        if fmt == 'JPEG':
+            img.convert('RGB').save(buffer, format='JPEG', quality=85, optimize=True, progressive=True)
+        elif fmt == 'WEBP':
+            img.convert('RGBA' if alpha else 'RGB').save(buffer, format='WEBP', quality=82)
+        else:
+            img.save(buffer, format='PNG', optimize=True)
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as out:
+        out.write(buffer.getvalue())
+    os.replace(tmp, dest)
+
+
+def note_resized(root: str, size: int, budget_bytes: int) -> int:
+    """Count a freshly rendered resize of `size` bytes; evict only once the cache is over budget.
+
+    The running total lives in the cache, so a miss costs one `incr`. The
+    directory is walked only when the total passes the budget, or when it
+    is unknown (restart, cache clear). Returns bytes evicted.
+    """
+    try:
+        total = cache.incr(RESIZE_CACHE_BYTES_KEY, size)
+    except ValueError:
+        total = None
+    if total is not None and total <= budget_bytes:
+        return 0
+    return enforce_resize_cache_budget(root, budget_bytes)
+
+
+def enforce_resize_cache_budget(root: str, budget_bytes: int) -> int:
+    """Evict least-recently-used resizes until the cache is back under the low-water mark.
+
+    Recency is the later of atime and mtime: the endpoint bumps mtime on
+    hits it serves itself, and atime (relatime) covers hits nginx serves
+    straight from disk. Trimming below the budget leaves headroom, so the
+    next few misses don't each walk the directory again. Returns bytes
+    evicted and records the remaining total for `note_resized()`.
+    """
+    cache_root = os.path.join(root, RESIZE_CACHE_DIR)
+    entries = []
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(cache_root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+            total += stat.st_size
+
+    evicted = 0
+    target = budget_bytes * RESIZE_CACHE_LOW_WATER if total > budget_bytes else budget_bytes
+    entries.sort()
+    for _used, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        evicted += size
+    cache.set(RESIZE_CACHE_BYTES_KEY, total, None)
+    return evicted
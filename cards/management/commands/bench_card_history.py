@@ -0,0 +1,137 @@
+"""Benchmark CardChangeLog storage and dashboard query time.
+
+Seeds a synthetic user with `--cards` cards and `--edits` legacy-format
+edits each (spread over the last two years), then measures:
+
+  before — legacy dict entries, unbounded prefetch of every log
+  after  — interned compact entries, compacted history, and the
+           dashboard's bounded windowed prefetch
+
+Everything runs inside a transaction that is rolled back, so it is safe
+against a real database (use a staging copy for meaningful numbers).
+"""
+
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.utils import timezone
+
+from cards.changelog import (
+    compact_entries,
+    compact_history,
+    field_label,
+    history_storage_bytes,
+    recent_logs_prefetch,
+    summarize_change_entries,
+)
+from cards.models import Card, CardChangeLog
+from cards.views import DASHBOARD_RECENT_LOGS
+
+
+FIELDS = ['firstName', 'lastName', 'jobTitle', 'company', 'bio', 'email', 'phone', 'website', 'address']
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+class Command(BaseCommand):
+    help = "Compare CardChangeLog size and dashboard query time before/after compaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=5)
+        parser.add_argument('--edits', type=int, default=300, help='Edits per card.')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--retention-days', type=int, default=180)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        with transaction.atomic():
+            self._run(rng, options)
+            transaction.set_rollback(True)
+
+    def _run(self, rng, options):
+        now = timezone.now()
+        user = User.objects.create(username=f'bench-history-{rng.randrange(10**9)}')
+        cards = Card.objects.bulk_create([
+            Card(user=user, slug=f'{user.username}-{i}', card_data={'firstName': 'Bench'})
+            for i in range(options['cards'])
+        ])
+        card_ids = [card.pk for card in cards]
+
+        span = timedelta(days=730)
+        logs = []
+        for card in cards:
+            current = {key: '' for key in FIELDS}
+            for n in range(options['edits']):
+                entries = []
+                for key in rng.sample(FIELDS, rng.randint(1, 3)):
+                    after = f'{key} value {rng.randint(1, 40)} ' + 'x' * rng.randint(10, 120)
+                    if after == current[key]:
+                        continue
+                    entries.append({'field': key, 'label': field_label(key), 'before': current[key], 'after': after})
+                    current[key] = after
+                logs.append(CardChangeLog(
+                    card=card, user=user, summary=summarize_change_entries(entries), changes=entries,
+                    created_at=now - span + span * n / options['edits'],
+                ))
+        stamps = [log.created_at for log in logs]
+        CardChangeLog.objects.bulk_create(logs)
+        # bulk_create honours auto_now_add; put the timestamps back.
+        for log, stamp in zip(logs, stamps):
+            log.created_at = stamp
+        CardChangeLog.objects.bulk_update(logs, ['created_at'], batch_size=500)
+
+        def legacy_dashboard():
+            list(
+                Card.objects.filter(user=user)
+                .prefetch_related(Prefetch(
+                    'change_logs', queryset=CardChangeLog.objects.order_by('-created_at'), to_attr='recent_logs',
+                ))
+            )
+
+        def current_dashboard():
+            list(
+                Card.objects.filter(user=user)
+                .annotate(change_log_count=Count('change_logs'))
+                .prefetch_related(recent_logs_prefetch(DASHBOARD_RECENT_LOGS))
+            )
+
+        before_size = history_storage_bytes(card_ids)
+        before_ms = _time(legacy_dashboard, options['repeat'])
+
+        for log in CardChangeLog.objects.filter(card_id__in=card_ids).only('id', 'changes').iterator():
+            log.changes = compact_entries(log.changes)
+            log.save(update_fields=['changes'])
+        interned_size = history_storage_bytes(card_ids)
+
+        compact_history(now - timedelta(days=options['retention_days']))
+        after_size = history_storage_bytes(card_ids)
+        after_ms = _time(current_dashboard, options['repeat'])
+
+        rows = [
+            ('legacy', before_size, before_ms),
+            ('interned', interned_size, None),
+            ('compacted', after_size, after_ms),
+        ]
+        self.stdout.write(f"{'stage':<10} {'rows':>8} {'bytes':>12} {'dashboard ms':>13}")
+        for label, size, ms in rows:
+            self.stdout.write(
+                f"{label:<10} {size['rows']:>8} {size['total']:>12} "
+                f"{(f'{ms:.2f}' if ms is not None else '-'):>13}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"size {after_size['total'] / max(before_size['total'], 1):.1%} of legacy, "
+            f"dashboard {before_ms / max(after_ms, 0.001):.1f}x faster (rolled back)"
+        ))
@@ -0,0 +1,157 @@
+"""First contentful paint of the public card page in headless Chromium, fully offline.
+
+A local tool, not a runtime dependency: needs Playwright
+(`pip install playwright && playwright install chromium`).
+
+Seeds a sample card (rolled back) and renders `view_card` twice:
+
+  before — CRITICAL_CSS=False: blocking bundle + Bootstrap stylesheet
+  after  — the `build_critical_css` rules inlined, the rest preloaded
+
+Each page is then loaded `--runs` times in a fresh browser context (a
+first visit, cold cache). Nothing leaves the machine: the HTML comes from
+the pre-rendered response, `/static/` from the staticfiles finders, and
+third-party hosts (CDNs) answer an empty body after `--third-party-ms`.
+Every response is delayed by `--rtt-ms` plus its size at `--kbps`, which
+approximates the slow mobile link a scanned QR code is usually opened on.
+"""
+
+import asyncio
+import json
+import mimetypes
+import statistics
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from cards.css_build import manifest_entry
+from cards.critical_css import CRITICAL_NAME
+from cards.management.commands.bench_templates import _host, rolled_back
+from cards.management.commands.build_critical_css import SAMPLE_CARD
+from cards.models import Card
+
+FCP_JS = """() => new Promise(resolve => {
+    const seen = performance.getEntriesByName('first-contentful-paint')[0];
+    if (seen) return resolve(seen.startTime);
+    new PerformanceObserver(list => {
+        const entry = list.getEntriesByName('first-contentful-paint')[0];
+        if (entry) resolve(entry.startTime);
+    }).observe({type: 'paint', buffered: true});
+})"""
+
+
+def _static_body(path):
+    found = finders.find(unquote(path[len(settings.STATIC_URL):]))
+    if not found:
+        return None
+    with open(found, 'rb') as fh:
+        return fh.read()
+
+
+class Command(BaseCommand):
+    help = "Headless, offline first-contentful-paint benchmark of view_card with and without critical CSS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--rtt-ms', type=int, default=150)
+        parser.add_argument('--kbps', type=int, default=1600, help='Simulated bandwidth in kilobits/s.')
+        parser.add_argument('--third-party-ms', type=int, default=600,
+                            help='Latency of CDN hosts (DNS + TLS + transfer), answered empty.')
+        parser.add_argument('--output', default=None, help='Also write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        try:
+            from playwright.async_api import async_playwright  # noqa: F401
+        except ImportError as exc:
+            raise CommandError('Playwright is required: pip install playwright && playwright install chromium') from exc
+        if not manifest_entry(CRITICAL_NAME):
+            raise CommandError('No critical CSS yet; run `manage.py build_css` and `build_critical_css` first.')
+
+        with rolled_back() as samples:
+            url, pages = self._render(samples)
+
+        results = asyncio.run(self._measure(url, pages, options))
+
+        self.stdout.write(f"{'mode':<8} {'median FCP ms':>14} {'min':>8} {'max':>8} {'html B':>8}")
+        for mode, samples in results.items():
+            self.stdout.write(
+                f"{mode:<8} {statistics.median(samples):>14.0f} {min(samples):>8.0f} {max(samples):>8.0f} "
+                f"{len(pages[mode]):>8}"
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                json.dump({
+                    'page': 'view_card',
+                    'settings': {key: options[key] for key in ('runs', 'rtt_ms', 'kbps', 'third_party_ms')},
+                    'fcp_ms': results,
+                }, fh, indent=2)
+        before, after = (statistics.median(results[mode]) for mode in ('before', 'after'))
+        self.stdout.write(self.style.SUCCESS(
+            f"fcp bench done · runs={options['runs']} before={before:.0f}ms after={after:.0f}ms (rolled back)"
+        ))
+
+    def _render(self, samples):
+        owner = User.objects.create(username='bench-fcp-owner')
+        card = Card.objects.create(user=owner, card_data=SAMPLE_CARD)
+        samples.append(card)
+        url = f"https://{_host()}{reverse('view_card', args=[card.slug])}"
+        client = Client(HTTP_HOST=_host())
+        pages = {}
+        for mode, enabled in (('before', False), ('after', True)):
+            with override_settings(CRITICAL_CSS=enabled):
+                response = client.get(url, secure=True)
+            if response.status_code != 200:
+                raise CommandError(f'{url} answered {response.status_code}')
+            pages[mode] = response.content
+        return url, pages
+
+    async def _measure(self, url, pages, options):
+        from playwright.async_api import async_playwright
+
+        origin = urlsplit(url).netloc
+        page_path = urlsplit(url).path
+        bytes_per_ms = options['kbps'] / 8
+
+        async def answer(route, html):
+            request_url = urlsplit(route.request.url)
+            if request_url.netloc != origin:
+                await asyncio.sleep(options['third_party_ms'] / 1000)
+                content_type = mimetypes.guess_type(request_url.path)[0] or 'text/plain'
+                return await route.fulfill(status=200, body=b'', content_type=content_type)
+            if request_url.path == page_path:
+                body, content_type = html, 'text/html; charset=utf-8'
+            elif request_url.path.startswith(settings.STATIC_URL):
+                body = _static_body(request_url.path)
+                content_type = mimetypes.guess_type(request_url.path)[0] or 'application/octet-stream'
+            else:
+                body, content_type = b'', 'text/plain'   # tracking beacons and the like
+            await asyncio.sleep((options['rtt_ms'] + len(body or b'') / bytes_per_ms) / 1000)
+            if body is None:
+                return await route.fulfill(status=404, body=b'')
+            return await route.fulfill(status=200, body=body, content_type=content_type)
+
+        def handler_for(html):
+            async def handler(route):
+                await answer(route, html)
+            return handler
+
+        results = {}
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch()
+            for mode, html in pages.items():
+                samples = []
+                for _ in range(options['runs']):
+                    context = await browser.new_context()
+                    page = await context.new_page()
+                    await page.route('**/*', handler_for(html))
+                    await page.goto(url, wait_until='load')
+                    samples.append(await page.evaluate(FCP_JS))
+                    await context.close()
+                results[mode] = samples
+            await browser.close()
+        return results
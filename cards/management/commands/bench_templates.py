@@ -0,0 +1,110 @@
+"""Benchmark the landing, builder and public card pages with and without fragment caching.
+
+Seeds a throwaway user and card, then requests each page `--repeat`
+times in two modes:
+
+  before — FRAGMENT_CACHE_SECONDS=0, so every `{% cache %}` block is
+           rendered on every request
+  after  — fragments warm in the configured cache
+
+The view work (queries, context) is identical in both modes, so the
+difference is the template work the fragments save. Everything runs
+inside a transaction that is rolled back.
+"""
+
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from cards.models import Card
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+@contextmanager
+def rolled_back():
+    """A transaction that is always rolled back; yields a list for the sample cards.
+
+    The rollback can't undo the QR PNG `Card.save()` writes to media
+    storage, so the files of the cards added to the list are deleted on
+    the way out (these commands run on every deploy).
+    """
+    samples = []
+    try:
+        with transaction.atomic():
+            yield samples
+            transaction.set_rollback(True)
+    finally:
+        for card in samples:
+            if card.qr_code:
+                card.qr_code.storage.delete(card.qr_code.name)
+
+
+def _time(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, secure=True)
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} answered {response.status_code}')
+    return statistics.median(samples)
+
+
+class Command(BaseCommand):
+    help = "Compare render time of index / create_card / view_card with fragment caching off and on."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with rolled_back() as samples:
+            self._run(options['repeat'], samples)
+
+    def _run(self, repeat, samples):
+        owner = User.objects.create(username='bench-templates-owner')
+        builder = User.objects.create(username='bench-templates-builder')
+        card = Card.objects.create(user=owner, card_data={
+            'firstName': 'Bench', 'lastName': 'Templates', 'jobTitle': 'Engineer',
+            'company': 'MY-Card', 'email': 'bench@example.com', 'phone': '8801700000000',
+            'website': 'https://example.com', 'notes': 'Benchmark card.',
+            'linkedin': 'https://linkedin.com/in/bench', 'github': 'https://github.com/bench',
+        })
+        samples.append(card)
+
+        anonymous = Client(HTTP_HOST=_host())
+        signed_in = Client(HTTP_HOST=_host())
+        signed_in.force_login(builder)
+        pages = [
+            ('index.html', anonymous, reverse('index')),
+            ('create_card.html', signed_in, reverse('create_card')),
+            ('view_card.html', anonymous, reverse('view_card', args=[card.slug])),
+        ]
+
+        rows = []
+        for name, client, url in pages:
+            with override_settings(FRAGMENT_CACHE_SECONDS=0):
+                before = _time(client, url, repeat)
+            client.get(url, secure=True)   # warm the fragments
+            after = _time(client, url, repeat)
+            rows.append((name, before, after))
+
+        self.stdout.write(f"{'template':<18} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for name, before, after in rows:
+            self.stdout.write(f"{name:<18} {before:>10.2f} {after:>10.2f} {before / max(after, 0.001):>7.1f}x")
+        self.stdout.write(self.style.SUCCESS(
+            f"template bench done · repeat={repeat} (rolled back)"
+        ))
@@ -0,0 +1,62 @@
+"""Extract the above-the-fold CSS of the public card pages for inlining.
+
+Run after `build_css` (it reads the bundle) and before `collectstatic`
+on every deploy (see update.sh). Renders each page for a throwaway
+sample card inside a transaction that is rolled back; the sample cards'
+QR files are deleted afterwards.
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from cards.css_build import STATIC_DIR, bundle_path
+from cards.critical_css import CRITICAL_PAGES, extract_critical, write_critical
+from cards.management.commands.bench_templates import _host, rolled_back
+from cards.models import Card
+
+SAMPLE_CARD = {
+    'firstName': 'Sample', 'lastName': 'Card', 'jobTitle': 'Engineer', 'company': 'MY-Card',
+    'email': 'sample@example.com', 'phone': '8801700000000', 'whatsapp': '8801700000000',
+    'website': 'https://example.com', 'notes': 'Sample card.',
+    'linkedin': 'https://linkedin.com/in/sample', 'github': 'https://github.com/sample',
+}
+
+
+class Command(BaseCommand):
+    help = "Inline-ready critical CSS for view_card and card_inactive_public (needs the build_css bundle)."
+
+    def handle(self, *args, **options):
+        bundle = bundle_path()
+        if not bundle:
+            raise CommandError('No CSS bundle yet; run `manage.py build_css` first.')
+        css = (STATIC_DIR / bundle).read_text(encoding='utf-8')
+
+        with rolled_back() as samples:
+            pages = self._render_pages(samples)
+
+        critical = {page: extract_critical(css, html) for page, html in pages.items()}
+        entries = write_critical(critical)
+        sizes = ' '.join(f"{page}={len(critical[page])}B" for page in entries)
+        self.stdout.write(self.style.SUCCESS(
+            f"critical css done · bundle={len(css)}B {sizes}"
+        ))
+
+    def _render_pages(self, samples):
+        owner = User.objects.create(username='critical-css-owner')
+        active = Card.objects.create(user=owner, card_data=SAMPLE_CARD)
+        inactive = Card.objects.create(user=owner, card_data=SAMPLE_CARD, is_active=False)
+        samples.extend([active, inactive])
+        client = Client(HTTP_HOST=_host())
+        urls = {
+            'view_card': reverse('view_card', args=[active.slug]),
+            'card_inactive_public': reverse('view_card', args=[inactive.slug]),
+        }
+        pages = {}
+        for page in CRITICAL_PAGES:
+            response = client.get(urls[page], secure=True)
+            if response.status_code != 200:
+                raise CommandError(f'{urls[page]} answered {response.status_code}')
+            pages[page] = response.content.decode('utf-8')
+        return pages
@@ -0,0 +1,39 @@
+"""Compile the site stylesheet bundle that replaces the Tailwind Play CDN.
+
+Run before `collectstatic` on every deploy (see update.sh). Needs the
+Tailwind v3 standalone CLI on the build machine — `TAILWIND_CLI` names
+it (default `tailwindcss`; `npx tailwindcss@3` works too). A CI stage
+that already compiled the utilities can pass `--tailwind-css` instead.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.css_build import CssBuildError, build_bundle, content_files, run_tailwind, used_words
+
+
+class Command(BaseCommand):
+    help = "Build the purged, minified, hashed CSS bundle served in place of the Tailwind CDN."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cli', default=None, help='Tailwind CLI command (default: TAILWIND_CLI).')
+        parser.add_argument('--tailwind-css', default=None,
+                            help='Use this already-compiled Tailwind output instead of running the CLI.')
+
+    def handle(self, *args, **options):
+        paths = list(content_files())
+        try:
+            if options['tailwind_css']:
+                with open(options['tailwind_css'], encoding='utf-8') as fh:
+                    tailwind_css = fh.read()
+            else:
+                cli = options['cli'] or getattr(settings, 'TAILWIND_CLI', 'tailwindcss')
+                tailwind_css = run_tailwind(cli, paths)
+            stats = build_bundle(tailwind_css, used_words(paths))
+        except (CssBuildError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        self.stdout.write(self.style.SUCCESS(
+            f"css build done · sources={len(paths)} in={stats['source_bytes'] + stats['tailwind_bytes']}B "
+            f"out={stats['bundle_bytes']}B → {stats['path']}"
+        ))
@@ -0,0 +1,31 @@
+"""Subset the bundled fonts to Latin / Bengali WOFF2 files that replace the TTFs and Google Fonts.
+
+Run before `collectstatic` on every deploy (see update.sh). Needs
+`fonttools` and `brotli` on the build machine. Extra source TTFs (e.g.
+JetBrains Mono) are picked up from FONT_SOURCES_DIR when it is set.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.font_build import BUNDLED_FONTS_DIR, FontBuildError, build_fonts
+
+
+class Command(BaseCommand):
+    help = "Build hashed WOFF2 subsets of the site fonts and record them in the dist manifest."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sources', default=None,
+                            help='Extra directory of source TTFs (default: FONT_SOURCES_DIR).')
+
+    def handle(self, *args, **options):
+        extra = options['sources'] or getattr(settings, 'FONT_SOURCES_DIR', '')
+        source_dirs = (BUNDLED_FONTS_DIR, extra) if extra else (BUNDLED_FONTS_DIR,)
+        try:
+            stats = build_fonts(source_dirs)
+        except (FontBuildError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        self.stdout.write(self.style.SUCCESS(
+            f"font build done · faces={stats['faces']} in={stats['source_bytes']}B out={stats['woff2_bytes']}B"
+        ))
@@ -0,0 +1,36 @@
+"""Build the SVG `<symbol>` sprite that replaces `unpkg.com/lucide@latest`.
+
+Run before `collectstatic` on every deploy (see update.sh). Needs the
+Lucide SVG sources on the build machine — `LUCIDE_ICONS_DIR` names the
+directory of `<name>.svg` files (e.g. `node_modules/lucide-static/icons`
+after `npm install lucide-static`).
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.css_build import content_files
+from cards.icon_sprite import IconBuildError, build_sprite, used_icons
+
+
+class Command(BaseCommand):
+    help = "Build the hashed SVG icon sprite from the Lucide and brand icons the templates use."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lucide-dir', default=None,
+                            help='Directory of Lucide <name>.svg files (default: LUCIDE_ICONS_DIR).')
+
+    def handle(self, *args, **options):
+        lucide_dir = options['lucide_dir'] or getattr(settings, 'LUCIDE_ICONS_DIR', '')
+        if not lucide_dir:
+            raise CommandError('Set LUCIDE_ICONS_DIR or pass --lucide-dir.')
+        static_names, dynamic_names = used_icons(content_files())
+        try:
+            stats = build_sprite(lucide_dir, static_names, dynamic_names)
+        except (IconBuildError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        self.stdout.write(self.style.SUCCESS(
+            f"icon build done · icons={stats['icons']} brands={stats['brands']} "
+            f"out={stats['sprite_bytes']}B → {stats['path']}"
+        ))
@@ -0,0 +1,37 @@
+"""Generate avatar/logo derivatives for cards uploaded before the pipeline.
+
+New uploads get their derivatives when the card is saved; this walks the
+existing cards whose manifest is missing or stale. Safe to re-run —
+derivative paths are content-addressed, so unchanged images are skipped.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from cards.images import refresh_image_variants
+from cards.models import Card
+from cards.versioning import invalidate_card_state, invalidate_landing_demo
+
+
+class Command(BaseCommand):
+    help = "Build WebP/JPEG derivatives for existing card avatars and logos."
+
+    def handle(self, *args, **options):
+        stats = {'updated': 0, 'checked': 0}
+        cards = (
+            Card.objects.exclude(Q(avatar='') | Q(avatar__isnull=True), Q(logo='') | Q(logo__isnull=True))
+            .only('id', 'slug', 'avatar', 'logo', 'image_variants')
+        )
+        for card in cards.iterator(chunk_size=200):
+            stats['checked'] += 1
+            if refresh_image_variants(card):
+                # New srcset: updated_at keys the card ETag and cached card body.
+                Card.objects.filter(pk=card.pk).update(image_variants=card.image_variants, updated_at=timezone.now())
+                invalidate_card_state(card.slug)
+                invalidate_landing_demo(card.slug)
+                stats['updated'] += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"derivatives done · checked={stats['checked']} updated={stats['updated']}"
+        ))
@@ -10,6 +10,9 @@ Cadence:
 -  7 days before                    → second warning
 -  1 day  before                    → final warning
 - On expiry date                    → deactivate + log + inbox
+
+It also prunes unique-visitor sketches older than the longest analytics
+window (hll.RETENTION_DAYS).
 """
 
 from datetime import timedelta
@@ -18,7 +21,9 @@ from django.core.management.base import BaseCommand
 from django.conf import settings
 from django.utils import timezone
 
+from cards.hll import prune_sketches
 from cards.models import Card, CardLifecycleLog, UserNotification
+from cards.versioning import invalidate_card_state
 
 
 WARNING_STAGES = [
@@ -50,7 +55,7 @@ class Command(BaseCommand):
                 now = timezone.make_aware(now)
 
         dry = options['dry_run']
-        stats = {'warnings': 0, 'expired': 0, 'skipped': 0}
+        stats = {'warnings': 0, 'expired': 0, 'skipped': 0, 'sketches_pruned': 0}
 
         active_cards = (
             Card.objects
@@ -87,9 +92,13 @@ class Command(BaseCommand):
                     stats['warnings'] += 1
                     break  # send at most one stage per tick
 
+        if not dry:
+            stats['sketches_pruned'] = prune_sketches(now=now)
+
         self.stdout.write(self.style.SUCCESS(
             f"tick done · warnings={stats['warnings']} "
             f"expired={stats['expired']} skipped={stats['skipped']} "
+            f"sketches_pruned={stats['sketches_pruned']} "
             f"{'(dry-run)' if dry else ''}"
         ))
 
@@ -165,6 +174,7 @@ def _deactivate(card, now):
         deactivated_at=now,
         deactivation_reason=reason,
     )
+    invalidate_card_state(card.slug)
 
     CardLifecycleLog.objects.create(
         card=card,
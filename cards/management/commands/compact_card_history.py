@@ -0,0 +1,51 @@
+"""Fold old CardChangeLog entries into periodic snapshots.
+
+Intended for a weekly cron. Entries older than the retention window are
+grouped per card per month (or week) and replaced by a single snapshot
+row holding the net change of that period — earliest `before`, latest
+`after` — with `edit_count` recording how many edits it stands for.
+Interned values no longer referenced by any log are pruned afterwards.
+
+Idempotent: periods that are already a single snapshot are left alone.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from cards.changelog import compact_history
+
+
+class Command(BaseCommand):
+    help = "Compact card change history older than the retention window into snapshots."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=None, metavar='DAYS',
+            help='Retention window in days (default: CARD_HISTORY_RETENTION_DAYS).',
+        )
+        parser.add_argument(
+            '--period', choices=['month', 'week'], default='month',
+            help='Snapshot granularity.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report what would be folded without changing anything.',
+        )
+
+    def handle(self, *args, **options):
+        days = options['older_than']
+        if days is None:
+            days = getattr(settings, 'CARD_HISTORY_RETENTION_DAYS', 180)
+        cutoff = timezone.now() - timedelta(days=days)
+        dry = options['dry_run']
+
+        stats = compact_history(cutoff, period=options['period'], dry_run=dry)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"history compacted · cards={stats['cards']} folded={stats['folded']} "
+            f"snapshots={stats['snapshots']} values_pruned={stats['values_pruned']} "
+            f"{'(dry-run)' if dry else ''}"
+        ))
@@ -0,0 +1,136 @@
+"""Move existing card uploads onto content-addressed paths.
+
+Uploads made before ContentAddressedStorage live at their original
+names (`logos/acme.png`, `logos/acme_x7Kq2.png`, …). This hashes every
+avatar/logo a card references, re-points the card at
+`<dir>/<hh>/<sha256>.<ext>` (writing that file once), and then deletes
+the old names no card references any more. Only files whose content was
+already stored under another name free disk space: `reclaimed` is what
+was deleted minus the canonical files this run had to write.
+
+`--orphans` additionally removes files under avatars/ and logos/ that no
+card points at at all (abandoned onboarding uploads and the like).
+"""
+
+import posixpath
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from cards.models import Card
+from cards.storage import card_media_storage, content_addressed_name, content_digest, release_media
+from cards.versioning import invalidate_card_state, invalidate_landing_demo
+
+
+IMAGE_FIELDS = ('avatar', 'logo')
+
+
+def _walk(storage, directory):
+    try:
+        dirs, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        yield posixpath.join(directory, filename)
+    for sub in dirs:
+        yield from _walk(storage, posixpath.join(directory, sub))
+
+
+class Command(BaseCommand):
+    help = "Deduplicate card avatar/logo files by content hash and report bytes reclaimed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report without changing anything.')
+        parser.add_argument('--orphans', action='store_true', help='Also delete files no card references.')
+
+    def handle(self, *args, **options):
+        dry = options['dry_run']
+        storage = card_media_storage()
+        stats = {'relinked': 0, 'deduplicated': 0, 'missing': 0, 'files_removed': 0}
+        retired = {}
+        written = set()      # canonical names this run writes
+        written_bytes = 0
+
+        cards = Card.objects.exclude(
+            Q(avatar='') | Q(avatar__isnull=True), Q(logo='') | Q(logo__isnull=True),
+        ).only('id', 'slug', 'avatar', 'logo', 'image_variants')
+
+        for card in cards.iterator(chunk_size=200):
+            variants = dict(card.image_variants or {})
+            updates = {}
+            for field in IMAGE_FIELDS:
+                file = getattr(card, field)
+                if not file:
+                    continue
+                name = file.name
+                if not storage.exists(name):
+                    stats['missing'] += 1
+                    continue
+                with storage.open(name, 'rb') as fh:
+                    digest = content_digest(File(fh))
+                upload_dir = Card._meta.get_field(field).upload_to.rstrip('/')
+                canonical = content_addressed_name(posixpath.join(upload_dir, posixpath.basename(name)), digest)
+                if canonical == name:
+                    continue
+
+                retired[name] = ''
+                stats['relinked'] += 1
+                fresh = canonical not in written and not storage.exists(canonical)
+                if fresh:
+                    written.add(canonical)
+                    written_bytes += storage.size(name)
+                else:
+                    stats['deduplicated'] += 1
+                if dry:
+                    continue
+                if fresh:
+                    with storage.open(name, 'rb') as fh:
+                        canonical = storage.save(posixpath.join(upload_dir, posixpath.basename(name)), File(fh))
+                updates[field] = canonical
+                if field in variants:
+                    variants[field] = {**variants[field], 'source': canonical}
+
+            if updates:
+                # The image URLs change: move updated_at so card ETags and the
+                # cached card body roll over before the old files go.
+                Card.objects.filter(pk=card.pk).update(
+                    image_variants=variants, updated_at=timezone.now(), **updates,
+                )
+                invalidate_card_state(card.slug)
+                invalidate_landing_demo(card.slug)
+
+        if dry:
+            released = sum(storage.size(name) for name in retired)
+            stats['files_removed'] = len(retired)
+        else:
+            before = {name for name in retired if storage.exists(name)}
+            # Only now that no card (or cached page) points at them. Derivatives
+            # are keyed by content, which hasn't changed, so only the original
+            # files are released here.
+            released = release_media(retired, storage)
+            stats['files_removed'] = len([name for name in before if not storage.exists(name)])
+        # A moved file that had no twin was only renamed; it frees nothing.
+        reclaimed = released - written_bytes
+
+        if options['orphans']:
+            referenced = set()
+            for avatar, logo in Card.objects.values_list('avatar', 'logo').iterator():
+                referenced.update(n for n in (avatar, logo) if n)
+            for field in IMAGE_FIELDS:
+                upload_dir = Card._meta.get_field(field).upload_to.rstrip('/')
+                for path in list(_walk(storage, upload_dir)):
+                    if path in referenced:
+                        continue
+                    reclaimed += storage.size(path)
+                    stats['files_removed'] += 1
+                    if not dry:
+                        storage.delete(path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"media deduped · relinked={stats['relinked']} deduplicated={stats['deduplicated']} "
+            f"removed={stats['files_removed']} "
+            f"missing={stats['missing']} reclaimed={reclaimed} bytes "
+            f"{'(dry-run)' if dry else ''}"
+        ))
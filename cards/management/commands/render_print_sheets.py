@@ -0,0 +1,57 @@
+"""Render print-ready multi-up sheets for a list of cards.
+
+    python manage.py render_print_sheets acme-ceo acme-cto ... -o order.pdf
+    python manage.py render_print_sheets --file slugs.txt --format png -o sheets/ --dpi 600
+
+Faces are drawn in a process pool (`--workers`, default: CPU count) and
+each sheet is appended to the output as soon as it is full, so memory
+stays flat however long the order is. See `cards.print_sheets`.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.models import Card
+from cards.print_sheets import SHEET_SIZES_MM, jobs_for_cards, write_sheets
+
+
+class Command(BaseCommand):
+    help = "Render front/back multi-up print sheets (PDF or PNG) for the given card slugs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Card slugs, in print order.')
+        parser.add_argument('--file', help='Read slugs from this file, one per line.')
+        parser.add_argument('-o', '--output', required=True, help='PDF file, or directory for --format png.')
+        parser.add_argument('--format', choices=['pdf', 'png'], default='pdf')
+        parser.add_argument('--dpi', type=int, default=300)
+        parser.add_argument('--sheet', choices=sorted(SHEET_SIZES_MM), default='a4')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--base-url', default='', help='Origin for QR codes generated on the fly.')
+
+    def handle(self, *args, **options):
+        slugs = list(options['slugs'])
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as fh:
+                slugs.extend(line.strip() for line in fh if line.strip())
+        if not slugs:
+            raise CommandError('Give at least one slug (or --file).')
+
+        by_slug = {card.slug: card for card in Card.objects.filter(slug__in=slugs)}
+        missing = [slug for slug in slugs if slug not in by_slug]
+        if missing:
+            self.stderr.write(f"skipping unknown slugs: {', '.join(missing)}")
+
+        base_url = options['base_url'] or f"https://{settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'}"
+        jobs = jobs_for_cards([by_slug[slug] for slug in slugs if slug in by_slug], base_url)
+        report = write_sheets(
+            jobs, options['output'], fmt=options['format'], dpi=options['dpi'],
+            sheet=options['sheet'], workers=options['workers'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"print sheets done · cards={report.cards} sheets={report.sheets} "
+            f"qr_generated={report.qr_generated} {report.seconds:.2f}s "
+            f"({report.cards_per_second:.1f} cards/s) → {options['output']}"
+        ))
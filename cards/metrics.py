@@ -0,0 +1,125 @@
+"""Platform-wide counters for the admin surfaces.
+
+`admin_dashboard` and `admin_lifecycle` used to fire one COUNT per tile.
+Each family here (cards, users, interactions, leads, ...) is computed in
+a single conditional-aggregate query — `Count(..., filter=Q(...))` — and
+the whole snapshot is cached for a short TTL, so reloading the admin
+pages doesn't re-scan the tables every time.
+
+Admin actions that change the numbers call `invalidate_platform_metrics()`
+so the admin sees the effect of their own click immediately.
+
+The per-owner lead histogram (leads by status) follows the same pattern
+for the leads inbox tabs and the sidebar "new leads" badge.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Card, CardInteraction, Feedback, LeadCapture, UpgradeRequest
+
+
+PLATFORM_METRICS_CACHE_KEY = 'cards:platform-metrics:v1'
+
+
+def _metrics_ttl() -> int:
+    return getattr(settings, 'ADMIN_METRICS_CACHE_SECONDS', 60)
+
+
+def _card_metrics(week_ago):
+    lifecycle = {
+        key: Count('id', filter=Q(lifecycle_status=key))
+        for key, _label in Card.LIFECYCLE_CHOICES
+    }
+    return Card.objects.aggregate(
+        total=Count('id'),
+        personal=Count('id', filter=Q(card_type=Card.TYPE_PERSONAL)),
+        business=Count('id', filter=Q(card_type=Card.TYPE_BUSINESS)),
+        this_week=Count('id', filter=Q(created_at__gte=week_ago)),
+        **lifecycle,
+    )
+
+
+def _user_metrics(week_ago):
+    return User.objects.aggregate(
+        total=Count('id'),
+        this_week=Count('id', filter=Q(date_joined__gte=week_ago)),
+    )
+
+
+def _interaction_metrics():
+    return CardInteraction.objects.aggregate(
+        views=Count('id', filter=Q(kind=CardInteraction.KIND_VIEW)),
+    )
+
+
+def _lead_metrics():
+    return LeadCapture.objects.aggregate(
+        total=Count('id'),
+        new=Count('id', filter=Q(status=LeadCapture.STATUS_NEW)),
+    )
+
+
+def compute_platform_metrics(now=None) -> dict:
+    """Uncached snapshot — one query per family."""
+    now = now or timezone.now()
+    week_ago = now - timedelta(days=7)
+    return {
+        'cards': _card_metrics(week_ago),
+        'users': _user_metrics(week_ago),
+        'interactions': _interaction_metrics(),
+        'leads': _lead_metrics(),
+        'pending_requests': UpgradeRequest.objects.filter(status=UpgradeRequest.STATUS_PENDING).count(),
+        'feedback': Feedback.objects.count(),
+        'computed_at': now,
+    }
+
+
+def platform_metrics() -> dict:
+    """Cached snapshot used by the admin dashboard and lifecycle pages."""
+    metrics = cache.get(PLATFORM_METRICS_CACHE_KEY)
+    if metrics is None:
+        metrics = compute_platform_metrics()
+        cache.set(PLATFORM_METRICS_CACHE_KEY, metrics, _metrics_ttl())
+    return metrics
+
+
+def invalidate_platform_metrics():
+    cache.delete(PLATFORM_METRICS_CACHE_KEY)
+
+
+# ==========================================================================
+# Per-owner lead histogram
+# ==========================================================================
+
+LEAD_HISTOGRAM_CACHE_KEY = 'cards:lead-histogram:v1:{user_id}'
+
+
+def compute_lead_histogram(user_id) -> dict:
+    """`{status: count, ..., 'total': n}` for one owner — a single query."""
+    per_status = {
+        key: Count('id', filter=Q(status=key))
+        for key, _label in LeadCapture.STATUS_CHOICES
+    }
+    return LeadCapture.objects.filter(owner_id=user_id).aggregate(
+        total=Count('id'),
+        **per_status,
+    )
+
+
+def lead_histogram(user_id) -> dict:
+    key = LEAD_HISTOGRAM_CACHE_KEY.format(user_id=user_id)
+    histogram = cache.get(key)
+    if histogram is None:
+        histogram = compute_lead_histogram(user_id)
+        cache.set(key, histogram, _metrics_ttl())
+    return histogram
+
+
+def invalidate_lead_histogram(user_id):
+    cache.delete(LEAD_HISTOGRAM_CACHE_KEY.format(user_id=user_id))
@@ -0,0 +1,44 @@
+"""Session middleware that leaves the public card endpoints alone.
+
+The card page, its vCard and the tracking beacon are what QR scanners
+hit, and those visitors almost never have an account. For a request to
+one of SESSIONLESS_URL_NAMES that carries no session cookie, the session
+is never saved and no cookie is issued: whatever the view might put in
+it is dropped. View de-duplication uses a signed cookie instead
+(see visitors.py).
+
+A request that does carry a session cookie is handled as usual, because
+the session is what identifies owners and admins: their own views
+aren't counted, and an admin can see an inactive card.
+"""
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+
+SESSIONLESS_URL_NAMES = frozenset({'view_card', 'download_vcard', 'track_interaction'})
+
+
+def is_sessionless(path: str) -> bool:
+    try:
+        return resolve(path).url_name in SESSIONLESS_URL_NAMES
+    except Resolver404:
+        return False
+
+
+class PublicSessionMiddleware(SessionMiddleware):
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.sessionless = (
+            settings.SESSION_COOKIE_NAME not in request.COOKIES and is_sessionless(request.path_info)
+        )
+
+    def process_response(self, request, response):
+        if not getattr(request, 'sessionless', False):
+            return super().process_response(request, response)
+        if request.session.accessed:
+            # The page still depends on whether a session cookie is sent.
+            patch_vary_headers(response, ('Cookie',))
+        return response
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0026_offer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['updated_at'], name='cards_card_updated_f220d5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardinteraction',
+            index=models.Index(fields=['created_at'], name='cards_cardi_created_a13388_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadcapture',
+            index=models.Index(fields=['updated_at'], name='cards_leadc_updated_395e26_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0027_delta_export_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=254)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at', 'id'], name='cards_payme_created_b4b598_idx'),
+        ),
+        migrations.AddField(
+            model_name='paymentsearchtoken',
+            name='payment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='cards.payment'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentsearchtoken',
+            index=models.Index(fields=['token'], name='cards_paysearch_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentsearchtoken',
+            constraint=models.UniqueConstraint(fields=('payment', 'token'), name='cards_paymentsearchtoken_unique'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+"""Build PaymentSearchToken rows for payments created before the index.
+
+Historical models don't carry `Payment.search_token_values`, so the
+normalisation is repeated here; keep it in step with cards.models.
+"""
+
+import re
+
+from django.db import migrations
+
+
+def _msisdn_variants(value):
+    digits = re.sub(r'\D', '', value or '')
+    if not digits:
+        return set()
+    local = digits[3:] if digits.startswith('880') else digits
+    local = local.lstrip('0')
+    if not local:
+        return {digits}
+    return {digits, local, f'0{local}', f'880{local}'}
+
+
+def backfill(apps, schema_editor):
+    Payment = apps.get_model('cards', 'Payment')
+    PaymentSearchToken = apps.get_model('cards', 'PaymentSearchToken')
+
+    batch = []
+    for payment in Payment.objects.select_related('user').iterator(chunk_size=500):
+        tokens = set()
+        username = (payment.user.username or '').strip().lower()
+        if username:
+            tokens.add(username)
+        email = (payment.user.email or '').strip().lower()
+        if email:
+            tokens.add(email)
+            tokens.add(email.rsplit('@', 1)[-1])
+        tokens.update(_msisdn_variants(payment.bkash_payer_msisdn))
+        for value in (payment.bkash_trx_id, payment.bkash_subscription_request_id):
+            value = (value or '').strip().lower()
+            if value:
+                tokens.add(value)
+        batch.extend(PaymentSearchToken(payment_id=payment.pk, token=token[:254]) for token in tokens)
+        if len(batch) >= 2000:
+            PaymentSearchToken.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        PaymentSearchToken.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def clear(apps, schema_editor):
+    apps.get_model('cards', 'PaymentSearchToken').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('cards', '0028_paymentsearchtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, clear),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0029_backfill_payment_search_tokens'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leadcapture',
+            name='owner',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='leadcapture',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='cards_lead_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadcapture',
+            index=models.Index(fields=['owner', 'status', 'created_at', 'id'], name='cards_lead_owner_status_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+"""Copy card.user onto LeadCapture.owner for leads captured before the column."""
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill(apps, schema_editor):
+    Card = apps.get_model('cards', 'Card')
+    LeadCapture = apps.get_model('cards', 'LeadCapture')
+    LeadCapture.objects.filter(owner__isnull=True).update(
+        owner=Subquery(Card.objects.filter(pk=OuterRef('card_id')).values('user_id')[:1]),
+    )
+
+
+def clear(apps, schema_editor):
+    LeadCapture = apps.get_model('cards', 'LeadCapture')
+    LeadCapture.objects.update(owner=None)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('cards', '0030_leadcapture_owner'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, clear),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0031_backfill_leadcapture_owner'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cardchangelog',
+            index=models.Index(fields=['card', 'created_at', 'id'], name='cards_changelog_card_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0032_cardchangelog_card_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=40, unique=True)),
+                ('value', models.TextField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cardchangelog',
+            name='edit_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
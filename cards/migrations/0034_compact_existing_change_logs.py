@@ -0,0 +1,71 @@
+"""Rewrite legacy `{field, label, before, after}` change entries as interned refs.
+
+Historical models can't reach cards.changelog, so the interning is
+repeated here; keep it in step with `compact_entries`.
+"""
+
+import hashlib
+
+from django.db import migrations
+
+
+def _digest(value):
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+def compact(apps, schema_editor):
+    CardChangeLog = apps.get_model('cards', 'CardChangeLog')
+    ChangeLogValue = apps.get_model('cards', 'ChangeLogValue')
+
+    known = dict(ChangeLogValue.objects.values_list('digest', 'id'))
+
+    def ref(value):
+        value = value or ''
+        if not value:
+            return 0
+        digest = _digest(value)
+        if digest not in known:
+            known[digest] = ChangeLogValue.objects.create(digest=digest, value=value).id
+        return known[digest]
+
+    for log in CardChangeLog.objects.only('id', 'changes').iterator(chunk_size=500):
+        changes = log.changes or []
+        if not any(isinstance(item, dict) for item in changes):
+            continue
+        log.changes = [
+            [ref(item.get('field')), ref(item.get('before')), ref(item.get('after'))]
+            if isinstance(item, dict) else item
+            for item in changes
+        ]
+        log.save(update_fields=['changes'])
+
+
+def expand(apps, schema_editor):
+    CardChangeLog = apps.get_model('cards', 'CardChangeLog')
+    ChangeLogValue = apps.get_model('cards', 'ChangeLogValue')
+
+    strings = dict(ChangeLogValue.objects.values_list('id', 'value'))
+    for log in CardChangeLog.objects.only('id', 'changes').iterator(chunk_size=500):
+        changes = log.changes or []
+        if not any(isinstance(item, list) for item in changes):
+            continue
+        log.changes = [
+            {
+                'field': strings.get(item[0], ''),
+                'label': strings.get(item[0], '').replace('_', ' ').title(),
+                'before': strings.get(item[1], ''),
+                'after': strings.get(item[2], ''),
+            } if isinstance(item, list) else item
+            for item in changes
+        ]
+        log.save(update_fields=['changes'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('cards', '0033_compact_change_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact, expand),
+    ]
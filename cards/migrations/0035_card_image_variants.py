@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0034_compact_existing_change_logs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
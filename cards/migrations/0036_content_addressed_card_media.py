@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:50
+
+import cards.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0035_card_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='card',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, storage=cards.storage.card_media_storage, upload_to='avatars/'),
+        ),
+        migrations.AlterField(
+            model_name='card',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, storage=cards.storage.card_media_storage, upload_to='logos/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0036_content_addressed_card_media'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cardtheme',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
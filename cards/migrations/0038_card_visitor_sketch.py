@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0037_cardtheme_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardVisitorSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('registers', models.BinaryField(default=b'')),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visitor_sketches', to='cards.card')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('card', 'day'), name='cards_visitorsketch_card_day_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0038_card_visitor_sketch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelogvalue',
+            name='last_referenced_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,10 +1,14 @@
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils.text import slugify
 from django.utils import timezone
 import logging
 import re
 
+from .storage import card_media_storage
+
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +39,58 @@ class Profile(models.Model):
             self.card_limit = DEFAULT_CARD_LIMIT
             self.save(update_fields=["card_limit"])
 
+def default_trial_end():
+    from django.conf import settings as dj_settings
+    months = getattr(dj_settings, 'CARD_TRIAL_MONTHS', 12)
+    return timezone.now() + timezone.timedelta(days=months * 30)
+
+
+def slug_base_for(card_data, user):
+    base_value = (card_data or {}).get('firstName') or user.get_full_name() or user.username or 'card'
+    return slugify(base_value) or 'card'
+
+
+def _hex_to_rgb(hex_color: str):
+    hex_color = hex_color.lstrip('#')
+    if len(hex_color) == 3:
+        hex_color = ''.join(ch * 2 for ch in hex_color)
+    try:
+        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    except ValueError:
+        return None
+
+
+def _find_rgb(background_value: str):
+    if not background_value:
+        return None
+    match = re.search(r'#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})', background_value)
+    if match:
+        return _hex_to_rgb(match.group(0))
+    rgb_match = re.search(r'rgb\s*\(\s*(\d{1,3})\s*,\s*(\d{1,3})\s*,\s*(\d{1,3})\s*\)', background_value)
+    if rgb_match:
+        return tuple(int(rgb_match.group(i)) for i in range(1, 4))
+    return None
+
+
+def text_color_for(background_value: str) -> str:
+    """White or dark text, whichever reads better on the card background."""
+    rgb = _find_rgb(background_value)
+    if rgb:
+        luminance = (0.299 * rgb[0] + 0.587 * rgb[1] + 0.114 * rgb[2]) / 255
+        return '#FFFFFF' if luminance < 0.55 else '#333333'
+    return '#FFFFFF'
+
+
+def qr_png(url: str) -> bytes:
+    import qrcode
+    from io import BytesIO
+
+    qr_img = qrcode.make(url, box_size=10, border=4)
+    buffer = BytesIO()
+    qr_img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
 class Card(models.Model):
     TYPE_PERSONAL = 'personal'
     TYPE_BUSINESS = 'business'
@@ -45,8 +101,10 @@ class Card(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     card_data = models.JSONField(default=dict)
-    avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
-    logo = models.ImageField(upload_to='logos/', blank=True, null=True)
+    avatar = models.ImageField(upload_to='avatars/', storage=card_media_storage, blank=True, null=True)
+    logo = models.ImageField(upload_to='logos/', storage=card_media_storage, blank=True, null=True)
+    # Derivative manifests per image field, maintained by cards.images.
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     qr_code = models.ImageField(upload_to='qrcodes/', blank=True, null=True)
     slug = models.SlugField(max_length=150, unique=True, blank=True)
     slug_customized = models.BooleanField(
@@ -89,6 +147,12 @@ class Card(models.Model):
         help_text="Highest warning stage already sent (30/7/1 → 1/2/3). Prevents re-sending.",
     )
 
+    class Meta:
+        indexes = [
+            # Delta exports scan `updated_at > since`.
+            models.Index(fields=['updated_at']),
+        ]
+
     def get_absolute_url(self):
         from django.urls import reverse
         return reverse('view_card', args=[self.slug])
@@ -96,78 +160,79 @@ class Card(models.Model):
     def save(self, *args, **kwargs):
         # First-save: stamp the 12-month trial clock from creation time.
         if not self.pk and not self.trial_ends_at:
-            from django.conf import settings as dj_settings
-            months = getattr(dj_settings, 'CARD_TRIAL_MONTHS', 12)
-            self.trial_ends_at = timezone.now() + timezone.timedelta(days=months * 30)
+            self.trial_ends_at = default_trial_end()
 
         if not self.slug:
-            base_value = self.card_data.get('firstName') or self.user.get_full_name() or self.user.username or 'card'
-            base_slug = slugify(base_value) or 'card'
+            base_slug = slug_base_for(self.card_data, self.user)
             slug_candidate = base_slug
             index = 2
             while Card.objects.exclude(pk=self.pk).filter(slug=slug_candidate).exists():
                 slug_candidate = f"{base_slug}-{index}"
                 index += 1
             self.slug = slug_candidate
-        
-        # Set text color based on background luminance
-        def _hex_to_rgb(hex_color: str):
-            hex_color = hex_color.lstrip('#')
-            if len(hex_color) == 3:
-                hex_color = ''.join(ch * 2 for ch in hex_color)
-            try:
-                return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-            except ValueError:
-                return None
-
-        def _find_rgb(background_value: str):
-            if not background_value:
-                return None
-            match = re.search(r'#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})', background_value)
-            if match:
-                return _hex_to_rgb(match.group(0))
-            rgb_match = re.search(r'rgb\s*\(\s*(\d{1,3})\s*,\s*(\d{1,3})\s*,\s*(\d{1,3})\s*\)', background_value)
-            if rgb_match:
-                return tuple(int(rgb_match.group(i)) for i in range(1, 4))
-            return None
 
-        background_value = self.card_data.get('background_style')
-        if not background_value:
-            self.card_data['background_style'] = '#000000'
-            background_value = '#000000'
-        rgb = _find_rgb(background_value)
-        if rgb:
-            luminance = (0.299 * rgb[0] + 0.587 * rgb[1] + 0.114 * rgb[2]) / 255
-            self.text_color = '#FFFFFF' if luminance < 0.55 else '#333333'
-        else:
-            self.text_color = '#FFFFFF'
+        # Set text color based on background luminance
+        self.apply_background_defaults()
+
+        # Fresh uploads are re-encoded without EXIF before they hit storage.
+        from .images import IMAGE_FIELDS, refresh_image_variants, sanitize_upload
+        for field_name in IMAGE_FIELDS:
+            upload = getattr(self, field_name)
+            if upload and not upload._committed:
+                cleaned = sanitize_upload(upload.file)
+                if cleaned is not None:
+                    upload.file = cleaned
+
+        # Partial saves still count as a change (card ETags and delta
+        # exports key off updated_at).
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'updated_at']
 
         super().save(*args, **kwargs) # Save once to get an ID for new objects
 
+        if refresh_image_variants(self):
+            super().save(update_fields=['image_variants'])
+
         # Generate QR code if it doesn't exist or needs update
         # NOTE: This logic runs after save. We need to call save again if qr_code is updated.
         # To avoid recursion, we check if the qr_code field is already set.
-        
         try:
-            from django.conf import settings
-            import qrcode
-            from io import BytesIO
-            from django.core.files import File
-
-            domain = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
-            qr_code_url = f"https://{domain}{self.get_absolute_url()}?qr=1"
-
-            qr_img = qrcode.make(qr_code_url, box_size=10, border=4)
-            buffer = BytesIO()
-            qr_img.save(buffer, format='PNG')
-            file_name = f'qr_code_{self.slug}.png'
-
+            file_name = self.qr_file_name()
             if not self.qr_code or self.qr_code.name != file_name:
-                self.qr_code.save(file_name, File(buffer), save=False) # save=False to not trigger another save
+                from django.core.files.base import ContentFile
+                self.qr_code.save(file_name, ContentFile(qr_png(self.qr_target_url())), save=False) # save=False to not trigger another save
                 super().save(update_fields=['qr_code']) # Use update_fields to avoid recursion
         except Exception as exc:
             logger.warning("Skipping QR generation for card %s: %s", self.pk or self.slug, exc)
 
+        from .versioning import invalidate_card_state, invalidate_landing_demo
+        invalidate_card_state(self.slug)
+        invalidate_landing_demo(self.slug)
+
+    def apply_background_defaults(self):
+        background_value = self.card_data.get('background_style')
+        if not background_value:
+            self.card_data['background_style'] = '#000000'
+            background_value = '#000000'
+        self.text_color = text_color_for(background_value)
+
+    def qr_target_url(self):
+        from django.conf import settings
+        domain = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        return f"https://{domain}{self.get_absolute_url()}?qr=1"
+
+    def qr_file_name(self):
+        return f'qr_code_{self.slug}.png'
+
+    def delete(self, *args, **kwargs):
+        from .versioning import invalidate_card_state, invalidate_landing_demo
+        slug = self.slug
+        result = super().delete(*args, **kwargs)
+        invalidate_card_state(slug)
+        invalidate_landing_demo(slug)
+        return result
+
 
     def __str__(self):
         first_name = self.card_data.get('firstName', '')
@@ -266,11 +331,18 @@ class CardChangeLog(models.Model):
     card = models.ForeignKey('Card', on_delete=models.CASCADE, related_name='change_logs')
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='card_change_logs')
     summary = models.CharField(max_length=255, blank=True)
+    # Compact `[field_ref, before_ref, after_ref]` triples pointing at
+    # ChangeLogValue rows (see cards/changelog.py).
     changes = models.JSONField(default=list, blank=True)
+    # >1 on snapshots produced by `manage.py compact_card_history`.
+    edit_count = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['card', 'created_at', 'id'], name='cards_changelog_card_idx'),
+        ]
 
     def __str__(self):
         if self.summary:
@@ -278,6 +350,17 @@ class CardChangeLog(models.Model):
         return f"{self.card} · {self.created_at:%Y-%m-%d %H:%M}"
 
 
+class ChangeLogValue(models.Model):
+    """Interned string referenced by CardChangeLog entries — field keys and values alike."""
+    digest = models.CharField(max_length=40, unique=True)
+    value = models.TextField()
+    # Touched by `intern_values`; pruning leaves recently referenced rows alone.
+    last_referenced_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.value[:60]
+
+
 class Feedback(models.Model):
     name = models.CharField(max_length=150)
     email = models.EmailField(blank=True)
@@ -318,12 +401,28 @@ class CardInteraction(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['card', 'kind', 'created_at']),
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
         return f"{self.get_kind_display()} · {self.card} · {self.created_at:%Y-%m-%d %H:%M}"
 
 
+class CardVisitorSketch(models.Model):
+    """One card's distinct visitors on one (UTC) day, as a serialized HyperLogLog (see hll.py)."""
+    card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='visitor_sketches')
+    day = models.DateField()
+    registers = models.BinaryField(default=b'')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['card', 'day'], name='cards_visitorsketch_card_day_unique'),
+        ]
+
+    def __str__(self):
+        return f"Visitors · {self.card} · {self.day:%Y-%m-%d}"
+
+
 class CardTheme(models.Model):
     """Curated visual themes card owners can pick in the editor."""
     slug = models.SlugField(max_length=60, unique=True)
@@ -335,6 +434,7 @@ class CardTheme(models.Model):
     is_premium = models.BooleanField(default=False)       # Pro-only themes
     sort_order = models.PositiveSmallIntegerField(default=100)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['sort_order', 'name']
@@ -342,6 +442,17 @@ class CardTheme(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        from .versioning import bump_theme_generation
+        super().save(*args, **kwargs)
+        bump_theme_generation()
+
+    def delete(self, *args, **kwargs):
+        from .versioning import bump_theme_generation
+        result = super().delete(*args, **kwargs)
+        bump_theme_generation()
+        return result
+
 
 class Payment(models.Model):
     """Records both Stripe and bKash transactions in one uniform shape."""
@@ -390,11 +501,110 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
-        indexes = [models.Index(fields=['user', 'status', 'created_at'])]
+        indexes = [
+            models.Index(fields=['user', 'status', 'created_at']),
+            # Keyset pagination on the admin payments statement.
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.get_gateway_display()} · {self.amount} {self.currency} · {self.get_status_display()}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.refresh_search_tokens()
+
+    def search_token_values(self) -> set[str]:
+        """Normalised values the admin payments search matches by prefix."""
+        tokens = set()
+        username = (self.user.username or '').strip().lower()
+        if username:
+            tokens.add(username)
+        email = (self.user.email or '').strip().lower()
+        if email:
+            tokens.add(email)
+            tokens.add(email.rsplit('@', 1)[-1])
+        tokens.update(msisdn_search_variants(self.bkash_payer_msisdn))
+        for value in (self.bkash_trx_id, self.bkash_subscription_request_id):
+            value = (value or '').strip().lower()
+            if value:
+                tokens.add(value)
+        return {token[:PaymentSearchToken.TOKEN_MAX_LENGTH] for token in tokens}
+
+    def refresh_search_tokens(self):
+        wanted = self.search_token_values()
+        existing = set(self.search_tokens.values_list('token', flat=True))
+        if wanted == existing:
+            return
+        stale = existing - wanted
+        if stale:
+            self.search_tokens.filter(token__in=stale).delete()
+        PaymentSearchToken.objects.bulk_create(
+            [PaymentSearchToken(payment=self, token=token) for token in wanted - existing],
+            ignore_conflicts=True,
+        )
+
+
+@receiver(post_save, sender=User, dispatch_uid='cards.payment_search_tokens')
+def refresh_payment_search_tokens(sender, instance, created, update_fields=None, **kwargs):
+    """Username and email are search tokens too: re-index the user's payments when they change."""
+    if created or (update_fields is not None and not {'username', 'email'} & set(update_fields)):
+        return   # e.g. the `last_login` save on every login
+    for payment in instance.payments.all():
+        payment.user = instance
+        payment.refresh_search_tokens()
+
+
+def msisdn_search_variants(value: str) -> set[str]:
+    """Digit-only spellings of a BD wallet number: 01…, 1…, 8801…."""
+    digits = re.sub(r'\D', '', value or '')
+    if not digits:
+        return set()
+    local = digits
+    if local.startswith('880'):
+        local = local[3:]
+    local = local.lstrip('0')
+    if not local:
+        return {digits}
+    return {digits, local, f'0{local}', f'880{local}'}
+
+
+def normalize_payment_search_query(raw: str) -> str:
+    """Normalise an admin search string the same way tokens are stored."""
+    query = (raw or '').strip().lower()
+    # "+880 1770-618575" → "8801770618575"
+    if query and re.fullmatch(r'[+\d\s()-]+', query):
+        query = re.sub(r'\D', '', query)
+    return query
+
+
+class PaymentSearchToken(models.Model):
+    """Search index for the admin payments statement.
+
+    One row per normalised searchable value of a Payment (username,
+    email, email domain, wallet number spellings, trx / request IDs),
+    so a search is a prefix or exact match on one indexed column instead
+    of `icontains` across five columns and a join to auth_user.
+    """
+    TOKEN_MAX_LENGTH = 254
+
+    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=TOKEN_MAX_LENGTH)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['payment', 'token'], name='cards_paymentsearchtoken_unique'),
+        ]
+        indexes = [
+            # Serves both the exact match and LIKE 'prefix%' (which needs the
+            # pattern opclass on PostgreSQL); a plain btree on token would be
+            # a duplicate to maintain on every token refresh.
+            models.Index(fields=['token'], name='cards_paysearch_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
+    def __str__(self):
+        return self.token
+
 
 class LeadCapture(models.Model):
     STATUS_NEW      = 'new'
@@ -407,6 +617,12 @@ class LeadCapture(models.Model):
     ]
 
     card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='leads')
+    # Copy of card.user so the owner's inbox filters on an indexed column
+    # instead of joining through cards. Kept in sync by save().
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True,
+        editable=False, related_name='+',
+    )
     name = models.CharField(max_length=150)
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=30, blank=True)
@@ -420,8 +636,16 @@ class LeadCapture(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['card', 'status', 'created_at']),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['owner', 'created_at', 'id'], name='cards_lead_owner_idx'),
+            models.Index(fields=['owner', 'status', 'created_at', 'id'], name='cards_lead_owner_status_idx'),
         ]
 
+    def save(self, *args, **kwargs):
+        if self.card_id and not self.owner_id:
+            self.owner_id = self.card.user_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Lead from {self.name} for {self.card}"
 
@@ -621,6 +845,17 @@ class Offer(models.Model):
     def __str__(self):
         return f'{self.title} ({self.get_applies_to_display()})'
 
+    def save(self, *args, **kwargs):
+        from .versioning import bump_offer_generation
+        super().save(*args, **kwargs)
+        bump_offer_generation()
+
+    def delete(self, *args, **kwargs):
+        from .versioning import bump_offer_generation
+        result = super().delete(*args, **kwargs)
+        bump_offer_generation()
+        return result
+
     def is_live(self, at=None):
         from django.utils import timezone
         now = at or timezone.now()
@@ -99,13 +99,13 @@ def premium_required(feature_key: str):
 
 
 def themes_for_user(all_active_themes, user):
-    """Annotate each theme with a `locked` flag so the template can show
-    a paywall chip on premium themes for free users. Returns the same
-    queryset/list, unchanged; callers should render `theme.locked`.
+    """The themes as the picker shows them to `user`: premium ones come
+    back as locked copies for free users, so the template can show a
+    paywall chip (`theme.locked`). The registry's ThemeViews are shared
+    across requests and never modified.
     """
-    premium = is_premium(user)
-    result = []
-    for theme in all_active_themes:
-        theme.locked = bool(getattr(theme, 'is_premium', False)) and not premium
-        result.append(theme)
-    return result
+    from dataclasses import replace
+
+    if is_premium(user):
+        return list(all_active_themes)
+    return [replace(theme, locked=True) if theme.is_premium else theme for theme in all_active_themes]
@@ -0,0 +1,394 @@
+"""Multi-up print sheets for physical cards.
+
+`physical_card` is one ID-1 card per browser page, which is fine for an
+owner printing their own card but not for a print shop running a
+corporate order of hundreds. Here cards are rasterised with Pillow at
+the requested DPI and laid out ten to an A4 sheet (2 x 5, with crop
+marks): a sheet of fronts followed by the matching sheet of backs,
+columns mirrored so they line up when printed long-edge duplex.
+
+Rendering is split the usual way for CPU-bound work:
+
+  - `card_job()` (main process) turns a Card into a plain dict — text,
+    colours and file paths — so workers never touch the database.
+  - `render_faces()` (pool worker) draws the front and back of one card.
+  - `write_sheets()` (main process) places faces onto the current sheet
+    as they arrive, in order, and appends each finished sheet to the
+    PDF (or writes a PNG pair) before starting the next, so at most one
+    sheet is held in memory.
+
+QR codes come from the card's stored `qr_code` file (written on save);
+only cards without one get a QR generated on the fly.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+CARD_MM = (85.6, 54.0)
+SHEET_SIZES_MM = {'a4': (210.0, 297.0), 'letter': (215.9, 279.4)}
+DEFAULT_BACKGROUND = 'linear-gradient(150deg, #05060B 0%, #0B0D14 40%, #124D33 100%)'
+DEFAULT_ACCENT = '#7CFFB2'
+DEFAULT_TEXT = '#F2F4F8'
+CROP_MARK_MM = 3.0
+
+_FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+_FONTS = {
+    'regular': os.path.join(_FONT_DIR, 'BaiJamjuree-Regular.ttf'),
+    'bold': os.path.join(_FONT_DIR, 'BaiJamjuree-Bold.ttf'),
+    'bengali': os.path.join(_FONT_DIR, 'AnekBangla-Regular.ttf'),
+}
+_BENGALI = re.compile('[ঀ-৿]')
+_HEX = re.compile(r'#(?:[0-9a-fA-F]{6}|[0-9a-fA-F]{3})\b')
+
+
+@dataclass
+class SheetReport:
+    cards: int = 0
+    sheets: int = 0
+    qr_generated: int = 0
+    seconds: float = 0.0
+    paths: tuple = ()
+
+    @property
+    def cards_per_second(self) -> float:
+        return self.cards / self.seconds if self.seconds else 0.0
+
+
+def _mm(value: float, dpi: int) -> int:
+    return round(value * dpi / 25.4)
+
+
+def _rgb(value: str, default: str):
+    match = _HEX.search(value or '') or _HEX.search(default)
+    code = match.group(0).lstrip('#')
+    if len(code) == 3:
+        code = ''.join(ch * 2 for ch in code)
+    return tuple(int(code[i:i + 2], 16) for i in (0, 2, 4))
+
+
+# ==========================================================================
+# Main process: Card -> job
+# ==========================================================================
+
+def _path_if_exists(file) -> str:
+    if not file:
+        return ''
+    try:
+        path = file.path
+    except (NotImplementedError, ValueError):
+        return ''
+    return path if os.path.exists(path) else ''
+
+
+def card_job(card, theme=None, base_url: str = '') -> dict:
+    d = card.card_data or {}
+    phone = (d.get('phone') or '').strip()
+    return {
+        'slug': card.slug,
+        'first': (d.get('firstName') or '').strip(),
+        'last': (d.get('lastName') or '').strip(),
+        'title': (d.get('jobTitle') or '').strip(),
+        'company': (d.get('company') or '').strip(),
+        'phone': phone if not phone or phone.startswith('+') else f'+{phone}',
+        'email': (d.get('email') or '').strip(),
+        'website': (d.get('website') or '').strip(),
+        'address': (d.get('address') or '').strip(),
+        'business': card.card_type == card.TYPE_BUSINESS,
+        'background': theme.background if theme else DEFAULT_BACKGROUND,
+        'accent': theme.accent_color if theme else DEFAULT_ACCENT,
+        'text': theme.text_color if theme else DEFAULT_TEXT,
+        'avatar': _path_if_exists(card.avatar),
+        'logo': _path_if_exists(card.logo),
+        'qr': _path_if_exists(card.qr_code),
+        'url': f"{base_url.rstrip('/')}{card.get_absolute_url()}?qr=1",
+    }
+
+
+# ==========================================================================
+# Worker: job -> (front, back)
+# ==========================================================================
+
+def _font(text: str, px: int, bold: bool = False):
+    from PIL import ImageFont
+
+    key = 'bengali' if _BENGALI.search(text or '') else ('bold' if bold else 'regular')
+    try:
+        return ImageFont.truetype(_FONTS[key], px)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _fit(draw, text: str, max_width: int, px: int, bold: bool = False):
+    """Largest font (down to 60% of `px`) that fits, then truncate with an ellipsis."""
+    for size in range(px, max(int(px * 0.6), 1) - 1, -1):
+        font = _font(text, size, bold)
+        if draw.textlength(text, font=font) <= max_width:
+            return text, font
+    while text and draw.textlength(text + '…', font=font) > max_width:
+        text = text[:-1]
+    return text + '…', font
+
+
+def _background(size, job):
+    from PIL import Image
+
+    stops = _HEX.findall(job['background'] or '')
+    start = _rgb(stops[0] if stops else '', DEFAULT_BACKGROUND)
+    end = _rgb(stops[-1] if stops else '', DEFAULT_BACKGROUND)
+    vertical = Image.linear_gradient('L')
+    # Averaging the vertical and horizontal ramps gives a top-left to
+    # bottom-right diagonal, close enough to the CSS 135-150deg gradients.
+    mask = Image.blend(vertical, vertical.transpose(Image.Transpose.ROTATE_90).transpose(Image.Transpose.FLIP_LEFT_RIGHT), 0.5).resize(size)
+    return Image.composite(Image.new('RGB', size, end), Image.new('RGB', size, start), mask)
+
+
+def _paste_image(canvas, path: str, box, circle: bool = False):
+    from PIL import Image, ImageDraw, ImageOps
+
+    left, top, side = box
+    try:
+        with Image.open(path) as src:
+            img = ImageOps.fit(ImageOps.exif_transpose(src).convert('RGBA'), (side, side), Image.LANCZOS)
+    except Exception:
+        return False
+    mask = img.getchannel('A')
+    if circle:
+        round_mask = Image.new('L', (side, side), 0)
+        ImageDraw.Draw(round_mask).ellipse((0, 0, side - 1, side - 1), fill=255)
+        mask = Image.composite(mask, round_mask, round_mask)
+    canvas.paste(img, (left, top), mask)
+    return True
+
+
+def _qr_image(job, side: int):
+    from PIL import Image
+
+    generated = False
+    img = None
+    if job['qr']:
+        try:
+            with Image.open(job['qr']) as src:
+                img = src.convert('RGB')
+        except Exception:
+            img = None
+    if img is None:
+        import qrcode
+
+        img = qrcode.make(job['url'], box_size=10, border=2).get_image().convert('RGB')
+        generated = True
+    # QR modules must stay crisp: nearest-neighbour, never smoothing.
+    return img.resize((side, side), Image.NEAREST), generated
+
+
+def _draw_front(job, dpi):
+    from PIL import ImageDraw
+
+    width, height = _mm(CARD_MM[0], dpi), _mm(CARD_MM[1], dpi)
+    card = _background((width, height), job)
+    draw = ImageDraw.Draw(card)
+    text = _rgb(job['text'], DEFAULT_TEXT)
+    accent = _rgb(job['accent'], DEFAULT_ACCENT)
+    pad = _mm(5, dpi)
+
+    brand, brand_font = _fit(draw, 'MY·Card', width // 3, _mm(3.2, dpi), bold=True)
+    draw.text((pad, pad), brand, font=brand_font, fill=text)
+    kind = 'BUSINESS' if job['business'] else 'PERSONAL'
+    kind_font = _font(kind, _mm(2.2, dpi), bold=True)
+    draw.text((width - pad - draw.textlength(kind, font=kind_font), pad), kind, font=kind_font, fill=accent)
+
+    avatar_side = _mm(18, dpi)
+    avatar_top = _mm(15, dpi)
+    if not (job['avatar'] and _paste_image(card, job['avatar'], (pad, avatar_top, avatar_side), circle=True)):
+        draw.ellipse((pad, avatar_top, pad + avatar_side, avatar_top + avatar_side), fill=accent)
+        initials = (job['first'][:1] + job['last'][:1]).upper() or '·'
+        initials_font = _font(initials, avatar_side // 2, bold=True)
+        draw.text(
+            (pad + avatar_side / 2, avatar_top + avatar_side / 2), initials,
+            font=initials_font, fill=(5, 6, 11), anchor='mm',
+        )
+
+    text_left = pad + avatar_side + _mm(4, dpi)
+    text_width = width - text_left - pad
+    name, name_font = _fit(draw, f"{job['first']} {job['last']}".strip() or job['slug'], text_width, _mm(5, dpi), bold=True)
+    draw.text((text_left, avatar_top + _mm(2, dpi)), name, font=name_font, fill=text)
+    role = ' · '.join(part for part in (job['title'], job['company']) if part)
+    if role:
+        role, role_font = _fit(draw, role, text_width, _mm(2.8, dpi))
+        draw.text((text_left, avatar_top + _mm(9, dpi)), role, font=role_font, fill=accent)
+
+    line_y = _mm(38, dpi)
+    for value in (job['phone'], job['email']):
+        if not value:
+            continue
+        value, font = _fit(draw, value, width - 2 * pad, _mm(2.6, dpi))
+        draw.text((pad, line_y), value, font=font, fill=text)
+        line_y += _mm(4, dpi)
+
+    footer = (job['website'] or f"mycard.dupno.com/card/{job['slug']}").replace('https://', '').replace('http://', '')
+    logo_side = _mm(9, dpi)
+    footer, footer_font = _fit(draw, footer, width - 2 * pad - logo_side, _mm(2.4, dpi))
+    draw.text((pad, height - pad), footer, font=footer_font, fill=text, anchor='ls')
+    if job['logo']:
+        _paste_image(card, job['logo'], (width - pad - logo_side, height - pad - logo_side, logo_side))
+    return card
+
+
+def _draw_back(job, dpi):
+    from PIL import ImageDraw
+
+    width, height = _mm(CARD_MM[0], dpi), _mm(CARD_MM[1], dpi)
+    card = _background((width, height), job)
+    draw = ImageDraw.Draw(card)
+    text = _rgb(job['text'], DEFAULT_TEXT)
+    accent = _rgb(job['accent'], DEFAULT_ACCENT)
+    pad = _mm(5, dpi)
+
+    qr_side = _mm(30, dpi)
+    quiet = _mm(1.5, dpi)
+    qr_left, qr_top = pad, (height - qr_side) // 2
+    draw.rectangle(
+        (qr_left - quiet, qr_top - quiet, qr_left + qr_side + quiet, qr_top + qr_side + quiet),
+        fill=(255, 255, 255),
+    )
+    qr, generated = _qr_image(job, qr_side)
+    card.paste(qr, (qr_left, qr_top))
+
+    info_left = qr_left + qr_side + _mm(5, dpi)
+    info_width = width - info_left - pad
+    caption, caption_font = _fit(draw, 'SCAN THIS CODE', info_width, _mm(2.2, dpi), bold=True)
+    draw.text((info_left, qr_top), caption, font=caption_font, fill=accent)
+    heading, heading_font = _fit(draw, 'Save my digital card', info_width, _mm(3.6, dpi), bold=True)
+    draw.text((info_left, qr_top + _mm(4, dpi)), heading, font=heading_font, fill=text)
+    if job['address']:
+        address, address_font = _fit(draw, job['address'], info_width, _mm(2.4, dpi))
+        draw.text((info_left, qr_top + _mm(12, dpi)), address, font=address_font, fill=text)
+
+    footer, footer_font = _fit(draw, f"mycard.dupno.com/card/{job['slug']}", info_width, _mm(2.2, dpi))
+    draw.text((info_left, qr_top + qr_side), footer, font=footer_font, fill=text, anchor='ls')
+    return card, generated
+
+
+def render_faces(job: dict, dpi: int):
+    """Front and back of one card as raw RGB bytes (cheap to send between processes)."""
+    front = _draw_front(job, dpi)
+    back, generated = _draw_back(job, dpi)
+    return front.tobytes(), back.tobytes(), front.size, generated
+
+
+def _render_star(args):
+    return render_faces(*args)
+
+
+# ==========================================================================
+# Main process: faces -> sheets on disk
+# ==========================================================================
+
+def sheet_layout(sheet: str, dpi: int):
+    """(sheet_px, card_px, columns, rows, origin_px) for an ID-1 grid centred on the sheet."""
+    sheet_w_mm, sheet_h_mm = SHEET_SIZES_MM[sheet]
+    usable_w = sheet_w_mm - 2 * CROP_MARK_MM
+    usable_h = sheet_h_mm - 2 * CROP_MARK_MM
+    columns = int(usable_w // CARD_MM[0])
+    rows = int(usable_h // CARD_MM[1])
+    origin_mm = ((sheet_w_mm - columns * CARD_MM[0]) / 2, (sheet_h_mm - rows * CARD_MM[1]) / 2)
+    return (
+        (_mm(sheet_w_mm, dpi), _mm(sheet_h_mm, dpi)),
+        (_mm(CARD_MM[0], dpi), _mm(CARD_MM[1], dpi)),
+        columns, rows,
+        (_mm(origin_mm[0], dpi), _mm(origin_mm[1], dpi)),
+    )
+
+
+def _new_sheet(size, card_px, columns, rows, origin, dpi):
+    from PIL import Image, ImageDraw
+
+    sheet = Image.new('RGB', size, (255, 255, 255))
+    draw = ImageDraw.Draw(sheet)
+    mark = _mm(CROP_MARK_MM - 0.5, dpi)
+    stroke = max(1, dpi // 300)
+    ox, oy = origin
+    xs = [ox + c * card_px[0] for c in range(columns + 1)]
+    ys = [oy + r * card_px[1] for r in range(rows + 1)]
+    for x in xs:
+        draw.line((x, oy - mark, x, oy - 2), fill=(0, 0, 0), width=stroke)
+        draw.line((x, ys[-1] + 2, x, ys[-1] + mark), fill=(0, 0, 0), width=stroke)
+    for y in ys:
+        draw.line((ox - mark, y, ox - 2, y), fill=(0, 0, 0), width=stroke)
+        draw.line((xs[-1] + 2, y, xs[-1] + mark, y), fill=(0, 0, 0), width=stroke)
+    return sheet
+
+
+def _faces(jobs, dpi, workers):
+    if workers <= 1:
+        for job in jobs:
+            yield render_faces(job, dpi)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() keeps submission order, so sheets come out in slug order.
+        yield from pool.map(_render_star, ((job, dpi) for job in jobs), chunksize=4)
+
+
+def write_sheets(jobs, output: str, fmt: str = 'pdf', dpi: int = 300, sheet: str = 'a4', workers: int = 1) -> SheetReport:
+    """Render `jobs` onto duplex sheets at `output` (a .pdf file, or a directory for PNGs)."""
+    from PIL import Image
+
+    size, card_px, columns, rows, origin = sheet_layout(sheet, dpi)
+    per_sheet = columns * rows
+    report = SheetReport()
+    paths = []
+    started = time.perf_counter()
+
+    if fmt == 'png':
+        os.makedirs(output, exist_ok=True)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        if os.path.exists(output):
+            os.remove(output)
+
+    fronts = backs = None
+
+    def flush():
+        report.sheets += 1
+        if fmt == 'png':
+            for side, image in (('front', fronts), ('back', backs)):
+                path = os.path.join(output, f'sheet-{report.sheets:04d}-{side}.png')
+                image.save(path, format='PNG', dpi=(dpi, dpi))
+                paths.append(path)
+        else:
+            for image in (fronts, backs):
+                image.save(output, format='PDF', resolution=dpi, append=os.path.exists(output))
+
+    for front, back, face_size, generated in _faces(jobs, dpi, workers):
+        slot = report.cards % per_sheet
+        if slot == 0:
+            if fronts is not None:
+                flush()
+            fronts = _new_sheet(size, card_px, columns, rows, origin, dpi)
+            backs = _new_sheet(size, card_px, columns, rows, origin, dpi)
+        row, column = divmod(slot, columns)
+        y = origin[1] + row * card_px[1]
+        fronts.paste(Image.frombytes('RGB', face_size, front), (origin[0] + column * card_px[0], y))
+        # Long-edge duplex flips left/right: mirror the columns on the back.
+        backs.paste(Image.frombytes('RGB', face_size, back), (origin[0] + (columns - 1 - column) * card_px[0], y))
+        report.cards += 1
+        report.qr_generated += int(generated)
+
+    if fronts is not None:
+        flush()
+    if fmt != 'png' and report.sheets:
+        paths.append(output)
+
+    report.seconds = time.perf_counter() - started
+    report.paths = tuple(paths)
+    return report
+
+
+def jobs_for_cards(cards, base_url: str = ''):
+    """Jobs for a queryset of cards, in the given order, with themes from the registry."""
+    from .themes import active_themes
+
+    themes = active_themes()
+    return [card_job(card, themes.get((card.card_data or {}).get('theme_slug')), base_url) for card in cards]
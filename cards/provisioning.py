@@ -0,0 +1,241 @@
+"""Bulk card provisioning from a CSV (one row per employee).
+
+Creating cards one `Card.save()` at a time costs a slug probe per
+candidate, a luminance parse and a QR render inside the request, so a
+500-row spreadsheet is minutes of serial work. `provision_cards()` does
+the same work in passes instead:
+
+  1. every row is validated with the builder's own form (`CardForm` or
+     `BusinessCardForm`), so bulk cards obey the same rules
+  2. slugs are allocated in memory against one prefix query per batch of
+     distinct bases, using the same `base`, `base-2`, ... scheme as
+     `Card.save()`
+  3. valid rows are inserted with `bulk_create`; if a card created
+     meanwhile (through the builder, say) took one of the slugs, they are
+     allocated again and the insert retried
+  4. QR codes are rendered in a process pool and written with a single
+     `bulk_update`
+
+Each phase is linear in the row count. Every row gets a result
+(`created`, `invalid`, `over_limit`, `failed`, or `valid` on a dry run)
+for the report.
+
+Column names follow the form fields (`firstName`, `lastName`, `email`,
+`jobTitle`, `company`, `website`, `address`, `linkedin`, ...). `phone`
+and `whatsapp` take a full international number. The optional
+`card_type` (personal/business) and `theme_slug` columns are also read.
+"""
+
+import csv
+import io
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .forms import COUNTRY_CHOICES, BusinessCardForm, CardForm
+from .models import Card, default_trial_end, qr_png, slug_base_for
+from .permissions import is_premium
+from .themes import active_themes
+
+FORM_BY_TYPE = {Card.TYPE_PERSONAL: CardForm, Card.TYPE_BUSINESS: BusinessCardForm}
+REPORT_COLUMNS = ['row', 'status', 'slug', 'name', 'errors']
+SLUG_QUERY_BATCH = 100
+INSERT_BATCH = 200
+INSERT_ATTEMPTS = 3
+DEFAULT_COUNTRY = '880'
+
+_COUNTRY_CODES = sorted((code for code, _label in COUNTRY_CHOICES), key=len, reverse=True)
+
+
+@dataclass
+class RowResult:
+    row: int
+    status: str
+    slug: str = ''
+    name: str = ''
+    errors: str = ''
+
+
+@dataclass
+class ProvisionReport:
+    rows: list = field(default_factory=list)
+    qr_generated: int = 0
+
+    def count(self, status: str) -> int:
+        return sum(1 for result in self.rows if result.status == status)
+
+    def as_csv(self) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(REPORT_COLUMNS)
+        for result in self.rows:
+            writer.writerow([result.row, result.status, result.slug, result.name, result.errors])
+        return buffer.getvalue()
+
+
+def read_rows(fileobj):
+    """DictReader over an uploaded/opened CSV, tolerating a UTF-8 BOM from Excel."""
+    raw = fileobj.read()
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8-sig')
+    return list(csv.DictReader(io.StringIO(raw.lstrip('\ufeff'))))
+
+
+def _split_number(value: str):
+    digits = re.sub(r'\D', '', value or '')
+    if not digits:
+        return '', ''
+    for code in _COUNTRY_CODES:
+        if digits.startswith(code):
+            return code, digits[len(code):]
+    return DEFAULT_COUNTRY, digits
+
+
+def form_data(row: dict) -> dict:
+    """Map a CSV row onto the builder form's POST shape."""
+    data = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+    for name in ('phone', 'whatsapp'):
+        if data.get(f'{name}_number'):
+            data.setdefault(f'{name}_country', DEFAULT_COUNTRY)
+            continue
+        country, number = _split_number(data.pop(name, ''))
+        data[f'{name}_country'] = country
+        data[f'{name}_number'] = number
+    return data
+
+
+def _form_errors(form) -> str:
+    return '; '.join(
+        f"{name}: {' '.join(errors)}" if name != '__all__' else ' '.join(errors)
+        for name, errors in form.errors.items()
+    )
+
+
+def allocate_slugs(bases):
+    """One free slug per base (duplicates included), without a query per candidate."""
+    taken = set()
+    distinct = sorted(set(bases))
+    for start in range(0, len(distinct), SLUG_QUERY_BATCH):
+        query = Q()
+        for base in distinct[start:start + SLUG_QUERY_BATCH]:
+            query |= Q(slug=base) | Q(slug__startswith=f'{base}-')
+        taken.update(Card.objects.filter(query).values_list('slug', flat=True))
+
+    next_index = {}
+    slugs = []
+    for base in bases:
+        if base not in taken:
+            candidate = base
+        else:
+            index = next_index.get(base, 2)
+            while f'{base}-{index}' in taken:
+                index += 1
+            candidate = f'{base}-{index}'
+            next_index[base] = index + 1
+        taken.add(candidate)
+        slugs.append(candidate)
+    return slugs
+
+
+def _qr_job(args):
+    slug, url = args
+    return slug, qr_png(url)
+
+
+def generate_qr_codes(cards, workers: int = 1) -> int:
+    """Render QR PNGs for freshly inserted cards in parallel and store them in one update."""
+    cards = [card for card in cards if not card.qr_code]
+    jobs = [(card.slug, card.qr_target_url()) for card in cards]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = dict(pool.map(_qr_job, jobs, chunksize=16))
+    else:
+        rendered = dict(map(_qr_job, jobs))
+
+    from django.core.files.base import ContentFile
+
+    for card in cards:
+        card.qr_code.save(card.qr_file_name(), ContentFile(rendered[card.slug]), save=False)
+    Card.objects.bulk_update(cards, ['qr_code'], batch_size=INSERT_BATCH)
+    return len(cards)
+
+
+def provision_cards(rows, owner, card_type=Card.TYPE_PERSONAL, dry_run=False, ignore_limit=False, workers=1):
+    """Validate, insert and QR-code one card per row for `owner`."""
+    report = ProvisionReport()
+    premium_owner = is_premium(owner)
+    themes = active_themes()
+
+    pending = []   # (RowResult, card_data, card_type)
+    for number, row in enumerate(rows, start=2):   # row 1 is the header
+        data = form_data(row)
+        row_type = (data.pop('card_type', '') or card_type).lower()
+        if row_type not in FORM_BY_TYPE:
+            report.rows.append(RowResult(number, 'invalid', errors=f'card_type: unknown type "{row_type}".'))
+            continue
+        form = FORM_BY_TYPE[row_type](data=data)
+        name = f"{data.get('firstName', '')} {data.get('lastName', '')}".strip()
+        if not form.is_valid():
+            report.rows.append(RowResult(number, 'invalid', name=name, errors=_form_errors(form)))
+            continue
+        card_data = form.card_data_payload()
+        theme = themes.get(data.get('theme_slug', ''))
+        if theme and (premium_owner or not theme.is_premium):
+            card_data['theme_slug'] = theme.slug
+        result = RowResult(number, 'valid', name=name)
+        report.rows.append(result)
+        pending.append((result, card_data, row_type))
+
+    if not ignore_limit:
+        profile = getattr(owner, 'profile', None)
+        remaining = max(getattr(profile, 'card_limit', 1) - Card.objects.filter(user=owner).count(), 0)
+        for result, _data, _type in pending[remaining:]:
+            result.status = 'over_limit'
+            result.errors = 'Owner has no card allowance left for this row.'
+        pending = pending[:remaining]
+
+    bases = [slug_base_for(card_data, owner) for _result, card_data, _type in pending]
+    slugs = allocate_slugs(bases)
+    for (result, _data, _type), slug in zip(pending, slugs):
+        result.slug = slug
+    if dry_run or not pending:
+        return report
+
+    trial_end = default_trial_end()
+    cards = []
+    for (result, card_data, row_type), slug in zip(pending, slugs):
+        card = Card(user=owner, card_type=row_type, card_data=card_data, slug=slug, trial_ends_at=trial_end)
+        card.apply_background_defaults()
+        cards.append(card)
+
+    for _attempt in range(INSERT_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                Card.objects.bulk_create(cards, batch_size=INSERT_BATCH)
+            break
+        except IntegrityError:
+            # Slugs were reserved from an earlier read; re-read and retry.
+            slugs = allocate_slugs(bases)
+            for card, (result, _data, _type), slug in zip(cards, pending, slugs):
+                card.pk = card.id = None
+                card._state.adding = True
+                card.slug = result.slug = slug
+    else:
+        for result, _data, _type in pending:
+            result.status = 'failed'
+            result.errors = 'Slugs kept colliding with cards created during the import; run it again.'
+        return report
+    for result, _data, _type in pending:
+        result.status = 'created'
+
+    # bulk_create hands back primary keys on PostgreSQL and SQLite; re-read
+    # them otherwise so the QR pass can update the rows.
+    if any(card.pk is None for card in cards):
+        ids = dict(Card.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+        for card in cards:
+            card.pk = card.id = ids[card.slug]
+    report.qr_generated = generate_qr_codes(cards, workers=workers)
+    return report
@@ -0,0 +1,63 @@
+"""Service worker (`/sw.js`) for the app shell and the public card pages.
+
+A card is mostly opened from a printed QR code, on a phone, often on a
+weak connection, and the same people come back to the same few cards.
+`templates/cards/sw.js` is served from the site root so it controls every
+page, and:
+
+  1. precaches the app shell on install: the hashed CSS bundle, icon
+     sprite and preloaded font subsets from the dist manifest (the
+     unbundled stylesheets before `build_css` has run), the shared
+     scripts, and the offline page
+  2. answers same-origin `/static/` requests from that cache — hashed
+     files cache-first, the rest stale-while-revalidate — and keeps
+     pinned CDN assets the same way
+  3. serves card pages the visitor has already opened
+     stale-while-revalidate: the cached copy paints at once while a
+     background request revalidates it with its ETag (`view_card`
+     answers 304 and still counts the view). Right after a form post
+     (lead submitted, language switched, logged out) navigation goes to
+     the network first so flashed messages and viewer changes show up
+  4. takes tracking beacons from `view_card` by `postMessage` and stores
+     those that can't be sent in IndexedDB, replaying them on the next
+     successful request, on the page's `online` event and on Background Sync
+
+The cache name carries `shell_version()`, which changes with the deploy
+and the precache list, so a new deploy installs a new worker and drops
+the old caches. Set SERVICE_WORKER = False to stop registering it (pages
+then unregister any worker a browser still has).
+"""
+
+import hashlib
+
+from django.templatetags.static import static
+from django.urls import reverse
+
+from .css_build import bundle_path, manifest_entry
+from .font_build import FONTS_NAME
+from .icon_sprite import SPRITE_NAME
+from .versioning import deploy_version
+
+SHELL_SCRIPTS = ('cards/js/theme.js', 'cards/js/tilt.js', 'cards/js/sidebar.js')
+SHELL_STATIC = ('cards/img/new-logo-preview.png', 'cards/manifest.webmanifest')
+UNBUNDLED_CSS = ('cards/css/tokens.css', 'cards/css/components.css', 'cards/css/motion.css', 'cards/css/fonts.css')
+
+# Cross-origin hosts whose (versioned) assets base.html loads; cached like /static/.
+CDN_HOSTS = ('cdn.jsdelivr.net', 'unpkg.com', 'fonts.googleapis.com', 'fonts.gstatic.com')
+
+
+def precache_urls() -> list:
+    """URLs the worker caches on install, in the form pages request them (minus `?v=`)."""
+    bundle = bundle_path()
+    sprite = manifest_entry(SPRITE_NAME)
+    paths = [bundle] if bundle else list(UNBUNDLED_CSS)
+    if sprite:
+        paths += [sprite, 'cards/js/icons.js']
+    paths += [face['path'] for face in manifest_entry(FONTS_NAME) or () if face['preload_for']]
+    paths += [*SHELL_SCRIPTS, *SHELL_STATIC]
+    return [static(path) for path in paths] + [reverse('offline')]
+
+
+def shell_version(urls) -> str:
+    """Short id of the deployed code plus the precache list; names the worker's caches."""
+    return hashlib.sha1('\n'.join([deploy_version(), *urls]).encode('utf-8')).hexdigest()[:12]
@@ -0,0 +1,46 @@
+/*  MY-Card — Icons
+ *  Stand-in for the Lucide browser bundle: `lucide.createIcons()` turns
+ *  every <i data-lucide="name"> into <svg><use href="sprite#name"></svg>
+ *  against the hashed sprite built by `manage.py build_icons`.
+ *  The sprite URL comes from this script tag's data-sprite attribute.
+ */
+(function () {
+  'use strict';
+
+  var NS = 'http://www.w3.org/2000/svg';
+  var XLINK = 'http://www.w3.org/1999/xlink';
+  var script = document.currentScript;
+  var sprite = script ? script.getAttribute('data-sprite') : '';
+  var DEFAULTS = {
+    width: '24', height: '24', viewBox: '0 0 24 24', fill: 'none',
+    stroke: 'currentColor', 'stroke-width': '2',
+    'stroke-linecap': 'round', 'stroke-linejoin': 'round', 'aria-hidden': 'true'
+  };
+
+  function replace(el) {
+    var name = el.getAttribute('data-lucide');
+    var svg = document.createElementNS(NS, 'svg');
+    var key, i, attr;
+    for (key in DEFAULTS) svg.setAttribute(key, DEFAULTS[key]);
+    for (i = 0; i < el.attributes.length; i++) {
+      attr = el.attributes[i];
+      if (attr.name !== 'class') svg.setAttribute(attr.name, attr.value);
+    }
+    svg.setAttribute('class', ('lucide lucide-' + name + ' ' + (el.getAttribute('class') || '')).trim());
+
+    var use = document.createElementNS(NS, 'use');
+    use.setAttribute('href', sprite + '#' + name);
+    use.setAttributeNS(XLINK, 'xlink:href', sprite + '#' + name);   // Safari < 12.1
+    svg.appendChild(use);
+    el.parentNode.replaceChild(svg, el);
+  }
+
+  window.lucide = {
+    createIcons: function () {
+      var nodes = document.querySelectorAll('[data-lucide]:not(svg)');
+      for (var i = 0; i < nodes.length; i++) {
+        if (nodes[i].getAttribute('data-lucide')) replace(nodes[i]);
+      }
+    }
+  };
+})();
@@ -0,0 +1,148 @@
+"""Content-addressed storage for card uploads.
+
+`Card.avatar` / `Card.logo` files are named after the SHA-256 of their
+bytes (`avatars/ab/abcdef….jpg`), so re-uploading the same logo for a
+second card, or an onboarding retry, reuses the file already on disk
+instead of writing `logo_x7Kq2.png` next to it.
+
+Because several cards can point at one file, nothing may delete a file
+just because one card let go of it. `release_media()` is the single
+place that removes files: it checks whether any card still references
+each name (the reference count is the number of Card rows pointing at
+it) and only deletes the ones that dropped to zero, together with their
+image derivatives.
+"""
+
+import hashlib
+import os
+import posixpath
+import secrets
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db.models import Q
+
+
+def content_digest(content) -> str:
+    hasher = hashlib.sha256()
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    content.seek(0)
+    return hasher.hexdigest()
+
+
+def content_addressed_name(name: str, digest: str) -> str:
+    directory, filename = posixpath.split(name)
+    ext = os.path.splitext(filename)[1].lower()
+    return posixpath.join(directory, digest[:2], f'{digest}{ext}')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by content hash and never writes a duplicate."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        name = content_addressed_name(name, content_digest(content))
+        # Written even when the name exists: `release_media()` may be
+        # deleting it right now (it saw no card referencing it), and the
+        # caller is about to save a row that does.
+        return super().save(name, content, max_length=max_length)
+
+    def _save(self, name, content):
+        # Same name means same bytes, so an existing file is replaced
+        # atomically instead of going through get_available_name().
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+        else:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f'.{secrets.token_hex(8)}.tmp')
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in content.chunks():
+                    fh.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return str(name).replace('\\', '/')
+
+    def get_available_name(self, name, max_length=None):
+        # Same name means same bytes; never suffix.
+        return name
+
+
+def card_media_storage():
+    return ContentAddressedStorage()
+
+
+# ==========================================================================
+# Reference-counted deletes
+# ==========================================================================
+
+def card_media_refs(cards) -> dict:
+    """`{name: derivative_base}` for every avatar/logo referenced by `cards`."""
+    refs = {}
+    for card in cards:
+        variants = card.image_variants or {}
+        for field in ('avatar', 'logo'):
+            file = getattr(card, field)
+            if file:
+                refs[file.name] = (variants.get(field) or {}).get('base', '')
+    return refs
+
+
+def reference_count(name: str) -> int:
+    from .models import Card
+
+    return Card.objects.filter(Q(avatar=name) | Q(logo=name)).count()
+
+
+def _derivative_in_use(base: str) -> bool:
+    from .models import Card
+
+    return Card.objects.filter(
+        Q(image_variants__avatar__base=base) | Q(image_variants__logo__base=base)
+    ).exists()
+
+
+def _delete_tree(storage, directory: str) -> int:
+    freed = 0
+    try:
+        dirs, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    for filename in files:
+        path = posixpath.join(directory, filename)
+        freed += storage.size(path)
+        storage.delete(path)
+    for sub in dirs:
+        freed += _delete_tree(storage, posixpath.join(directory, sub))
+    try:
+        os.rmdir(storage.path(directory))
+    except (NotImplementedError, OSError):
+        pass
+    return freed
+
+
+def release_media(refs: dict, storage=None) -> int:
+    """Delete files from `refs` that no card references any more. Returns bytes freed.
+
+    Call after the referencing rows are gone (deleted or re-pointed).
+    """
+    storage = storage or card_media_storage()
+    freed = 0
+    for name, base in refs.items():
+        if not name or reference_count(name):
+            continue
+        if storage.exists(name):
+            freed += storage.size(name)
+            storage.delete(name)
+        if base and not _derivative_in_use(base):
+            freed += _delete_tree(default_storage, base)
+    return freed
@@ -0,0 +1,259 @@
+{% autoescape off %}/*  MY-Card — Service worker (see cards/service_worker.py)
+ *  Shell + static: precached, hashed files cache-first, the rest stale-while-revalidate.
+ *  Card pages: stale-while-revalidate against the page's ETag; dropped on any form post.
+ *  Tracking beacons: queued in IndexedDB while offline, replayed on reconnect.
+ */
+'use strict';
+
+var CONFIG = {{ config }};
+var SHELL_CACHE = 'mc-shell-' + CONFIG.version;
+var PAGES_CACHE = 'mc-pages-v1';
+var CARD_PATH = /^\/card\/[\w-]+\/$/;
+var HASHED = /\.[0-9a-f]{12}\.[^/]+$/;
+var MAX_PAGES = 50;
+var NETWORK_FIRST_MS = 10000;     // after a form post, while the purge below may still be running
+var BEACON_MAX = 200;
+var BEACON_MAX_AGE_MS = 7 * 24 * 3600 * 1000;
+var SYNC_TAG = 'mc-track';
+
+var lastPostAt = 0;               // in memory only; the purge is what survives a worker restart
+var flushing = null;
+
+function noop() {}
+
+/* ---------- Lifecycle ---------- */
+
+self.addEventListener('install', function (event) {
+  event.waitUntil(
+    caches.open(SHELL_CACHE).then(function (cache) {
+      // One missing file shouldn't keep the whole shell from installing.
+      return Promise.all(CONFIG.precache.map(function (url) {
+        return cache.add(new Request(url, { credentials: 'same-origin' })).catch(noop);
+      }));
+    }).then(function () { return self.skipWaiting(); })
+  );
+});
+
+self.addEventListener('activate', function (event) {
+  event.waitUntil(
+    caches.keys().then(function (names) {
+      return Promise.all(names.filter(function (name) {
+        return name.indexOf('mc-shell-') === 0 && name !== SHELL_CACHE;
+      }).map(function (name) { return caches.delete(name); }));
+    }).then(function () {
+      return self.clients.claim();
+    }).then(function () {
+      return flushBeacons();
+    })
+  );
+});
+
+/* ---------- Fetch routing ---------- */
+
+self.addEventListener('fetch', function (event) {
+  var request = event.request;
+  var url = new URL(request.url);
+
+  if (request.method !== 'GET') {
+    if (request.mode === 'navigate') {
+      // Login, logout and every other form post can change what a card page
+      // shows this browser (owner bar, CSRF token, flashed messages), so the
+      // saved copies go; the redirect that follows is fetched from the network.
+      lastPostAt = Date.now();
+      event.waitUntil(caches.delete(PAGES_CACHE));
+    }
+    return;
+  }
+  if (url.origin === self.location.origin) {
+    if (url.pathname.indexOf(CONFIG.static_url) === 0) {
+      event.respondWith(staticAsset(event, url.origin + url.pathname));
+    } else if (request.mode === 'navigate' && CARD_PATH.test(url.pathname)) {
+      event.respondWith(cardPage(event));
+    } else if (request.mode === 'navigate') {
+      event.respondWith(fetch(request).catch(offlinePage));
+    }
+  } else if (CONFIG.cdn_hosts.indexOf(url.hostname) !== -1) {
+    event.respondWith(staticAsset(event, request.url));
+  }
+});
+
+function staticAsset(event, key) {
+  return caches.open(SHELL_CACHE).then(function (cache) {
+    return cache.match(key).then(function (cached) {
+      if (cached && HASHED.test(key)) return cached;
+      var network = fetch(event.request).then(function (response) {
+        if (response.ok) return cache.put(key, response.clone()).then(function () { return response; });
+        return response;
+      });
+      if (!cached) return network;
+      event.waitUntil(network.catch(noop));
+      return cached;
+    });
+  });
+}
+
+function cardPage(event) {
+  var request = event.request;
+  return caches.open(PAGES_CACHE).then(function (cache) {
+    return cache.match(request, { ignoreVary: true }).then(function (cached) {
+      if (cached && Date.now() - lastPostAt > NETWORK_FIRST_MS) {
+        event.waitUntil(revalidatePage(cache, request, cached).catch(noop));
+        return cached;
+      }
+      return fetch(request).then(function (response) {
+        event.waitUntil(storePage(cache, request, response.clone()).then(flushBeacons));
+        return response;
+      }).catch(function () {
+        return cached || offlinePage();
+      });
+    });
+  });
+}
+
+/* Conditional request with the cached copy's ETag; `no-store` keeps the
+   HTTP cache from answering the 304 itself. */
+function revalidatePage(cache, request, cached) {
+  var etag = cached.headers.get('ETag');
+  return fetch(request.url, {
+    credentials: 'same-origin',
+    cache: 'no-store',
+    headers: etag ? { 'If-None-Match': etag } : {}
+  }).then(function (response) {
+    if (response.status === 304) return flushBeacons();
+    if (response.redirected) return cache.delete(request);
+    return storePage(cache, request, response).then(flushBeacons);
+  });
+}
+
+/* Only card pages that carry validators are kept: inactive cards,
+   redirects and errors are dropped from the cache instead. */
+function storePage(cache, request, response) {
+  if (response.type !== 'basic' || !response.ok || !response.headers.get('ETag')) {
+    return cache.delete(request);
+  }
+  return cache.put(request, response).then(function () {
+    return cache.keys();
+  }).then(function (keys) {
+    return Promise.all(keys.slice(0, Math.max(0, keys.length - MAX_PAGES)).map(function (key) {
+      return cache.delete(key);
+    }));
+  });
+}
+
+function offlinePage() {
+  return caches.match(CONFIG.offline_url).then(function (cached) {
+    return cached || Response.error();
+  });
+}
+
+/* ---------- Tracking beacons ---------- */
+
+self.addEventListener('message', function (event) {
+  var data = event.data || {};
+  if (data.type === 'track') event.waitUntil(sendBeacon(data.body));
+  else if (data.type === 'flush') event.waitUntil(flushBeacons());
+});
+
+self.addEventListener('sync', function (event) {
+  if (event.tag === SYNC_TAG) event.waitUntil(flushBeacons());
+});
+
+function postBeacon(body) {
+  return fetch(CONFIG.track_url, {
+    method: 'POST',
+    credentials: 'same-origin',
+    headers: { 'Content-Type': 'application/json' },
+    body: body
+  });
+}
+
+function sendBeacon(body) {
+  return postBeacon(body).then(flushBeacons, function () {
+    return queueBeacon(body).then(function () {
+      if (self.registration.sync) return self.registration.sync.register(SYNC_TAG).catch(noop);
+    });
+  });
+}
+
+function openQueue() {
+  return new Promise(function (resolve, reject) {
+    var open = indexedDB.open('mc-sw', 1);
+    open.onupgradeneeded = function () { open.result.createObjectStore('beacons', { autoIncrement: true }); };
+    open.onsuccess = function () { resolve(open.result); };
+    open.onerror = function () { reject(open.error); };
+  });
+}
+
+function withStore(mode, work) {
+  return openQueue().then(function (db) {
+    return new Promise(function (resolve, reject) {
+      var tx = db.transaction('beacons', mode);
+      var result;
+      tx.oncomplete = function () { db.close(); resolve(result); };
+      tx.onerror = tx.onabort = function () { db.close(); reject(tx.error); };
+      work(tx.objectStore('beacons'), function (value) { result = value; });
+    });
+  });
+}
+
+function queueBeacon(body) {
+  return withStore('readwrite', function (store) {
+    store.add({ body: body, at: Date.now() });
+    var count = store.count();
+    count.onsuccess = function () {
+      // Keep the newest BEACON_MAX; a long offline stretch shouldn't fill the disk.
+      var extra = count.result - BEACON_MAX;
+      if (extra <= 0) return;
+      store.openCursor().onsuccess = function (e) {
+        var cursor = e.target.result;
+        if (cursor && extra-- > 0) { cursor.delete(); cursor.continue(); }
+      };
+    };
+  });
+}
+
+function queuedBeacons() {
+  return withStore('readonly', function (store, done) {
+    var items = [];
+    store.openCursor().onsuccess = function (e) {
+      var cursor = e.target.result;
+      if (!cursor) return done(items);
+      items.push({ key: cursor.key, body: cursor.value.body, at: cursor.value.at });
+      cursor.continue();
+    };
+  });
+}
+
+function dropBeacon(key) {
+  return withStore('readwrite', function (store) { store.delete(key); });
+}
+
+/* `at` is when the tap happened and `sent` when it is replayed, both on this
+   device's clock; the server backdates the interaction by the difference. */
+function replayBody(item) {
+  try {
+    var data = JSON.parse(item.body);
+    if (!data.at) data.at = item.at;
+    data.sent = Date.now();
+    return JSON.stringify(data);
+  } catch (e) {
+    return item.body;
+  }
+}
+
+/* Replay in order; stop at the first network failure and keep the rest.
+   Any HTTP answer (even a 4xx for a card that has since gone) settles a beacon. */
+function flushBeacons() {
+  if (!flushing) {
+    flushing = queuedBeacons().then(function (items) {
+      return items.reduce(function (chain, item) {
+        return chain.then(function () {
+          if (Date.now() - item.at > BEACON_MAX_AGE_MS) return dropBeacon(item.key);
+          return postBeacon(replayBody(item)).then(function () { return dropBeacon(item.key); });
+        });
+      }, Promise.resolve());
+    }).catch(noop).then(function () { flushing = null; });
+  }
+  return flushing;
+}
+{% endautoescape %}
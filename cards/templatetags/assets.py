@@ -0,0 +1,74 @@
+from pathlib import Path
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from cards.css_build import bundle_path, manifest_entry
+from cards.critical_css import CRITICAL_NAME, critical_css_for
+from cards.font_build import FONTS_NAME
+from cards.icon_sprite import BRAND_PREFIX, SPRITE_NAME, brand_name, brand_svg
+
+register = template.Library()
+
+
+@register.simple_tag
+def css_bundle():
+    """Static path of the built stylesheet bundle, or '' before `build_css` has run."""
+    return bundle_path()
+
+
+@register.simple_tag(takes_context=True)
+def critical_css(context):
+    """Above-the-fold CSS built for the page being rendered, or '' (see critical_css.py)."""
+    if not getattr(settings, 'CRITICAL_CSS', True):
+        return ''
+    name = getattr(getattr(context, 'template', None), 'name', None) or ''
+    return mark_safe(critical_css_for(Path(name).stem, manifest_entry(CRITICAL_NAME)))
+
+
+@register.simple_tag
+def font_faces(language_code='en'):
+    """Preload hints + inline `@font-face` rules for the built WOFF2 subsets ('' before `build_fonts`)."""
+    faces = manifest_entry(FONTS_NAME)
+    if not faces:
+        return ''
+    preloads = format_html_join(
+        '\n', '<link rel="preload" href="{}" as="font" type="font/woff2" crossorigin>',
+        ((static(face['path']),) for face in faces if language_code in face['preload_for']),
+    )
+    rules = format_html_join(
+        '',
+        "@font-face{{font-family:'{}';src:url({}) format('woff2');font-weight:{};font-style:normal;"
+        "font-display:swap;unicode-range:{}}}",
+        ((face['family'], static(face['path']), face['weight'], face['unicode_range']) for face in faces),
+    )
+    return format_html('{}\n<style>{}</style>', preloads, rules)
+
+
+@register.simple_tag
+def icon_sprite():
+    """Static path of the built icon sprite, or '' before `build_icons` has run."""
+    return manifest_entry(SPRITE_NAME)
+
+
+@register.simple_tag
+def brand_icon(net, css_class=''):
+    """A brand glyph as `<svg><use></svg>` pointing into the sprite (inline paths until one is built)."""
+    sprite = manifest_entry(SPRITE_NAME)
+    if not sprite:
+        return mark_safe(brand_svg(net, css_class))
+    return format_html(
+        '<svg{} viewBox="0 0 24 24" fill="currentColor" aria-hidden="true"><use href="{}#{}"></use></svg>',
+        format_html(' class="{}"', css_class) if css_class else '',
+        static(sprite), BRAND_PREFIX + brand_name(net),
+    )
+
+
+@register.simple_tag
+def service_worker_url():
+    """URL of `/sw.js` to register, or '' when SERVICE_WORKER is off (see service_worker.py)."""
+    return reverse('service_worker') if getattr(settings, 'SERVICE_WORKER', True) else ''
@@ -0,0 +1,66 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+
+from cards.images import best_width, variant_url
+
+register = template.Library()
+
+
+def _manifest(card, field):
+    manifest = (getattr(card, 'image_variants', None) or {}).get(field)
+    file = getattr(card, field, None)
+    if not manifest or not file or manifest.get('source') != file.name:
+        return None
+    return manifest
+
+
+def _srcset(manifest, ext):
+    return ', '.join(f"{variant_url(manifest, w, ext)} {w}w" for w in manifest['widths'])
+
+
+@register.simple_tag
+def card_picture(card, field, sizes='128px', alt='', loading='lazy'):
+    """`<picture>` with WebP + JPEG/PNG srcsets for `card.<field>`.
+
+    Falls back to a plain `<img>` of the original upload when no
+    derivatives exist yet.
+    """
+    file = getattr(card, field, None)
+    if not file:
+        return ''
+    manifest = _manifest(card, field)
+    if manifest is None:
+        return format_html('<img src="{}" alt="{}" loading="{}" decoding="async">', file.url, alt, loading)
+
+    fallback = manifest['fallback']
+    smallest = manifest['widths'][0]
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="{}" decoding="async">'
+        '</picture>',
+        _srcset(manifest, 'webp'), sizes,
+        variant_url(manifest, smallest, fallback), _srcset(manifest, fallback), sizes,
+        manifest['width'], manifest['height'], alt, loading,
+    )
+
+
+@register.simple_tag
+def card_image_url(card, field, width=512):
+    """Single JPEG/PNG derivative URL (for CSS backgrounds, og:image, print)."""
+    file = getattr(card, field, None)
+    if not file:
+        return ''
+    manifest = _manifest(card, field)
+    if manifest is None:
+        return file.url
+    return variant_url(manifest, best_width(manifest, int(width)), manifest['fallback'])
+
+
+@register.simple_tag
+def resized_url(file, width, height):
+    """URL of `file` fitted inside width x height via the resize endpoint."""
+    if not file:
+        return ''
+    return reverse('resized_media', args=[int(width), int(height), file.name])
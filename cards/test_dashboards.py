@@ -2,8 +2,20 @@ from django import forms
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .changelog import expand_logs, record_card_change
 from .forms import CardForm
-from .models import Card, Profile
+from .metrics import compute_platform_metrics, platform_metrics
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from .models import Card, CardChangeLog, ChangeLogValue, LeadCapture, Payment, Profile
 from urllib.parse import urlparse
 
 class DashboardTests(TestCase):
@@ -81,3 +93,277 @@ class DashboardTests(TestCase):
         self.card.refresh_from_db()
         self.assertEqual(self.card.card_data.get('firstName'), 'Admin')
         self.assertEqual(self.card.card_data.get('lastName'), 'Updated')
+
+
+class AdminDashboardScalingTests(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.superuser = User.objects.create_superuser(username='root', password='password')
+        self.client.login(username='root', password='password')
+
+    def _add_users(self, count, cards_each=1):
+        for i in range(count):
+            user = User.objects.create_user(username=f'member{User.objects.count()}', password='password')
+            Profile.objects.create(user=user, phone_number=f'88017{user.pk:08d}')
+            for _ in range(cards_each):
+                Card.objects.create(user=user, card_data={'firstName': f'Member{i}'})
+
+    def _dashboard_query_count(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_users(self):
+        self._add_users(2)
+        baseline = self._dashboard_query_count()
+        self._add_users(6, cards_each=2)
+        self.assertEqual(self._dashboard_query_count(), baseline)
+
+    def test_extra_cards_are_lazy_loaded(self):
+        self._add_users(1, cards_each=5)
+        member = User.objects.exclude(pk=self.superuser.pk).get()
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertContains(response, reverse('admin_user_cards', args=[member.pk]))
+
+        fragment = self.client.get(reverse('admin_user_cards', args=[member.pk]))
+        self.assertEqual(fragment.status_code, 200)
+        for card in member.card_set.all():
+            self.assertContains(fragment, card.slug)
+
+
+class PlatformMetricsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='metrics', password='password')
+        Card.objects.create(user=self.user, card_data={'firstName': 'One'})
+        business = Card.objects.create(user=self.user, card_type=Card.TYPE_BUSINESS, card_data={'firstName': 'Two'})
+        Card.objects.filter(pk=business.pk).update(lifecycle_status=Card.STATUS_EXPIRED)
+        LeadCapture.objects.create(card=business, name='Lead')
+
+    def test_each_family_is_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            metrics = compute_platform_metrics()
+        # cards, users, interactions, leads, pending requests, feedback
+        self.assertEqual(len(ctx.captured_queries), 6)
+        self.assertEqual(metrics['cards']['total'], 2)
+        self.assertEqual(metrics['cards']['personal'], 1)
+        self.assertEqual(metrics['cards']['business'], 1)
+        self.assertEqual(metrics['cards'][Card.STATUS_EXPIRED], 1)
+        self.assertEqual(metrics['leads']['new'], 1)
+
+    def test_snapshot_is_cached_until_invalidated(self):
+        platform_metrics()
+        with CaptureQueriesContext(connection) as ctx:
+            platform_metrics()
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_admin_lifecycle_counts_use_metrics(self):
+        User.objects.create_superuser(username='root', password='password')
+        self.client.login(username='root', password='password')
+        response = self.client.get(reverse('admin_lifecycle'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['counts']['total'], 2)
+        self.assertEqual(response.context['counts'][Card.STATUS_EXPIRED], 1)
+
+
+class AdminPaymentsSearchTests(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_superuser(username='root', password='password')
+        self.client.login(username='root', password='password')
+        self.payer = User.objects.create_user(username='walletowner', email='payer@shop.com.bd', password='password')
+        self.other = User.objects.create_user(username='someoneelse', email='other@example.com', password='password')
+        self.match = Payment.objects.create(
+            user=self.payer, gateway=Payment.GATEWAY_BKASH, amount=Decimal('120'),
+            status=Payment.STATUS_SUCCESS, bkash_payer_msisdn='01770618575', bkash_trx_id='TRX9ABC',
+        )
+        Payment.objects.create(user=self.payer, amount=Decimal('500'), status=Payment.STATUS_SUCCESS)
+        Payment.objects.create(user=self.other, amount=Decimal('999'), status=Payment.STATUS_SUCCESS)
+
+    def _search(self, q):
+        response = self.client.get(reverse('admin_payments'), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_prefix_search_across_tokens(self):
+        for q in ('walletow', 'PAYER@', 'shop.com', 'trx9', '+880 1770', '01770618575'):
+            ids = {row['obj'].pk for row in self._search(q).context['payments']}
+            self.assertIn(self.match.pk, ids, msg=q)
+            self.assertNotIn(self.other.payments.get().pk, ids, msg=q)
+
+    def test_tokens_follow_payment_updates(self):
+        self.match.bkash_trx_id = 'NEWTRX'
+        self.match.save()
+        self.assertFalse(self._search('trx9').context['payments'])
+        self.assertTrue(self._search('newtrx').context['payments'])
+
+    def test_tokens_follow_user_updates(self):
+        self.payer.username = 'renamedpayer'
+        self.payer.email = 'payer@newshop.com'
+        self.payer.save()
+        self.assertFalse(self._search('walletowner').context['payments'])
+        self.assertFalse(self._search('shop.com.bd').context['payments'])
+        ids = {row['obj'].pk for row in self._search('renamedp').context['payments']}
+        self.assertIn(self.match.pk, ids)
+        self.assertTrue(self._search('newshop.com').context['payments'])
+
+    def test_total_covers_whole_filtered_set(self):
+        response = self.client.get(reverse('admin_payments'), {'q': 'walletowner'})
+        self.assertEqual(response.context['total_success'], Decimal('620'))
+
+    def test_keyset_pages_do_not_overlap(self):
+        with patch('cards.views.ADMIN_PAYMENTS_PAGE_SIZE', 2):
+            first = self.client.get(reverse('admin_payments'))
+            second = self.client.get(reverse('admin_payments'), {'cursor': first.context['next_cursor']})
+        first_ids = {row['obj'].pk for row in first.context['payments']}
+        second_ids = {row['obj'].pk for row in second.context['payments']}
+        self.assertEqual(len(first_ids), 2)
+        self.assertEqual(len(second_ids), 1)
+        self.assertFalse(first_ids & second_ids)
+        self.assertEqual(second.context['next_cursor'], '')
+
+
+class LeadsInboxTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='owner', password='password')
+        Profile.objects.create(user=self.user, phone_number='01700000000')
+        self.card = Card.objects.create(user=self.user, card_data={'firstName': 'Owner'})
+        for i in range(3):
+            LeadCapture.objects.create(card=self.card, name=f'Lead {i}', email=f'l{i}@example.com')
+        LeadCapture.objects.create(card=self.card, name='Done', status=LeadCapture.STATUS_REPLIED)
+        other = User.objects.create_user(username='other', password='password')
+        LeadCapture.objects.create(
+            card=Card.objects.create(user=other, card_data={'firstName': 'Other'}), name='Not mine',
+        )
+        self.client.login(username='owner', password='password')
+
+    def test_owner_is_copied_from_card(self):
+        self.assertEqual(LeadCapture.objects.filter(owner=self.user).count(), 4)
+
+    def test_tabs_show_status_counts(self):
+        response = self.client.get(reverse('leads_inbox'))
+        tabs = {code: count for code, _label, count in response.context['status_tabs']}
+        self.assertEqual(tabs, {'new': 3, 'replied': 1, 'archived': 0})
+        self.assertEqual(response.context['total_leads'], 4)
+
+    def test_status_change_refreshes_counts(self):
+        lead = LeadCapture.objects.filter(owner=self.user, status='new').first()
+        self.client.get(reverse('leads_inbox'))
+        self.client.post(reverse('lead_update_status', args=[lead.id]), {'status': 'archived'})
+        tabs = {code: count for code, _label, count in self.client.get(reverse('leads_inbox')).context['status_tabs']}
+        self.assertEqual(tabs['new'], 2)
+        self.assertEqual(tabs['archived'], 1)
+
+    def test_keyset_pages_do_not_overlap(self):
+        with patch('cards.views.LEADS_PAGE_SIZE', 3):
+            first = self.client.get(reverse('leads_inbox'))
+            second = self.client.get(reverse('leads_inbox'), {'cursor': first.context['next_cursor']})
+        first_names = {lead.name for lead in first.context['leads']}
+        second_names = {lead.name for lead in second.context['leads']}
+        self.assertEqual(len(first_names), 3)
+        self.assertEqual(len(second_names), 1)
+        self.assertFalse(first_names & second_names)
+        self.assertNotIn('Not mine', first_names | second_names)
+
+
+class CardChangeLogHistoryTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='editor', password='password')
+        Profile.objects.create(user=self.user, phone_number='01700000001')
+        self.card = Card.objects.create(user=self.user, card_data={'firstName': 'Editor'})
+        for i in range(5):
+            CardChangeLog.objects.create(
+                card=self.card, user=self.user, summary=f'Edit {i}',
+                changes=[{'field': 'title', 'label': 'Title', 'before': str(i), 'after': str(i + 1)}],
+            )
+        self.client.login(username='editor', password='password')
+
+    def test_dashboard_loads_only_recent_logs_without_changes(self):
+        with patch('cards.views.DASHBOARD_RECENT_LOGS', 2):
+            response = self.client.get(reverse('dashboard'))
+        card = response.context['cards'][0]
+        self.assertEqual([log.summary for log in card.recent_logs], ['Edit 4', 'Edit 3'])
+        self.assertEqual(card.change_log_count, 5)
+        self.assertIn('changes', card.recent_logs[0].get_deferred_fields())
+        self.assertContains(response, reverse('card_history', args=[self.card.slug]))
+
+    def test_history_pages_through_full_log(self):
+        with patch('cards.views.CARD_HISTORY_PAGE_SIZE', 3):
+            first = self.client.get(reverse('card_history', args=[self.card.slug]))
+            second = self.client.get(
+                reverse('card_history', args=[self.card.slug]), {'cursor': first.context['next_cursor']},
+            )
+        summaries = [log.summary for log in first.context['logs']] + [log.summary for log in second.context['logs']]
+        self.assertEqual(summaries, ['Edit 4', 'Edit 3', 'Edit 2', 'Edit 1', 'Edit 0'])
+        self.assertContains(first, 'Title')
+
+    def test_history_is_owner_only(self):
+        User.objects.create_user(username='stranger', password='password')
+        self.client.login(username='stranger', password='password')
+        response = self.client.get(reverse('card_history', args=[self.card.slug]))
+        self.assertEqual(response.status_code, 404)
+
+
+class CompactChangeLogTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='compact', password='password')
+        self.card = Card.objects.create(user=self.user, card_data={'firstName': 'Compact'})
+
+    def _edit(self, before, after, days_ago):
+        record_card_change(self.card, self.user, [
+            {'field': 'jobTitle', 'label': 'Job title', 'before': before, 'after': after},
+        ])
+        log = CardChangeLog.objects.latest('id')
+        CardChangeLog.objects.filter(pk=log.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return log
+
+    def test_entries_are_interned_and_expand_with_labels(self):
+        self._edit('Engineer', 'Lead', 0)
+        self._edit('Lead', 'Engineer', 0)
+        logs = list(CardChangeLog.objects.order_by('id'))
+        self.assertTrue(all(isinstance(item, list) for log in logs for item in log.changes))
+        # 'jobTitle', 'Engineer', 'Lead' — each stored once
+        self.assertEqual(ChangeLogValue.objects.count(), 3)
+        expand_logs(logs)
+        self.assertEqual(logs[0].entries, [
+            {'field': 'jobTitle', 'label': 'Job title', 'before': 'Engineer', 'after': 'Lead'},
+        ])
+
+    def test_compaction_folds_old_entries_into_snapshot(self):
+        base = 400
+        self._edit('A', 'B', base)
+        self._edit('B', 'C', base)
+        self._edit('C', 'D', base)
+        recent = self._edit('D', 'E', 0)
+        ChangeLogValue.objects.update(last_referenced_at=timezone.now() - timedelta(days=base))
+
+        call_command('compact_card_history', '--older-than', '30', stdout=StringIO())
+
+        snapshot = CardChangeLog.objects.exclude(pk=recent.pk).get()
+        self.assertEqual(snapshot.edit_count, 3)
+        self.assertEqual(snapshot.summary, 'Updated Job title')
+        expand_logs([snapshot])
+        self.assertEqual(snapshot.entries[0]['before'], 'A')
+        self.assertEqual(snapshot.entries[0]['after'], 'D')
+        # 'B' and 'C' are no longer referenced by any log
+        self.assertFalse(ChangeLogValue.objects.filter(value__in=['B', 'C']).exists())
+
+    def test_pruning_spares_values_an_edit_just_reused(self):
+        from .changelog import intern_values, prune_unreferenced_values
+
+        intern_values(['orphan', 'reused'])
+        ChangeLogValue.objects.update(last_referenced_at=timezone.now() - timedelta(days=30))
+        # An edit re-interns 'reused' while the prune's log scan is underway.
+        intern_values(['reused'])
+
+        self.assertEqual(prune_unreferenced_values(), 1)
+        self.assertEqual(list(ChangeLogValue.objects.values_list('value', flat=True)), ['reused'])
@@ -5,8 +5,19 @@ from django.utils.text import slugify
 from django.utils import timezone
 from unittest.mock import patch
 from django.core import mail
+from datetime import timedelta
+from io import BytesIO, StringIO
+import json
+import os
+import shutil
+import tempfile
+import zipfile
 
-from .models import Card, Profile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.test import override_settings
+
+from .models import Card, CardInteraction, LeadCapture, Profile
 
 class CardModelTests(TestCase):
 
@@ -89,6 +100,208 @@ class CardViewTests(TestCase):
         self.assertNotContains(response, 'Visit our website')
 
 
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        user = User.objects.create_user(username='etag', password='password')
+        self.card = Card.objects.create(user=user, card_data={'firstName': 'Etag', 'email': 'e@example.com'})
+
+    def test_view_card_revalidates_without_loading_the_card(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        first = self.client.get(self.card.get_absolute_url())
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first['ETag'].startswith('W/'))
+        self.assertIn('no-cache', first['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get(self.card.get_absolute_url(), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+        self.assertFalse(any('"cards_card"' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(self.card.interactions.filter(kind=CardInteraction.KIND_VIEW).count(), 1)
+
+    def test_edit_changes_the_etag(self):
+        first = self.client.get(self.card.get_absolute_url())
+        self.card.card_data['firstName'] = 'Renamed'
+        self.card.save(update_fields=['card_data'])
+
+        again = self.client.get(self.card.get_absolute_url(), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 200)
+        self.assertContains(again, 'Renamed')
+        self.assertNotEqual(again['ETag'], first['ETag'])
+
+    def test_vcard_and_physical_card_answer_conditional_requests(self):
+        vcard_url = reverse('download_vcard', args=[self.card.slug])
+        first = self.client.get(vcard_url)
+        self.assertFalse(first['ETag'].startswith('W/'))
+        again = self.client.get(vcard_url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.card.interactions.filter(kind=CardInteraction.KIND_SAVE).count(), 1)
+
+        print_url = reverse('physical_card', args=[self.card.slug])
+        page = self.client.get(print_url)
+        self.assertEqual(page.status_code, 200)
+        cached = self.client.get(print_url, HTTP_IF_MODIFIED_SINCE=page['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_inactive_cards_are_never_short_circuited(self):
+        first = self.client.get(self.card.get_absolute_url())
+        self.card.is_active = False
+        self.card.save(update_fields=['is_active'])
+        again = self.client.get(self.card.get_absolute_url(), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 200)
+        self.assertNotIn('ETag', again)
+
+    def test_documentation_renders_readme_once_and_revalidates(self):
+        import markdown
+
+        from .views import _readme_html
+
+        _readme_html.cache_clear()
+        with patch('markdown.markdown', wraps=markdown.markdown) as render_markdown:
+            first = self.client.get(reverse('documentation'))
+            self.client.get(reverse('documentation'))
+            again = self.client.get(reverse('documentation'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('no-cache', first['Cache-Control'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(render_markdown.call_count, 1)
+
+        self.client.force_login(self.card.user)
+        self.assertEqual(self.client.get(reverse('documentation'), HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+class VisitorDedupTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.owner = User.objects.create_user(username='scanned', password='password')
+        self.card = Card.objects.create(user=self.owner, card_data={'firstName': 'Scanned'})
+
+    def _views(self):
+        return self.card.interactions.filter(kind=CardInteraction.KIND_VIEW)
+
+    def test_anonymous_views_are_deduplicated_without_a_session(self):
+        from django.contrib.sessions.models import Session
+
+        from .visitors import VISITOR_COOKIE
+
+        first = self.client.get(self.card.get_absolute_url())
+        self.client.get(self.card.get_absolute_url())
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, first.cookies)
+        self.assertIn(VISITOR_COOKIE, first.cookies)
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(self._views().count(), 1)
+
+        visitor_id = self._views().get().session_id
+        self.assertTrue(visitor_id)
+        self.client.post(
+            reverse('track_interaction'),
+            data=json.dumps({'slug': self.card.slug, 'kind': CardInteraction.KIND_CLICK, 'target': 'email'}),
+            content_type='application/json',
+        )
+        self.assertEqual(self.card.interactions.get(kind=CardInteraction.KIND_CLICK).session_id, visitor_id)
+
+        # A tampered cookie is a new visitor.
+        self.client.cookies[VISITOR_COOKIE] = first.cookies[VISITOR_COOKIE].value + 'x'
+        self.client.get(self.card.get_absolute_url())
+        self.assertEqual(self._views().count(), 2)
+        self.assertFalse(Session.objects.exists())
+
+    def test_owner_is_still_recognised_on_the_card_page(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.card.get_absolute_url())
+        self.assertTrue(response.context['is_owner'])
+        self.assertEqual(self._views().count(), 0)
+
+
+class UniqueVisitorSketchTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.owner = User.objects.create_user(username='sketched', password='password')
+        self.card = Card.objects.create(user=self.owner, card_data={'firstName': 'Sketched'})
+
+    def test_estimate_tracks_exact_count_and_survives_serialization(self):
+        from .hll import HyperLogLog
+
+        for n in (1, 37, 5000):
+            sketch = HyperLogLog()
+            for i in range(n):
+                sketch.add(f'visitor-{i}')
+            self.assertFalse(sketch.add('visitor-0'))
+            self.assertLess(abs(sketch.count() - n), max(2, n * 0.05))
+            blob = sketch.to_bytes()
+            if n < 100:
+                self.assertEqual(len(blob), 1 + 3 * n)   # sparse: header + (index, rank) pairs
+            self.assertEqual(HyperLogLog.from_bytes(blob).registers, sketch.registers)
+
+        # Merging two days is the union, not the sum.
+        monday, tuesday = HyperLogLog(), HyperLogLog()
+        for i in range(300):
+            monday.add(f'v{i}')
+            tuesday.add(f'v{i + 200}')
+        merged = HyperLogLog.from_bytes(monday.to_bytes())
+        merged.update(tuesday.to_bytes())
+        self.assertLess(abs(merged.count() - 500), 25)
+
+    def test_card_views_feed_the_sketch_and_match_the_exact_count(self):
+        from .hll import exact_unique_visitors, rebuild_sketches, unique_visitors
+        from .models import CardVisitorSketch
+
+        for _ in range(5):
+            Client().get(self.card.get_absolute_url())
+        self.client.get(self.card.get_absolute_url())
+        self.client.get(self.card.get_absolute_url())
+
+        since = timezone.now() - timedelta(days=7)
+        self.assertEqual(CardVisitorSketch.objects.filter(card=self.card).count(), 1)
+        self.assertEqual(exact_unique_visitors(self.card.pk, since), 6)
+        self.assertEqual(unique_visitors(self.card.pk, since), 6)
+
+        rebuild_sketches(card_ids=[self.card.pk])
+        self.assertEqual(unique_visitors(self.card.pk, since), 6)
+
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('card_analytics', args=[self.card.slug]))
+        self.assertEqual(response.context['totals']['visitors'], 6)
+        self.assertContains(response, '6 unique visitors')
+
+    def test_views_and_visitors_share_the_window_and_old_sketches_are_pruned(self):
+        from django.core.management import call_command
+
+        from .hll import day_window, record_visitor
+        from .models import CardVisitorSketch
+
+        start = day_window(7)
+        for name, at in (('edge', start), ('before', start - timedelta(seconds=1))):
+            view = CardInteraction.objects.create(card=self.card, kind=CardInteraction.KIND_VIEW, session_id=name)
+            CardInteraction.objects.filter(pk=view.pk).update(created_at=at)
+            record_visitor(self.card.pk, name, day=at.date())
+
+        self.client.force_login(self.owner)
+        totals = self.client.get(reverse('card_analytics', args=[self.card.slug])).context['totals']
+        self.assertEqual((totals['views'], totals['visitors']), (1, 1))
+
+        old = (timezone.now() - timedelta(days=90)).date()
+        record_visitor(self.card.pk, 'old', day=old)
+        record_visitor(self.card.pk, 'kept', day=old + timedelta(days=1))
+        out = StringIO()
+        call_command('card_lifecycle_tick', stdout=out)
+        self.assertIn('sketches_pruned=1', out.getvalue())
+        self.assertFalse(CardVisitorSketch.objects.filter(day=old).exists())
+        self.assertTrue(CardVisitorSketch.objects.filter(day=old + timedelta(days=1)).exists())
+
+
 class PasswordResetOtpTests(TestCase):
 
     def setUp(self):
@@ -263,3 +476,878 @@ class BusinessCardCreationTests(TestCase):
         form = response.context['form']
         self.assertIn('extra_highlight_content', form.errors)
         self.assertIn('Add the information you want to spotlight.', form.errors['extra_highlight_content'])
+
+
+class ExportDeltaTests(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_superuser(username='exporter', password='password123')
+        self.owner = User.objects.create_user(username='owner', password='password123')
+        self.old_card = Card.objects.create(user=self.owner, card_data={'firstName': 'Old'})
+        self.new_card = Card.objects.create(user=self.owner, card_data={'firstName': 'New'})
+        self.since = timezone.now() - timedelta(days=1)
+        long_ago = timezone.now() - timedelta(days=30)
+        Card.objects.filter(pk=self.old_card.pk).update(updated_at=long_ago)
+        User.objects.filter(pk=self.owner.pk).update(date_joined=long_ago)
+        CardInteraction.objects.create(card=self.new_card, kind=CardInteraction.KIND_VIEW)
+        LeadCapture.objects.create(card=self.new_card, name='Lead', email='lead@example.com')
+        self.client.login(username='exporter', password='password123')
+
+    def _read_zip(self, response):
+        return zipfile.ZipFile(BytesIO(response.content))
+
+    def test_since_returns_only_changed_rows_and_watermark(self):
+        response = self.client.get(reverse('export_cards_csv'), {'since': self.since.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        archive = self._read_zip(response)
+        cards_csv = archive.read('cards.csv').decode('utf-8')
+        self.assertIn(self.new_card.slug, cards_csv)
+        self.assertNotIn(self.old_card.slug, cards_csv)
+        users_csv = archive.read('users.csv').decode('utf-8')
+        self.assertNotIn('owner', users_csv)
+        watermark = archive.read('watermark.txt').decode('utf-8').strip()
+        self.assertEqual(response['X-Export-Watermark'], watermark)
+        self.assertNotIn('interactions.csv', archive.namelist())
+
+    def test_include_adds_interaction_and_lead_deltas(self):
+        response = self.client.get(
+            reverse('export_cards_csv'),
+            {'since': self.since.isoformat(), 'include': 'interactions,leads'},
+        )
+        archive = self._read_zip(response)
+        self.assertIn(self.new_card.slug, archive.read('interactions.csv').decode('utf-8'))
+        self.assertIn('lead@example.com', archive.read('leads.csv').decode('utf-8'))
+
+    def test_invalid_since_is_rejected(self):
+        response = self.client.get(reverse('export_cards_excel'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+def _jpeg_with_exif(size=(900, 600)):
+    from PIL import Image
+
+    img = Image.new('RGB', size, (200, 40, 40))
+    exif = img.getexif()
+    exif[0x010F] = 'TestCam'      # Make
+    exif[0x0112] = 6              # Orientation: rotate 90° CW
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class ImageDerivativeTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='photo', password='password')
+
+    def _card_with_avatar(self, data):
+        card = Card(user=self.user, card_data={'firstName': 'Photo'})
+        card.avatar = SimpleUploadedFile('me.jpg', data, content_type='image/jpeg')
+        card.save()
+        return card
+
+    def test_upload_is_stripped_and_rotated(self):
+        from PIL import Image
+
+        card = self._card_with_avatar(_jpeg_with_exif())
+        with Image.open(card.avatar.path) as stored:
+            self.assertEqual(stored.size, (600, 900))
+            self.assertFalse(dict(stored.getexif()))
+
+    def test_derivatives_written_under_content_hash(self):
+        card = self._card_with_avatar(_jpeg_with_exif())
+        manifest = card.image_variants['avatar']
+        self.assertEqual(manifest['widths'], [128, 256, 512])
+        self.assertEqual(manifest['fallback'], 'jpg')
+        for width in manifest['widths']:
+            for ext in ('webp', 'jpg'):
+                self.assertTrue(os.path.exists(os.path.join(self.media_root, manifest['base'], f'{width}.{ext}')))
+
+        twin = self._card_with_avatar(_jpeg_with_exif())
+        self.assertEqual(twin.image_variants['avatar']['base'], manifest['base'])
+
+    def test_picture_tag_renders_srcset(self):
+        from django.template import Context, Template
+
+        card = self._card_with_avatar(_jpeg_with_exif())
+        html = Template("{% load card_images %}{% card_picture card 'avatar' sizes='68px' %}").render(
+            Context({'card': card})
+        )
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('512.webp 512w', html)
+        self.assertIn('sizes="68px"', html)
+
+        card.image_variants = {}
+        html = Template("{% load card_images %}{% card_picture card 'avatar' %}").render(Context({'card': card}))
+        self.assertIn(card.avatar.url, html)
+
+
+class MediaDedupTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='brand', password='password')
+        self.admin = User.objects.create_superuser(username='boss', password='password')
+
+    def _card(self, logo_bytes, name='acme.jpg'):
+        card = Card(user=self.user, card_data={'firstName': 'Brand'})
+        card.logo = SimpleUploadedFile(name, logo_bytes, content_type='image/jpeg')
+        card.save()
+        return card
+
+    def test_same_upload_is_stored_once_and_refcounted(self):
+        data = _jpeg_with_exif((300, 300))
+        first = self._card(data, 'acme.jpg')
+        second = self._card(data, 'acme-copy.jpg')
+        self.assertEqual(first.logo.name, second.logo.name)
+        self.assertRegex(first.logo.name, r'^logos/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        path = first.logo.path
+        derivatives = os.path.join(self.media_root, first.image_variants['logo']['base'])
+
+        self.client.login(username='boss', password='password')
+        self.client.get(reverse('delete_card_admin', args=[first.slug]))
+        self.assertTrue(os.path.exists(path))
+
+        self.client.get(reverse('delete_card_admin', args=[second.slug]))
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(derivatives))
+
+    def test_dedupe_command_relinks_legacy_files(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import FileSystemStorage
+        from django.core.management import call_command
+
+        data = _jpeg_with_exif((200, 200))
+        legacy = FileSystemStorage()
+        names = [legacy.save('logos/acme.jpg', ContentFile(data)), legacy.save('logos/acme.jpg', ContentFile(data))]
+        self.assertNotEqual(names[0], names[1])
+        cards = [self._card(_jpeg_with_exif((50, 50)), f'tmp{i}.jpg') for i in range(2)]
+        for card, name in zip(cards, names):
+            Card.objects.filter(pk=card.pk).update(logo=name)
+
+        out = StringIO()
+        call_command('dedupe_media', '--orphans', stdout=out)
+
+        relinked = {Card.objects.get(pk=card.pk).logo.name for card in cards}
+        self.assertEqual(len(relinked), 1)
+        self.assertRegex(relinked.pop(), r'^logos/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        for name in names:
+            self.assertFalse(legacy.exists(name))
+        self.assertRegex(out.getvalue(), r'reclaimed=\d+ bytes')
+
+    def test_dedupe_command_rolls_over_the_card_etag(self):
+        from django.core.cache import cache
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import FileSystemStorage
+        from django.core.management import call_command
+
+        cache.clear()
+        name = FileSystemStorage().save('logos/legacy.jpg', ContentFile(_jpeg_with_exif((80, 80))))
+        card = self._card(_jpeg_with_exif((40, 40)), 'tmp.jpg')
+        Card.objects.filter(pk=card.pk).update(logo=name)
+        cache.clear()
+        first = self.client.get(card.get_absolute_url())
+
+        call_command('dedupe_media', stdout=StringIO())
+
+        again = self.client.get(card.get_absolute_url(), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again['ETag'], first['ETag'])
+
+    def test_dedupe_command_does_not_count_a_moved_unique_file_as_reclaimed(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import FileSystemStorage
+        from django.core.management import call_command
+
+        name = FileSystemStorage().save('logos/solo.jpg', ContentFile(_jpeg_with_exif((120, 120))))
+        card = self._card(_jpeg_with_exif((40, 40)), 'tmp.jpg')
+        Card.objects.filter(pk=card.pk).update(logo=name)
+
+        out = StringIO()
+        call_command('dedupe_media', stdout=out)
+        self.assertIn('relinked=1 deduplicated=0 removed=1', out.getvalue())
+        self.assertIn('reclaimed=0 bytes', out.getvalue())
+
+    def test_saving_known_content_rewrites_the_file(self):
+        from django.core.files.base import ContentFile
+
+        from .storage import card_media_storage
+
+        storage = card_media_storage()
+        data = _jpeg_with_exif((60, 60))
+        name = storage.save('logos/a.jpg', ContentFile(data))
+        # A concurrent release_media() removed it just after the name resolved.
+        os.remove(storage.path(name))
+        self.assertEqual(storage.save('logos/b.jpg', ContentFile(data)), name)
+        with storage.open(name, 'rb') as fh:
+            self.assertEqual(fh.read(), data)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(storage.path(name)))), [os.path.basename(name)])
+
+
+class ResizedMediaTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(
+            MEDIA_ROOT=self.media_root, MEDIA_RESIZE_SIZES=[(64, 64), (128, 128)],
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        user = User.objects.create_user(username='resize', password='password')
+        self.card = Card(user=user, card_data={'firstName': 'Resize'})
+        self.card.avatar = SimpleUploadedFile('me.jpg', _jpeg_with_exif((900, 600)), content_type='image/jpeg')
+        self.card.save()
+        self.url = reverse('resized_media', args=[64, 64, self.card.avatar.name])
+
+    def test_renders_into_cache_with_immutable_headers(self):
+        from PIL import Image
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertFalse(response['ETag'].startswith('W/'))
+        body = b''.join(response.streaming_content)
+        with Image.open(BytesIO(body)) as img:
+            self.assertLessEqual(max(img.size), 64)
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, 'r', '64x64', self.card.avatar.name)))
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_rejects_sizes_and_paths_outside_allow_list(self):
+        self.assertEqual(self.client.get(reverse('resized_media', args=[65, 65, self.card.avatar.name])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('resized_media', args=[64, 64, 'qrcodes/x.png'])).status_code, 404)
+        self.assertEqual(self.client.get('/media/r/64x64/avatars/../../secret.jpg').status_code, 404)
+
+    def test_cache_budget_evicts_least_recently_used(self):
+        from .images import enforce_resize_cache_budget
+
+        self.client.get(self.url)
+        self.client.get(reverse('resized_media', args=[128, 128, self.card.avatar.name]))
+        old = os.path.join(self.media_root, 'r', '64x64', self.card.avatar.name)
+        os.utime(old, (1, 1))
+        newest = os.path.getsize(os.path.join(self.media_root, 'r', '128x128', self.card.avatar.name))
+        enforce_resize_cache_budget(self.media_root, newest)
+        self.assertFalse(os.path.exists(old))
+
+    def test_misses_only_walk_the_cache_once_it_is_over_budget(self):
+        from django.core.cache import cache
+
+        from .images import RESIZE_CACHE_BYTES_KEY
+
+        cache.set(RESIZE_CACHE_BYTES_KEY, 0, None)
+        with patch('cards.images.os.walk', wraps=os.walk) as walk:
+            self.client.get(self.url)
+        walk.assert_not_called()
+        small = os.path.join(self.media_root, 'r', '64x64', self.card.avatar.name)
+        budget = os.path.getsize(small) + 1
+        self.assertEqual(cache.get(RESIZE_CACHE_BYTES_KEY), budget - 1)
+
+        os.utime(small, (1, 1))
+        with override_settings(MEDIA_RESIZE_CACHE_BYTES=budget):
+            self.client.get(reverse('resized_media', args=[128, 128, self.card.avatar.name]))
+        self.assertFalse(os.path.exists(small))
+        self.assertLessEqual(cache.get(RESIZE_CACHE_BYTES_KEY), budget)
+
+
+class VCardTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='vcard', password='password')
+        self.card = Card(user=self.user, card_data={'firstName': 'Ada', 'lastName': 'Lovelace', 'company': 'Engines, Ltd'})
+        self.card.avatar = SimpleUploadedFile('ada.jpg', _jpeg_with_exif((600, 600)), content_type='image/jpeg')
+        self.card.save()
+
+    def test_vcard_embeds_photo_and_is_built_once_per_version(self):
+        from .images import jpeg_thumbnail
+
+        url = reverse('download_vcard', args=[self.card.slug])
+        with patch('cards.vcard.jpeg_thumbnail', wraps=jpeg_thumbnail) as thumb:
+            first = self.client.get(url).content.decode()
+            self.client.get(url)
+        self.assertEqual(thumb.call_count, 1)
+        self.assertIn('PHOTO;ENCODING=b;TYPE=JPEG:', first)
+        self.assertIn('ORG:Engines\\, Ltd', first)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in first.split('\r\n')))
+
+        without = self.client.get(url + '?photo=0').content.decode()
+        self.assertNotIn('PHOTO', without)
+
+        self.card.card_data['firstName'] = 'Augusta'
+        self.card.save()
+        self.assertIn('FN:Augusta Lovelace', self.client.get(url).content.decode())
+
+    def test_bulk_download_streams_only_the_selection(self):
+        Card.objects.create(user=self.user, card_data={'firstName': 'Second'})
+        other = Card.objects.create(
+            user=User.objects.create_user(username='other-vcard', password='password'),
+            card_data={'firstName': 'Stranger'},
+        )
+        self.client.login(username='vcard', password='password')
+        response = self.client.get(reverse('download_my_vcards'))
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.count('BEGIN:VCARD'), 2)
+        self.assertNotIn('Stranger', body)
+
+        admin = User.objects.create_superuser(username='vcard-admin', password='password', email='a@example.com')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin_bulk_vcards'), {'card': [other.slug], 'photo': '0'})
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.count('BEGIN:VCARD'), 1)
+        self.assertIn('Stranger', body)
+
+
+class PrintSheetTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='printer', password='password')
+        self.cards = [
+            Card.objects.create(user=self.user, card_data={'firstName': f'Print{i}', 'email': f'p{i}@example.com'})
+            for i in range(11)
+        ]
+
+    def test_command_writes_duplex_png_sheets_from_cached_qr(self):
+        from django.core.management import call_command
+        from PIL import Image
+
+        out_dir = os.path.join(self.media_root, 'sheets')
+        stdout = StringIO()
+        call_command(
+            'render_print_sheets', *[card.slug for card in self.cards], 'missing-slug',
+            output=out_dir, format='png', dpi=100, workers=1, stdout=stdout, stderr=StringIO(),
+        )
+        output = stdout.getvalue()
+        self.assertIn('cards=11 sheets=2', output)
+        self.assertIn('qr_generated=0', output)
+        self.assertIn('cards/s', output)
+        self.assertEqual(
+            sorted(os.listdir(out_dir)),
+            ['sheet-0001-back.png', 'sheet-0001-front.png', 'sheet-0002-back.png', 'sheet-0002-front.png'],
+        )
+        with Image.open(os.path.join(out_dir, 'sheet-0001-front.png')) as sheet:
+            self.assertEqual(sheet.size, (827, 1169))   # A4 at 100 dpi
+
+    def test_admin_action_streams_a_pdf(self):
+        admin = User.objects.create_superuser(username='print-admin', password='password', email='a@example.com')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin_print_sheets'), {'user': [self.user.pk], 'dpi': '150'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Print-Cards'], '11')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    @override_settings(PRINT_SHEET_MAX_CARDS=10)
+    def test_admin_action_rejects_selections_over_the_limit(self):
+        admin = User.objects.create_superuser(username='print-admin', password='password', email='a@example.com')
+        self.client.force_login(admin)
+        with patch('cards.print_sheets.write_sheets') as write_sheets:
+            response = self.client.get(reverse('admin_print_sheets'), {'user': [self.user.pk], 'dpi': '300'}, follow=True)
+        write_sheets.assert_not_called()
+        self.assertRedirects(response, reverse('admin_dashboard'))
+        self.assertContains(response, 'render_print_sheets')
+
+        response = self.client.get(reverse('admin_print_sheets'), {'user': [self.user.pk], 'dpi': 'abc'}, follow=True)
+        self.assertContains(response, 'at 300 DPI')   # unparseable DPI falls back to 300, not a 500
+
+
+PROVISION_CSV = (
+    '﻿firstName,lastName,email,jobTitle,phone,theme_slug\n'
+    'Ada,Lovelace,ada@example.com,Engineer,+8801711000001,\n'
+    'Ada,Lovelace,ada2@example.com,Analyst,,\n'
+    ',Nobody,nobody@example.com,,,\n'
+    'Grace,Hopper,not-an-email,,,\n'
+    'Alan,Turing,alan@example.com,,8801711000002,\n'
+)
+
+
+class ProvisioningTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.owner = User.objects.create_user(username='acme', email='it@acme.example', password='password')
+        Profile.objects.create(user=self.owner, phone_number='01711000099', card_limit=10)
+        Card.objects.create(user=self.owner, card_data={'firstName': 'Ada', 'lastName': 'Lovelace'})
+
+    def _csv(self, name='staff.csv'):
+        return SimpleUploadedFile(name, PROVISION_CSV.encode('utf-8'), content_type='text/csv')
+
+    def test_allocate_slugs_skips_taken_and_repeated_bases(self):
+        from .provisioning import allocate_slugs
+
+        Card.objects.create(user=self.owner, card_data={'firstName': 'Ada', 'lastName': 'Lovelace'})
+        self.assertEqual(
+            allocate_slugs(['ada', 'ada', 'alan', 'alan']),
+            ['ada-3', 'ada-4', 'alan', 'alan-2'],
+        )
+
+    def test_command_reports_every_row_and_writes_qr_codes(self):
+        from django.core.management import call_command
+
+        from .themes import active_themes
+
+        path = os.path.join(self.media_root, 'staff.csv')
+        with open(path, 'w', encoding='utf-8') as fh:
+            fh.write(PROVISION_CSV)
+        report_path = os.path.join(self.media_root, 'report.csv')
+        stdout = StringIO()
+        active_themes()   # themes come from the process-wide registry
+        # Constant in the row count: no per-row slug probes or saves.
+        with self.assertNumQueries(9):
+            call_command('provision_cards', path, owner='it@acme.example', report=report_path, workers=1, stdout=stdout)
+        self.assertIn('rows=5 created=3 invalid=2 over_limit=0 failed=0 qr=3', stdout.getvalue())
+
+        with open(report_path, encoding='utf-8') as fh:
+            lines = fh.read().splitlines()
+        self.assertEqual(lines[0], 'row,status,slug,name,errors')
+        self.assertTrue(lines[1].startswith('2,created,ada-2,'))
+        self.assertTrue(lines[2].startswith('3,created,ada-3,'))
+        self.assertIn('firstName', lines[3])
+        self.assertIn('email', lines[4])
+
+        ada = Card.objects.get(slug='ada-2')
+        self.assertEqual(ada.card_data['phone'], '8801711000001')
+        self.assertEqual(ada.card_data['jobTitle'], 'Engineer')
+        self.assertEqual(ada.text_color, '#FFFFFF')
+        self.assertEqual(ada.qr_code.name, 'qrcodes/qr_code_ada-2.png')
+        self.assertTrue(os.path.exists(ada.qr_code.path))
+        self.assertEqual(Card.objects.get(slug='alan').card_data['phone'], '8801711000002')
+
+    def test_dry_run_and_card_limit(self):
+        from .provisioning import provision_cards, read_rows
+
+        report = provision_cards(read_rows(self._csv()), self.owner, dry_run=True)
+        self.assertEqual([row.status for row in report.rows], ['valid', 'valid', 'invalid', 'invalid', 'valid'])
+        self.assertEqual(Card.objects.filter(user=self.owner).count(), 1)
+
+        self.owner.profile.card_limit = 2
+        self.owner.profile.save()
+        report = provision_cards(read_rows(self._csv()), self.owner)
+        self.assertEqual(report.count('created'), 1)
+        self.assertEqual(report.count('over_limit'), 2)
+        self.assertEqual(Card.objects.filter(user=self.owner).count(), 2)
+
+    def test_slug_taken_during_the_import_is_reallocated(self):
+        from . import provisioning
+
+        allocate = provisioning.allocate_slugs
+
+        def allocate_then_race(bases):
+            slugs = allocate(bases)
+            if not Card.objects.filter(slug='alan').exists():
+                # Someone finishes the builder as 'alan' before the insert.
+                Card.objects.create(user=self.owner, card_data={'firstName': 'Alan'})
+            return slugs
+
+        with patch('cards.provisioning.allocate_slugs', side_effect=allocate_then_race):
+            report = provisioning.provision_cards(provisioning.read_rows(self._csv()), self.owner)
+        self.assertEqual(report.count('created'), 3)
+        self.assertEqual([row.slug for row in report.rows if row.status == 'created'], ['ada-2', 'ada-3', 'alan-2'])
+        self.assertTrue(Card.objects.filter(slug='alan-2', card_data__lastName='Turing').exists())
+
+    def test_admin_upload_renders_report(self):
+        admin = User.objects.create_superuser(username='prov-admin', password='password', email='a@example.com')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin_provision_cards'), {
+            'csv_file': self._csv(), 'owner': 'acme', 'card_type': 'business',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['created'], 3)
+        self.assertContains(response, 'ada-2')
+        self.assertEqual(Card.objects.filter(user=self.owner, card_type='business').count(), 3)
+
+
+class FragmentCacheTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        user = User.objects.create_user(username='fragments', password='password')
+        self.card = Card.objects.create(user=user, card_data={'firstName': 'Fragment', 'jobTitle': 'Cached role'})
+
+    def test_card_body_follows_edits(self):
+        first = self.client.get(self.card.get_absolute_url())
+        self.assertContains(first, 'Cached role')
+        self.assertNotContains(first, 'Everything from the hero')
+        self.card.card_data['jobTitle'] = 'Fresh role'
+        self.card.save(update_fields=['card_data'])
+
+        response = self.client.get(self.card.get_absolute_url())
+        self.assertContains(response, 'Fresh role')
+        self.assertNotContains(response, 'Cached role')
+
+    def test_template_bench_leaves_no_sample_files_behind(self):
+        from django.core.management import call_command
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media_root):
+            call_command('bench_templates', repeat=1, stdout=StringIO())
+        self.assertEqual(os.listdir(os.path.join(media_root, 'qrcodes')), [])
+        self.assertFalse(Card.objects.filter(user__username='bench-templates-owner').exists())
+
+    def test_landing_fragments_are_keyed_on_theme_and_offer_versions(self):
+        from django.core.cache import cache
+        from django.core.cache.utils import make_template_fragment_key
+
+        from .models import CardTheme, Offer
+        from .versioning import fragment_version
+
+        self.assertEqual(self.client.get(reverse('index')).status_code, 200)
+        version = fragment_version()
+        self.assertIsNotNone(cache.get(make_template_fragment_key('landing-sections', [version, 'en'])))
+
+        CardTheme.objects.create(name='Fragment', slug='fragment', background='#000', accent_color='#fff')
+        self.assertNotEqual(fragment_version(), version)
+        version = fragment_version()
+        Offer.objects.create(
+            title='Launch', description='10% off', discount_value=10,
+            starts_at=timezone.now() - timedelta(days=1), ends_at=timezone.now() + timedelta(days=1),
+        )
+        self.assertNotEqual(fragment_version(), version)
+        self.assertContains(self.client.get(reverse('index')), 'Launch')
+
+    def test_anonymous_landing_needs_no_queries_once_cached(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from .models import CardTheme, Offer
+
+        Offer.objects.create(
+            title='Launch', description='10% off', discount_value=10,
+            starts_at=timezone.now() - timedelta(days=1), ends_at=timezone.now() + timedelta(days=1),
+        )
+        self.assertContains(self.client.get(reverse('index')), 'Cached role')
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('index'))
+        self.assertContains(response, 'Launch')
+
+        # Saving the demo card or any theme drops the cached demo context.
+        self.card.card_data['jobTitle'] = 'Fresh role'
+        self.card.save(update_fields=['card_data'])
+        self.assertContains(self.client.get(reverse('index')), 'Fresh role')
+        CardTheme.objects.create(name='Demo', slug='demo', background='#000', accent_color='#fff')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('index'))
+        self.assertTrue(all('cards_card' in query['sql'] for query in queries.captured_queries))
+        self.assertTrue(queries.captured_queries)
+
+
+class CssBuildTests(TestCase):
+
+    def test_purge_keeps_used_and_prefixed_classes_only(self):
+        from .css_build import minify_css, purge_css
+
+        css = """
+        /* comment */
+        :root { --x: 1; }
+        .mc-used, .mc-unused { color: red; }
+        .mc-unused:hover { color: blue; }
+        .mc-toast--success > a[href$=".pdf"] { color: green; }
+        @media (max-width: 600px) { .mc-unused { display: none; } .mc-used { display: block; } }
+        @keyframes spin { from { transform: rotate(0); } }
+        """
+        out = minify_css(purge_css(css, {'mc-used', 'mc-toast--'}))
+        self.assertEqual(out, (
+            ':root{--x:1}.mc-used{color:red}.mc-toast--success > a[href$=".pdf"]{color:green}'
+            '@media (max-width:600px){.mc-used{display:block}}@keyframes spin{from{transform:rotate(0)}}'
+        ))
+
+    def test_bundle_is_hashed_and_recorded_in_the_manifest(self):
+        from pathlib import Path
+
+        from .css_build import build_bundle, bundle_path, content_files, used_words
+
+        static_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, static_dir, ignore_errors=True)
+        stats = build_bundle('.flex{display:flex}', used_words(content_files()), static_dir=static_dir)
+
+        self.assertRegex(stats['path'], r'^cards/dist/app\.[0-9a-f]{12}\.css$')
+        self.assertLess(stats['bundle_bytes'], stats['source_bytes'])
+        bundle = (static_dir / stats['path']).read_text(encoding='utf-8')
+        self.assertIn('.mc-btn{', bundle)
+        self.assertTrue(bundle.rstrip().endswith('.flex{display:flex}'))
+        self.assertEqual(bundle_path(static_dir / 'cards/dist/manifest.json'), stats['path'])
+        self.assertEqual(bundle_path(static_dir / 'missing.json'), '')
+
+    def test_pages_carry_no_build_notes(self):
+        self.assertNotContains(self.client.get(reverse('index')), 'manage.py build_css')
+
+
+class IconSpriteTests(TestCase):
+
+    def setUp(self):
+        from pathlib import Path
+
+        self.lucide_dir = Path(tempfile.mkdtemp())
+        self.static_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.lucide_dir, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.static_dir, ignore_errors=True)
+        for name in ('phone', 'user', 'sparkles'):
+            (self.lucide_dir / f'{name}.svg').write_text(
+                '<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" '
+                f'fill="none" stroke="currentColor">\n  <path d="M0 0h{len(name)}" />\n</svg>\n'
+            )
+
+    def test_used_icons_reads_templates_and_dynamic_sets(self):
+        from .css_build import content_files
+        from .icon_sprite import used_icons
+
+        static_names, dynamic_names = used_icons(content_files())
+        self.assertTrue({'phone', 'briefcase', 'user', 'printer', 'globe'} <= static_names)
+        self.assertTrue({'trophy', 'whatsapp'} <= dynamic_names)
+
+    def test_sprite_is_hashed_and_shares_the_css_manifest(self):
+        from .css_build import build_bundle, manifest_entry
+        from .icon_sprite import SPRITE_NAME, IconBuildError, build_sprite
+
+        css = build_bundle('', set(), static_dir=self.static_dir)
+        stats = build_sprite(self.lucide_dir, {'phone', 'user'}, {'sparkles', 'not-an-icon'}, static_dir=self.static_dir)
+
+        self.assertRegex(stats['path'], r'^cards/dist/icons\.[0-9a-f]{12}\.svg$')
+        self.assertEqual((stats['icons'], stats['brands']), (3, 10))
+        sprite = (self.static_dir / stats['path']).read_text(encoding='utf-8')
+        self.assertIn('<symbol id="phone" viewBox="0 0 24 24"><path d="M0 0h5" /></symbol>', sprite)
+        self.assertIn('<symbol id="brand-whatsapp"', sprite)
+        self.assertNotIn('not-an-icon', sprite)
+        manifest = self.static_dir / 'cards/dist/manifest.json'
+        self.assertEqual(manifest_entry(SPRITE_NAME, manifest), stats['path'])
+        self.assertEqual(manifest_entry('app.css', manifest), css['path'])
+
+        with self.assertRaisesRegex(IconBuildError, 'briefcase'):
+            build_sprite(self.lucide_dir, {'briefcase'}, static_dir=self.static_dir)
+
+    def test_card_socials_reference_the_sprite(self):
+        user = User.objects.create_user(username='sprite', password='password')
+        card = Card.objects.create(user=user, card_data={
+            'firstName': 'Sprite', 'facebook': 'https://facebook.com/sprite', 'github': 'https://github.com/sprite',
+        })
+        inline = self.client.get(card.get_absolute_url()).content.decode()
+        self.assertIn('<svg class="vc-social__logo" viewBox="0 0 24 24" fill="currentColor" aria-hidden="true"><path', inline)
+        self.assertIn('unpkg.com/lucide@0.', inline)
+        self.assertNotIn('manage.py build_icons', inline)
+
+        from django.core.cache import cache
+
+        cache.clear()
+        sprite = {'icons.svg': 'cards/dist/icons.0123456789ab.svg'}
+        with patch('cards.templatetags.assets.manifest_entry', side_effect=lambda name: sprite.get(name, '')):
+            response = self.client.get(card.get_absolute_url())
+        html = response.content.decode()
+        self.assertIn('<use href="/static/cards/dist/icons.0123456789ab.svg#brand-github"></use>', html)
+        self.assertIn('data-sprite="/static/cards/dist/icons.0123456789ab.svg"', html)
+        self.assertNotIn('unpkg.com/lucide', html)
+        self.assertLess(len(html), len(inline))
+
+
+class FontBuildTests(TestCase):
+
+    def test_latin_subset_is_hashed_woff2_and_rendered_with_preloads(self):
+        try:
+            import fontTools  # noqa: F401
+        except ImportError:
+            self.skipTest('fonttools is not installed')
+        from pathlib import Path
+
+        from .css_build import manifest_entry
+        from .font_build import FACES, FONTS_NAME, build_fonts
+
+        static_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, static_dir, ignore_errors=True)
+        stats = build_fonts(faces=FACES[:1] + FACES[3:], static_dir=static_dir)
+
+        self.assertEqual(stats['faces'], 1)   # JetBrains Mono is optional and not bundled
+        self.assertLess(stats['woff2_bytes'] * 4, stats['source_bytes'])
+        faces = manifest_entry(FONTS_NAME, static_dir / 'cards/dist/manifest.json')
+        self.assertRegex(faces[0]['path'], r'^cards/dist/fonts/BaiJamjuree-Regular-latin\.[0-9a-f]{12}\.woff2$')
+        self.assertEqual((static_dir / faces[0]['path']).read_bytes()[:4], b'wOF2')
+
+        with patch('cards.templatetags.assets.manifest_entry', side_effect=lambda name: {'fonts': faces}.get(name, '')):
+            html = self.client.get(reverse('index')).content.decode()
+        self.assertIn(f'<link rel="preload" href="/static/{faces[0]["path"]}" as="font" type="font/woff2" crossorigin>', html)
+        self.assertIn("@font-face{font-family:'Bai Jamjuree'", html)
+        self.assertNotIn('fonts.googleapis.com', html)
+
+    def test_fallback_head_carries_no_build_note(self):
+        html = self.client.get(reverse('index')).content.decode()
+        self.assertIn('fonts.googleapis.com', html)
+        self.assertNotIn('manage.py build_fonts', html)
+
+
+class CriticalCssTests(TestCase):
+
+    def test_extract_keeps_rules_used_above_the_fold(self):
+        from pathlib import Path
+
+        from .critical_css import critical_css_for, extract_critical, write_critical
+
+        css = '.vc-hero{color:red}.vc-about{color:blue}.mc-btn .vc-hero{margin:0}body{margin:0}'
+        html = (
+            '<html><body><section class="vc-hero mc-btn">Hi</section><style>.vc-about{}</style>'
+            '<!-- critical-fold --><section class="vc-about">Below</section></body></html>'
+        )
+        self.assertEqual(extract_critical(css, html), '.vc-hero{color:red}.mc-btn .vc-hero{margin:0}body{margin:0}')
+
+        static_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, static_dir, ignore_errors=True)
+        entries = write_critical({'view_card': 'body{margin:0}'}, static_dir=static_dir)
+        self.assertRegex(entries['view_card'], r'^cards/dist/critical/view_card\.[0-9a-f]{12}\.css$')
+        self.assertEqual(critical_css_for('view_card', entries, static_dir=static_dir), 'body{margin:0}')
+        self.assertEqual(critical_css_for('index', entries, static_dir=static_dir), '')
+
+    def test_card_page_inlines_critical_css_and_defers_the_rest(self):
+        user = User.objects.create_user(username='critical', password='password')
+        card = Card.objects.create(user=user, card_data={'firstName': 'Critical'})
+        critical = lambda page, entries: '.vc-page{color:red}' if page == 'view_card' else ''  # noqa: E731
+        with patch('cards.templatetags.assets.bundle_path', return_value='cards/dist/app.0123456789ab.css'), \
+                patch('cards.templatetags.assets.critical_css_for', side_effect=critical):
+            html = self.client.get(card.get_absolute_url()).content.decode()
+            index = self.client.get(reverse('index')).content.decode()
+            with override_settings(CRITICAL_CSS=False):
+                blocking = self.client.get(card.get_absolute_url()).content.decode()
+
+        self.assertIn('<style>.vc-page{color:red}</style>', html)
+        self.assertNotIn('{#', html)
+        self.assertIn('<link rel="preload" href="/static/cards/dist/app.0123456789ab.css" as="style"', html)
+        self.assertIn('<noscript><link rel="stylesheet" href="/static/cards/dist/app.0123456789ab.css"></noscript>', html)
+        self.assertIn('sweetalert2@11" defer></script>', html)
+        self.assertIn('<link rel="stylesheet" href="/static/cards/dist/app.0123456789ab.css">', index)
+        self.assertNotIn('rel="preload" href="/static/cards/dist/app', blocking)
+
+
+class ServiceWorkerTests(TestCase):
+
+    def test_worker_script_precaches_the_shell(self):
+        entries = {'app.css': 'cards/dist/app.0123456789ab.css', 'icons.svg': 'cards/dist/icons.0123456789ab.svg'}
+        with patch('cards.service_worker.bundle_path', return_value=entries['app.css']), \
+                patch('cards.service_worker.manifest_entry', side_effect=lambda name: entries.get(name, '')):
+            response = self.client.get(reverse('service_worker'))
+        with patch('cards.service_worker.bundle_path', return_value=''), \
+                patch('cards.service_worker.manifest_entry', return_value=''):
+            unbundled = self.client.get(reverse('service_worker')).content.decode()
+
+        body = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/javascript; charset=utf-8')
+        self.assertEqual(response['Service-Worker-Allowed'], '/')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('"/static/cards/dist/app.0123456789ab.css"', body)
+        self.assertIn('"/static/cards/dist/icons.0123456789ab.svg"', body)
+        self.assertIn(f'"{reverse("offline")}"', body)
+        self.assertIn(f'"track_url": "{reverse("track_interaction")}"', body)
+        self.assertIn('"/static/cards/css/tokens.css"', unbundled)
+        self.assertNotIn('icons.js', unbundled)
+        self.assertIn('event.waitUntil(caches.delete(PAGES_CACHE))', body)
+        self.assertIn('data.sent = Date.now()', body)
+        # A different shell is a different cache name.
+        version = lambda text: text.split('"version": "')[1][:12]  # noqa: E731
+        self.assertNotEqual(version(body), version(unbundled))
+
+    def test_pages_register_the_worker_unless_disabled(self):
+        offline = self.client.get(reverse('offline'))
+        self.assertContains(offline, "You're offline.")
+        self.assertContains(offline, 'navigator.serviceWorker.register("/sw.js"')
+        with override_settings(SERVICE_WORKER=False):
+            disabled = self.client.get(reverse('index')).content.decode()
+        self.assertNotIn('navigator.serviceWorker.register(', disabled)
+        self.assertIn('registration.unregister()', disabled)
+
+    def test_replayed_beacons_keep_the_time_of_the_tap(self):
+        owner = User.objects.create_user(username='offline-owner', password='password')
+        card = Card.objects.create(user=owner, card_data={'firstName': 'Offline'})
+
+        def beacon(**extra):
+            self.client.post(
+                reverse('track_interaction'),
+                data=json.dumps({'slug': card.slug, 'kind': CardInteraction.KIND_CLICK, 'target': 'email', **extra}),
+                content_type='application/json',
+            )
+            return timezone.now() - card.interactions.latest('id').created_at
+
+        # The device clock is hours off; only the queued time counts.
+        at = 1_000_000_000_000
+        self.assertAlmostEqual(beacon(at=at, sent=at + 3 * 3600 * 1000).total_seconds(), 3 * 3600, delta=60)
+        self.assertAlmostEqual(beacon(at=at, sent=at + 30 * 86400 * 1000).total_seconds(), 7 * 86400, delta=60)
+        self.assertLess(beacon(at=at).total_seconds(), 60)            # live, not replayed
+        self.assertLess(beacon(at=at, sent='soon').total_seconds(), 60)
+
+
+class ThemeRegistryTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        from .models import CardTheme
+
+        cache.clear()
+        CardTheme.objects.create(name='Zeta', slug='zeta', background='#000', sort_order=1)
+        CardTheme.objects.create(name='Alpha', slug='alpha', background='#111', sort_order=2, is_premium=True)
+
+    def test_registry_keeps_order_and_reloads_on_theme_save(self):
+        from .models import CardTheme
+        from .themes import active_themes, get_theme
+
+        themes = active_themes()
+        self.assertEqual(list(themes), list(CardTheme.objects.filter(is_active=True).values_list('slug', flat=True)))
+        self.assertLess(list(themes).index('zeta'), list(themes).index('alpha'))
+        with self.assertNumQueries(0):
+            self.assertIs(active_themes(), themes)
+            self.assertEqual(get_theme('alpha').background, '#111')
+
+        theme = CardTheme.objects.get(slug='alpha')
+        theme.is_active = False
+        theme.save()
+        self.assertIsNone(get_theme('alpha'))
+
+    def test_themes_for_user_locks_copies_for_free_users(self):
+        from .permissions import themes_for_user
+        from .themes import active_themes
+
+        user = User.objects.create_user(username='free-themes', password='password')
+        picker = {theme.slug: theme for theme in themes_for_user(active_themes().values(), user)}
+        self.assertTrue(picker['alpha'].locked)
+        self.assertFalse(picker['zeta'].locked)
+        self.assertFalse(active_themes()['alpha'].locked)
+
+    def test_card_page_resolves_its_theme_without_a_query(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from .themes import active_themes
+
+        user = User.objects.create_user(username='themed', password='password')
+        card = Card.objects.create(user=user, card_data={'firstName': 'Themed', 'theme_slug': 'zeta'})
+        active_themes()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(card.get_absolute_url())
+        self.assertContains(response, '--vc-hero-bg: #000;')
+        self.assertFalse(any('cards_cardtheme' in query['sql'] for query in queries.captured_queries))
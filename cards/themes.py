@@ -0,0 +1,66 @@
+"""Process-wide registry of the active card themes.
+
+There are about fourteen curated CardThemes and they change a few times a
+year, yet `view_card`, `physical_card`, the landing demo, the card
+builders and `_sanitize_theme_slug` each looked them up with a query per
+request. `active_themes()` loads them once per process into an ordered
+`{slug: ThemeView}` (the model's `sort_order, name` ordering) and keeps
+that until the theme generation moves on: CardTheme save/delete bumps
+it (`versioning.bump_theme_generation`), so a request pays one cache
+read instead of a query. The registry is also reloaded every
+THEME_REGISTRY_SECONDS, in case the generation key is evicted or themes
+are changed with `QuerySet.update()`.
+
+`ThemeView` is a frozen snapshot of the fields pages read. Templates use
+it exactly like the model instance; `themes_for_user()` hands out locked
+copies of premium themes instead of setting attributes on shared objects.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+
+from .versioning import theme_generation
+
+
+@dataclass(frozen=True)
+class ThemeView:
+    slug: str
+    name: str
+    description: str
+    background: str
+    accent_color: str
+    text_color: str
+    is_premium: bool
+    updated_at: datetime
+    locked: bool = False
+
+
+_FIELDS = ('slug', 'name', 'description', 'background', 'accent_color', 'text_color', 'is_premium', 'updated_at')
+
+# (generation, loaded at, {slug: ThemeView}) — replaced as a whole, never mutated.
+_loaded = (None, 0.0, {})
+
+
+def active_themes() -> dict:
+    """`{slug: ThemeView}` for every active theme, in picker order."""
+    global _loaded
+    generation = theme_generation()
+    loaded_generation, loaded_at, themes = _loaded
+    now = time.monotonic()
+    if loaded_generation != generation or now - loaded_at > getattr(settings, 'THEME_REGISTRY_SECONDS', 300):
+        from .models import CardTheme
+
+        themes = {
+            row['slug']: ThemeView(**row)
+            for row in CardTheme.objects.filter(is_active=True).values(*_FIELDS)
+        }
+        _loaded = (generation, now, themes)
+    return themes
+
+
+def get_theme(slug):
+    """The active theme called `slug`, or None."""
+    return active_themes().get(slug) if slug else None
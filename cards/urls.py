@@ -17,9 +17,14 @@ urlpatterns = [
     path('card/<slug:slug>/edit/', views.edit_card, name='edit_card'),
     path('card/<slug:slug>/request-upgrade/', views.request_upgrade, name='request_upgrade'),
     path('card/<slug:slug>/vcard/', views.download_vcard, name='download_vcard'),
+    path('vcards/', views.download_my_vcards, name='download_my_vcards'),
     path('card/<slug:slug>/physical/', views.physical_card, name='physical_card'),
     path('card/<slug:slug>/lead/', views.submit_lead, name='submit_lead'),
     path('card/<slug:slug>/analytics/', views.card_analytics, name='card_analytics'),
+    path('card/<slug:slug>/history/', views.card_history, name='card_history'),
+    path('sw.js', views.service_worker, name='service_worker'),
+    path('offline/', views.offline, name='offline'),
+    path('media/r/<int:width>x<int:height>/<path:path>', views.resized_media, name='resized_media'),
     path('card/<slug:slug>/reactivate/', views.reactivate_card, name='reactivate_card'),
     path('inbox/', views.user_inbox, name='user_inbox'),
     path('inbox/<int:notification_id>/read/', views.mark_notification_read, name='mark_notification_read'),
@@ -50,8 +55,12 @@ urlpatterns = [
     path('my-admin/card/<slug:slug>/edit/', views.admin_edit_card, name='admin_edit_card'),
     path('my-admin/card/<slug:slug>/toggle-status/', views.admin_toggle_card_status, name='admin_toggle_card_status'),
     path('my-admin/card/<slug:slug>/delete/', views.delete_card_admin, name='delete_card_admin'),
+    path('my-admin/user/<int:user_id>/cards/', views.admin_user_cards, name='admin_user_cards'),
     path('my-admin/user/<int:user_id>/card-limit/', views.admin_set_card_limit, name='admin_set_card_limit'),
     path('my-admin/lifecycle/', views.admin_lifecycle, name='admin_lifecycle'),
+    path('my-admin/vcards/', views.admin_bulk_vcards, name='admin_bulk_vcards'),
+    path('my-admin/print-sheets/', views.admin_print_sheets, name='admin_print_sheets'),
+    path('my-admin/provision/', views.admin_provision_cards, name='admin_provision_cards'),
     path('my-admin/card/<slug:slug>/lifecycle/<str:action>/', views.admin_lifecycle_action, name='admin_lifecycle_action'),
     path('my-admin/user/<int:user_id>/delete/', views.delete_user_admin, name='delete_user_admin'),
     path('my-admin/messages/<int:request_id>/<str:action>/', views.admin_handle_upgrade, name='admin_handle_upgrade'),
@@ -0,0 +1,133 @@
+""".vcf rendering for cards.
+
+A card's vCard only changes when the card does, so the rendered text is
+cached under the card's `updated_at` (every save bumps it, including
+avatar/logo changes). The optional PHOTO is a small base64 JPEG
+thumbnail of the avatar (or, failing that, the logo), so it is encoded
+once per card version rather than on every download.
+
+`stream_vcards()` yields one contact at a time from a queryset iterator,
+for the bulk "download all" endpoints.
+"""
+
+import base64
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .images import jpeg_thumbnail
+
+logger = logging.getLogger(__name__)
+
+VCARD_CACHE_KEY = 'cards:vcard:v1:{card_id}:{version}:{photo}'
+VCARD_PHOTO_SIZE = 128
+VCARD_CHUNK_SIZE = 200
+# Fields `vcard_text()` reads, for `.only()` on bulk querysets.
+VCARD_FIELDS = ('id', 'slug', 'updated_at', 'card_data', 'avatar', 'logo')
+
+_LINE_OCTETS = 75
+
+
+def _cache_ttl() -> int:
+    return getattr(settings, 'VCARD_CACHE_SECONDS', 60 * 60 * 24)
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace('\\', '\\\\')
+        .replace('\r\n', '\n')
+        .replace('\n', '\\n')
+        .replace(',', '\\,')
+        .replace(';', '\\;')
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 2425), never inside a UTF-8 sequence."""
+    if len(line.encode('utf-8')) <= _LINE_OCTETS:
+        return line
+    parts, current, size = [], [], 0
+    for ch in line:
+        width = len(ch.encode('utf-8'))
+        # Continuation lines start with a space, which counts toward the limit.
+        limit = _LINE_OCTETS if not parts else _LINE_OCTETS - 1
+        if size + width > limit:
+            parts.append(''.join(current))
+            current, size = [], 0
+        current.append(ch)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n '.join(parts)
+
+
+def _photo(card) -> str:
+    for field in ('avatar', 'logo'):
+        file = getattr(card, field)
+        if not file:
+            continue
+        try:
+            data = jpeg_thumbnail(file.name, storage=file.storage, size=VCARD_PHOTO_SIZE)
+        except Exception as exc:
+            logger.warning("Skipping vCard photo for card %s: %s", card.pk, exc)
+            continue
+        return base64.b64encode(data).decode('ascii')
+    return ''
+
+
+def build_vcard(card, photo: bool = True) -> str:
+    d = card.card_data or {}
+
+    first = (d.get('firstName') or '').strip()
+    last = (d.get('lastName') or '').strip()
+    company = (d.get('company') or '').strip()
+    title = (d.get('jobTitle') or '').strip()
+    email = (d.get('email') or '').strip()
+    website = (d.get('website') or '').strip()
+    phone = (d.get('phone') or '').strip()
+    address = (d.get('address') or '').strip()
+    notes = (d.get('notes') or '').strip()
+
+    lines = ['BEGIN:VCARD', 'VERSION:3.0']
+    if first or last:
+        lines.append(f'N:{_escape(last)};{_escape(first)};;;')
+        lines.append(f'FN:{_escape((first + " " + last).strip())}')
+    if company: lines.append(f'ORG:{_escape(company)}')
+    if title:   lines.append(f'TITLE:{_escape(title)}')
+    if phone:
+        tel = phone if phone.startswith('+') else f'+{phone}'
+        lines.append(f'TEL;TYPE=CELL:{tel}')
+    if email:   lines.append(f'EMAIL;TYPE=INTERNET:{_escape(email)}')
+    if website: lines.append(f'URL:{website}')
+    if address: lines.append(f'ADR:;;{_escape(address)};;;;')
+    if notes:   lines.append(f'NOTE:{_escape(notes)}')
+    if photo:
+        encoded = _photo(card)
+        if encoded:
+            lines.append(f'PHOTO;ENCODING=b;TYPE=JPEG:{encoded}')
+    lines.append('END:VCARD')
+    return ''.join(_fold(line) + '\r\n' for line in lines)
+
+
+def vcard_text(card, photo: bool = True) -> str:
+    """The card's vCard, built once per card version and then served from cache."""
+    version = card.updated_at.isoformat() if card.updated_at else ''
+    key = VCARD_CACHE_KEY.format(card_id=card.pk, version=version, photo=int(photo))
+    text = cache.get(key)
+    if text is None:
+        text = build_vcard(card, photo=photo)
+        cache.set(key, text, _cache_ttl())
+    return text
+
+
+def vcard_filename(card) -> str:
+    d = card.card_data or {}
+    first = (d.get('firstName') or '').strip()
+    last = (d.get('lastName') or '').strip()
+    return f'{(first or "contact")}-{(last or "card")}.vcf'.replace(' ', '_')
+
+
+def stream_vcards(cards, photo: bool = True):
+    """Yield one vCard per card without materialising the queryset."""
+    for card in cards.only(*VCARD_FIELDS).order_by('id').iterator(chunk_size=VCARD_CHUNK_SIZE):
+        yield vcard_text(card, photo=photo)
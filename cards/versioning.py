@@ -0,0 +1,234 @@
+"""Version stamps for the public card endpoints.
+
+`view_card`, `physical_card` and `download_vcard` answer conditional GETs
+(`If-None-Match` / `If-Modified-Since`) with a 304 before loading the
+card or rendering anything. To make that cheap, the few facts an ETag is
+built from are kept in a small per-slug snapshot in the cache:
+
+  - the card's id, owner, `is_active` and `updated_at`
+  - its theme slug and that theme's `updated_at`
+  - the profile view count at the time the snapshot was taken
+
+A cache hit costs no queries. The snapshot is dropped whenever the card
+is saved or deleted, and every snapshot goes stale at once when any
+CardTheme changes (the theme generation is part of the key). The view
+count is deliberately a snapshot: it refreshes with the TTL rather than
+on every view, so repeat visitors keep getting 304s in between.
+
+With the default per-process LocMemCache, an edit made through another
+worker is picked up within `CARD_STATE_CACHE_SECONDS`; configure a shared
+cache (`REDIS_URL`) to make invalidation immediate everywhere.
+
+The landing page's demo-card context is cached the same way: keyed on
+the theme generation and dropped when the card on show is saved.
+"""
+
+import hashlib
+import os
+import time
+from datetime import timezone as dt_timezone
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+CARD_STATE_CACHE_KEY = 'cards:card-state:v1:{generation}:{slug}'
+THEME_GENERATION_CACHE_KEY = 'cards:theme-generation:v1'
+OFFER_GENERATION_CACHE_KEY = 'cards:offer-generation:v1'
+LANDING_DEMO_CACHE_KEY = 'cards:landing-demo:v1:{generation}'
+
+
+def _state_ttl() -> int:
+    return getattr(settings, 'CARD_STATE_CACHE_SECONDS', 30)
+
+
+def _landing_demo_ttl() -> int:
+    return getattr(settings, 'LANDING_DEMO_CACHE_SECONDS', 60 * 10)
+
+
+# ==========================================================================
+# Deploy, theme + offer versions
+# ==========================================================================
+
+@lru_cache(maxsize=1)
+def deploy_version() -> str:
+    """Identifies the templates/static code currently deployed.
+
+    `RELEASE_VERSION` (e.g. the git sha) when the deploy sets it; otherwise
+    the newest mtime under the app's templates and static directories,
+    which is the same for every worker running the same checkout.
+    """
+    release = getattr(settings, 'RELEASE_VERSION', '')
+    if release:
+        return str(release)
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    newest = 0.0
+    for sub in ('templates', 'static'):
+        for dirpath, _dirnames, filenames in os.walk(os.path.join(app_dir, sub)):
+            for filename in filenames:
+                try:
+                    newest = max(newest, os.path.getmtime(os.path.join(dirpath, filename)))
+                except OSError:
+                    continue
+    return str(int(newest))
+
+
+def _fresh_generation() -> int:
+    # Counters start from the clock rather than 1, so one that restarts
+    # after an eviction or a cache clear never reuses a value that
+    # fragments or the theme registry were stored under.
+    return time.time_ns() // 1000
+
+
+def _generation(key: str) -> int:
+    generation = cache.get(key)
+    if generation is None:
+        generation = _fresh_generation()
+        cache.add(key, generation, None)
+        generation = cache.get(key, generation)
+    return generation
+
+
+def _bump_generation(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_generation(), None)
+
+
+def theme_generation() -> int:
+    return _generation(THEME_GENERATION_CACHE_KEY)
+
+
+def bump_theme_generation() -> None:
+    """Called on every CardTheme save/delete."""
+    _bump_generation(THEME_GENERATION_CACHE_KEY)
+
+
+def offer_generation() -> int:
+    return _generation(OFFER_GENERATION_CACHE_KEY)
+
+
+def bump_offer_generation() -> None:
+    """Called on every Offer save/delete."""
+    _bump_generation(OFFER_GENERATION_CACHE_KEY)
+
+
+def fragment_version() -> str:
+    """Version for `{% cache %}` fragment keys: deploy, theme and offer generations.
+
+    Any of the three changing moves every fragment to a fresh key; the old
+    entries are never read again and age out with the fragment TTL.
+    """
+    return f'{deploy_version()}.{theme_generation()}.{offer_generation()}'
+
+
+# ==========================================================================
+# Per-card snapshot
+# ==========================================================================
+
+def _state_key(slug: str) -> str:
+    digest = hashlib.md5(slug.encode()).hexdigest()
+    return CARD_STATE_CACHE_KEY.format(generation=theme_generation(), slug=digest)
+
+
+def _timestamp(value) -> int:
+    return int(value.astimezone(dt_timezone.utc).timestamp()) if value else 0
+
+
+def compute_card_state(slug: str):
+    from .models import Card, CardInteraction
+    from .themes import get_theme
+
+    row = (
+        Card.objects.filter(slug=slug)
+        .values('id', 'user_id', 'is_active', 'updated_at', 'card_data__theme_slug')
+        .first()
+    )
+    if row is None:
+        return None
+    theme_slug = row['card_data__theme_slug'] or ''
+    theme = get_theme(theme_slug)
+    theme_updated = theme.updated_at if theme else None
+    return {
+        'id': row['id'],
+        'user_id': row['user_id'],
+        'is_active': row['is_active'],
+        'version': row['updated_at'].isoformat() if row['updated_at'] else '',
+        'updated': _timestamp(row['updated_at']),
+        'theme': f'{theme_slug}@{theme_updated.isoformat()}' if theme_updated else '',
+        'theme_updated': _timestamp(theme_updated),
+        'views': CardInteraction.objects.filter(
+            card_id=row['id'], kind=CardInteraction.KIND_VIEW,
+        ).count(),
+    }
+
+
+def card_state(slug: str):
+    """Cached version snapshot for `slug`, or None if no such card."""
+    key = _state_key(slug)
+    state = cache.get(key)
+    if state is None:
+        state = compute_card_state(slug)
+        if state is None:
+            return None
+        cache.set(key, state, _state_ttl())
+    return state
+
+
+def invalidate_card_state(slug: str) -> None:
+    if slug:
+        cache.delete(_state_key(slug))
+
+
+def card_etag(state: dict, *parts, weak: bool = True) -> str:
+    """ETag over the card snapshot plus whatever else the response varies on."""
+    raw = '|'.join(str(part) for part in (state['id'], state['version'], *parts))
+    digest = hashlib.sha1(raw.encode()).hexdigest()[:20]
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def card_last_modified(state: dict, *, theme: bool = True, deploy: bool = True) -> int:
+    stamps = [state['updated']]
+    if theme:
+        stamps.append(state['theme_updated'])
+    if deploy and deploy_version().isdigit():
+        stamps.append(int(deploy_version()))
+    return max(stamps)
+
+
+# ==========================================================================
+# Landing demo card
+# ==========================================================================
+
+def _landing_demo_key() -> str:
+    return LANDING_DEMO_CACHE_KEY.format(generation=theme_generation())
+
+
+def landing_demo_context(build) -> dict:
+    """The landing page's demo-card context, cached; `build()` computes it on a miss.
+
+    Keyed on the theme generation, so a CardTheme save shows up at once;
+    Card.save/delete drop it through `invalidate_landing_demo()`.
+    """
+    key = _landing_demo_key()
+    context = cache.get(key)
+    if context is None:
+        context = build()
+        cache.set(key, context, _landing_demo_ttl())
+    return context
+
+
+def invalidate_landing_demo(slug: str) -> None:
+    """Drop the cached demo context if a save of `slug` could change it.
+
+    That is the card on show, the configured demo slug (it may have just
+    been created or activated) and, while no card is shown, any card.
+    """
+    key = _landing_demo_key()
+    context = cache.get(key)
+    if context is None:
+        return
+    shown = context.get('demo_card')
+    if shown is None or slug in (shown.slug, getattr(settings, 'LANDING_DEMO_CARD_SLUG', 'shiplu07')):
+        cache.delete(key)
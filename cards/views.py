@@ -1,6 +1,9 @@
 import csv
+import hashlib
 import json
 import logging
+import mimetypes
+import posixpath
 import re
 import zipfile
 import random
@@ -14,7 +17,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db import transaction
-from django.db.models import Count, Prefetch, Q
+from django.db.models import Count, Prefetch, Q, Subquery, Sum
 from django.http import Http404
 from .forms import (
     UserForm,
@@ -27,6 +30,29 @@ from .forms import (
     AdminCardLimitForm,
     FeedbackForm,
 )
+from .changelog import build_card_change_entries, expand_logs, recent_logs_prefetch, record_card_change
+from .hll import day_window, record_visitor, unique_visitors
+from .images import note_resized, render_resized, resize_cache_path
+from .metrics import (
+    invalidate_lead_histogram,
+    invalidate_platform_metrics,
+    lead_histogram,
+    platform_metrics,
+)
+from .pagination import keyset_page
+from .service_worker import CDN_HOSTS, precache_urls, shell_version
+from .storage import card_media_refs, release_media
+from .themes import active_themes, get_theme
+from .vcard import stream_vcards, vcard_filename, vcard_text
+from .versioning import (
+    card_etag,
+    card_last_modified,
+    card_state,
+    deploy_version,
+    invalidate_card_state,
+    landing_demo_context,
+)
+from .visitors import first_view, remember_visitor, visitor_key
 from .permissions import (
     is_premium,
     premium_required,
@@ -44,12 +70,12 @@ from .models import (
     SubscriptionPlan,
     Subscription,
     Feedback,
-    CardChangeLog,
     CardInteraction,
     LeadCapture,
-    CardTheme,
     Payment,
+    PaymentSearchToken,
     Offer,
+    normalize_payment_search_query,
 )
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import AuthenticationForm, SetPasswordForm
@@ -58,13 +84,14 @@ from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 from django.urls import reverse
-import markdown
 import os
 from django.contrib import messages
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.contrib.auth.hashers import make_password, check_password
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 from django.views.decorators.csrf import csrf_exempt
 
 from datetime import timedelta
@@ -110,89 +137,6 @@ CARD_VARIANT_CONFIG = {
 }
 
 
-def _build_card_field_labels():
-    excluded = {'avatar', 'logo', 'whatsapp_country', 'whatsapp_number', 'phone_country', 'phone_number'}
-    labels: dict[str, str] = {}
-    for form_cls in (CardForm, BusinessCardForm):
-        for name, field in form_cls.base_fields.items():
-            if name in excluded:
-                continue
-            label = field.label or name.replace('_', ' ').title()
-            labels[name] = label
-
-    # Manual overrides for fields that have special casing or hidden widgets
-    overrides = {
-        'firstName': 'First name',
-        'lastName': 'Last name',
-        'jobTitle': 'Job title',
-        'logo_name': 'Logo / company name',
-        'phone': 'Phone number',
-        'whatsapp': 'WhatsApp link',
-        'background_style': 'Background style',
-    }
-    labels.update(overrides)
-    return labels
-
-
-CARD_FIELD_LABELS = _build_card_field_labels()
-CARD_TRACKED_CARD_KEYS = set(CARD_FIELD_LABELS.keys())
-
-
-def _normalize_change_value(value):
-    if value is None:
-        return ''
-    if isinstance(value, str):
-        cleaned = value.strip()
-        return cleaned[:180] + '…' if len(cleaned) > 181 else cleaned
-    return str(value)
-
-
-def _build_card_change_entries(old_data: dict, new_data: dict):
-    if not isinstance(old_data, dict):
-        old_data = {}
-    if not isinstance(new_data, dict):
-        new_data = {}
-
-    entries = []
-    for key in CARD_TRACKED_CARD_KEYS:
-        before = _normalize_change_value(old_data.get(key))
-        after = _normalize_change_value(new_data.get(key))
-        if before == after:
-            continue
-        if not before and not after:
-            continue
-        entries.append({
-            'field': key,
-            'label': CARD_FIELD_LABELS.get(key, key.replace('_', ' ').title()),
-            'before': before,
-            'after': after,
-        })
-    return entries
-
-
-def _summarize_change_entries(entries):
-    if not entries:
-        return ''
-    labels = [entry['label'] for entry in entries]
-    if len(labels) == 1:
-        return f"Updated {labels[0]}"
-    if len(labels) == 2:
-        return f"Updated {labels[0]} and {labels[1]}"
-    return f"Updated {', '.join(labels[:-1])}, and {labels[-1]}"
-
-
-def _record_card_change(card: Card, user: User, entries: list[dict]):
-    if not entries:
-        return
-    summary = _summarize_change_entries(entries)
-    CardChangeLog.objects.create(
-        card=card,
-        user=user if user.is_authenticated else None,
-        summary=summary,
-        changes=entries,
-    )
-
-
 def _normalize_whatsapp_link(value: str) -> str:
     if not value:
         return ''
@@ -247,12 +191,17 @@ def _landing_demo_card_context(request):
     """Load a real card to show as a live preview on the landing page.
 
     Slug is configurable via `LANDING_DEMO_CARD_SLUG`; falls back to the first
-    active card so local dev works even without the demo user seeded.
+    active card so local dev works even without the demo user seeded. The
+    whole context is cached (see `versioning.landing_demo_context`).
     """
+    return landing_demo_context(_build_landing_demo_card_context)
+
+
+def _build_landing_demo_card_context():
     demo_slug = getattr(settings, 'LANDING_DEMO_CARD_SLUG', 'shiplu07')
     card = (
-        Card.objects.filter(slug=demo_slug, is_active=True).select_related('user').first()
-        or Card.objects.filter(is_active=True).select_related('user').order_by('id').first()
+        Card.objects.filter(slug=demo_slug, is_active=True).first()
+        or Card.objects.filter(is_active=True).order_by('id').first()
     )
     if not card:
         return {}
@@ -271,10 +220,7 @@ def _landing_demo_card_context(request):
         if len(top_socials) == 5:
             break
 
-    theme = None
-    theme_slug = data.get('theme_slug')
-    if theme_slug:
-        theme = CardTheme.objects.filter(slug=theme_slug, is_active=True).first()
+    theme = get_theme(data.get('theme_slug'))
 
     public_slug = getattr(settings, 'LANDING_DEMO_PUBLIC_SLUG', 'shiplu07')
     public_base = getattr(settings, 'LANDING_DEMO_PUBLIC_BASE', 'https://mycard.dupno.com')
@@ -389,17 +335,21 @@ def logout_view(request):
     logout(request)
     return redirect('login')
 
+DASHBOARD_RECENT_LOGS = 3
+CARD_HISTORY_PAGE_SIZE = 25
+
+
 @login_required
 def dashboard(request):
     # Admins never see the customer dashboard — bounce them to the
     # admin control surface regardless of how they landed here.
     if request.user.is_superuser or request.user.is_staff:
         return redirect('admin_dashboard')
-    change_log_qs = CardChangeLog.objects.order_by('-created_at')
     cards_qs = (
         Card.objects.filter(user=request.user)
         .order_by('-updated_at', '-created_at')
-        .prefetch_related(Prefetch('change_logs', queryset=change_log_qs, to_attr='recent_logs'))
+        .annotate(change_log_count=Count('change_logs'))
+        .prefetch_related(recent_logs_prefetch(DASHBOARD_RECENT_LOGS))
     )
     cards = list(cards_qs)
     for card in cards:
@@ -421,7 +371,7 @@ def dashboard(request):
     interactions_qs = CardInteraction.objects.filter(card__user=request.user)
     total_views = interactions_qs.filter(kind=CardInteraction.KIND_VIEW).count()
     total_saves = interactions_qs.filter(kind=CardInteraction.KIND_SAVE).count()
-    new_leads = LeadCapture.objects.filter(card__user=request.user, status=LeadCapture.STATUS_NEW).count()
+    new_leads = lead_histogram(request.user.id).get(LeadCapture.STATUS_NEW, 0)
 
     context = {
         'cards': cards,
@@ -618,7 +568,7 @@ def _handle_anonymous_onboard(request, card_type: str):
         'card_limit': DEFAULT_CARD_LIMIT,
         'cards_remaining': DEFAULT_CARD_LIMIT,
         'builder_variant': variant,
-        'themes': themes_for_user(list(CardTheme.objects.filter(is_active=True)), None),
+        'themes': themes_for_user(active_themes().values(), None),
         'feature_ai': settings.FEATURE_AI,
     }
     return render(request, 'cards/create_card.html', context)
@@ -675,7 +625,7 @@ def _handle_card_creation(request, card_type: str):
         'card_limit': card_limit,
         'cards_remaining': remaining_cards,
         'builder_variant': variant,
-        'themes': themes_for_user(list(CardTheme.objects.filter(is_active=True)), request.user),
+        'themes': themes_for_user(active_themes().values(), request.user),
         'feature_ai': settings.FEATURE_AI,
     }
     return render(request, 'cards/create_card.html', context)
@@ -717,6 +667,7 @@ def edit_card(request, slug):
             previous_card_data = _card_initial_data(card)
             previous_avatar = card.avatar.name if card.avatar else ''
             previous_logo = card.logo.name if card.logo else ''
+            previous_media = card_media_refs([card])
 
             _apply_card_form_updates(card, form)
             theme_slug = _sanitize_theme_slug(request.user, (request.POST.get('theme_slug') or '').strip()[:60])
@@ -725,7 +676,7 @@ def edit_card(request, slug):
             saved_card = form.save()  # This re-triggers the model's save method, updating QR code etc.
 
             current_card_data = saved_card.card_data if isinstance(saved_card.card_data, dict) else {}
-            change_entries = _build_card_change_entries(previous_card_data, current_card_data)
+            change_entries = build_card_change_entries(previous_card_data, current_card_data)
 
             if 'avatar' in form.changed_data:
                 change_entries.append({
@@ -742,7 +693,9 @@ def edit_card(request, slug):
                     'after': saved_card.logo.name if saved_card.logo else 'Removed',
                 })
 
-            _record_card_change(saved_card, request.user, change_entries)
+            record_card_change(saved_card, request.user, change_entries)
+            if {'avatar', 'logo'} & set(form.changed_data):
+                release_media(previous_media)
 
             return redirect(card.get_absolute_url())
     else:
@@ -756,7 +709,7 @@ def edit_card(request, slug):
         'card_limit': card_limit,
         'cards_remaining': remaining_cards,
         'builder_variant': builder_variant,
-        'themes': themes_for_user(list(CardTheme.objects.filter(is_active=True)), request.user),
+        'themes': themes_for_user(active_themes().values(), request.user),
         'feature_ai': settings.FEATURE_AI,
         'slug_error': slug_error,
     }
@@ -780,7 +733,7 @@ def _sanitize_theme_slug(user, theme_slug: str) -> str:
     already renders a locked badge, so we don't need a flash message."""
     if not theme_slug:
         return ''
-    theme = CardTheme.objects.filter(slug=theme_slug, is_active=True).first()
+    theme = get_theme(theme_slug)
     if not theme:
         return ''
     if theme.is_premium and not is_premium(user):
@@ -826,12 +779,13 @@ def admin_edit_card(request, slug):
             previous_card_data = _card_initial_data(card)
             previous_avatar = card.avatar.name if card.avatar else ''
             previous_logo = card.logo.name if card.logo else ''
+            previous_media = card_media_refs([card])
 
             _apply_card_form_updates(card, form)
             saved_card = form.save()
 
             current_card_data = saved_card.card_data if isinstance(saved_card.card_data, dict) else {}
-            change_entries = _build_card_change_entries(previous_card_data, current_card_data)
+            change_entries = build_card_change_entries(previous_card_data, current_card_data)
 
             if 'avatar' in form.changed_data:
                 change_entries.append({
@@ -848,7 +802,9 @@ def admin_edit_card(request, slug):
                     'after': saved_card.logo.name if saved_card.logo else 'Removed',
                 })
 
-            _record_card_change(saved_card, request.user, change_entries)
+            record_card_change(saved_card, request.user, change_entries)
+            if {'avatar', 'logo'} & set(form.changed_data):
+                release_media(previous_media)
             return redirect('admin_dashboard')
     else:
         initial_data = _card_initial_data(card)
@@ -865,7 +821,85 @@ def admin_edit_card(request, slug):
         }
     )
 
+# ==========================================================================
+# Conditional GET for the public card endpoints
+# ==========================================================================
+
+def _viewer_key(request):
+    """What a card page varies on besides the card: who is looking, and in which language.
+
+    The CSRF token embedded in the page is left out on purpose: a cached
+    copy stays valid while the browser keeps the matching cookie, and the
+    cookie only rotates on login/logout, which changes the user part.
+    """
+    user = request.user
+    return (user.pk if user.is_authenticated else 0, getattr(request, 'LANGUAGE_CODE', ''))
+
+
+def _has_pending_messages(request):
+    # A flashed message must be rendered, so never short-circuit with a 304.
+    from django.contrib.messages.storage.cookie import CookieStorage
+    return CookieStorage.cookie_name in request.COOKIES
+
+
+def _apply_validators(response, etag, last_modified):
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    # Per-viewer content that must be revalidated before every reuse.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _not_modified(request, etag, last_modified):
+    """304 (or 412) when the client's copy is current, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        _apply_validators(response, etag, last_modified)
+    return response
+
+
+def _track_card_view(request, card_id, slug, owner_id):
+    """Record one VIEW per visitor per card; owners and admins are never counted.
+
+    De-duplicated through the signed visitor cookie (see visitors.py), so an
+    anonymous scan never creates a session.
+    """
+    user = request.user
+    if user.is_authenticated and (user.pk == owner_id or user.is_superuser):
+        return
+    if not first_view(request, card_id):
+        return
+    visitor = visitor_key(request)[:64]
+    try:
+        CardInteraction.objects.create(
+            card_id=card_id,
+            kind=CardInteraction.KIND_VIEW,
+            session_id=visitor,
+            referrer=request.META.get('HTTP_REFERER', '')[:255],
+            user_agent=request.META.get('HTTP_USER_AGENT', '')[:255],
+        )
+        record_visitor(card_id, visitor)
+    except Exception as exc:
+        logger.warning("Skipping view tracking for card %s: %s", slug, exc)
+
+
 def view_card(request, slug):
+    # Repeat visitors and link-preview crawlers revalidate with the ETag
+    # from the cached snapshot; a match is answered before the card is
+    # loaded. The view still counts for a session that hasn't seen it.
+    state = card_state(slug)
+    validators = None
+    if state and state['is_active'] and not _has_pending_messages(request):
+        validators = (
+            card_etag(state, state['theme'], state['views'], deploy_version(), *_viewer_key(request)),
+            card_last_modified(state),
+        )
+        not_modified = _not_modified(request, *validators)
+        if not_modified is not None:
+            if not_modified.status_code == 304:
+                _track_card_view(request, state['id'], slug, state['user_id'])
+            return remember_visitor(request, not_modified)
+
     card = get_object_or_404(Card, slug=slug)
     is_owner = request.user.is_authenticated and request.user == card.user
     is_admin = request.user.is_authenticated and request.user.is_superuser
@@ -893,23 +927,15 @@ def view_card(request, slug):
         return render(request, 'cards/card_inactive_public.html', {'card': card}, status=200)
 
     # Track view interaction (once per session per card) and count total views
-    if card.is_active and not is_owner and not is_admin:
-        visited_cards = request.session.get('visited_cards', [])
-        if card.slug not in visited_cards:
-            visited_cards.append(card.slug)
-            request.session['visited_cards'] = visited_cards
-            try:
-                CardInteraction.objects.create(
-                    card=card,
-                    kind=CardInteraction.KIND_VIEW,
-                    session_id=(request.session.session_key or '')[:64],
-                    referrer=request.META.get('HTTP_REFERER', '')[:255],
-                    user_agent=request.META.get('HTTP_USER_AGENT', '')[:255],
-                )
-            except Exception as exc:
-                logger.warning("Skipping view tracking for card %s: %s", card.slug, exc)
+    if card.is_active:
+        _track_card_view(request, card.pk, card.slug, card.user_id)
 
-    profile_views = card.interactions.filter(kind=CardInteraction.KIND_VIEW).count()
+    if validators and card.is_active:
+        # Render the same count the ETag was built from.
+        profile_views = state['views']
+    else:
+        validators = None
+        profile_views = card.interactions.filter(kind=CardInteraction.KIND_VIEW).count()
 
     # The QR code URL is now generated in the model, but we pass it for consistency
     # Note: The model-generated QR already has ?qr=1.
@@ -920,10 +946,7 @@ def view_card(request, slug):
     phone_tel = f"+{phone_digits}" if phone_digits else ''
 
     # Resolve theme (if any) so the template can paint accent + text colors
-    theme = None
-    theme_slug = (card.card_data or {}).get('theme_slug')
-    if theme_slug:
-        theme = CardTheme.objects.filter(slug=theme_slug, is_active=True).first()
+    theme = get_theme((card.card_data or {}).get('theme_slug'))
 
     context = {
         'card': card,
@@ -940,7 +963,10 @@ def view_card(request, slug):
         'business_highlight': _resolve_business_highlight(card, phone_display, phone_tel),
         'theme': theme,
     }
-    return render(request, 'cards/view_card.html', context)
+    response = render(request, 'cards/view_card.html', context)
+    if validators:
+        _apply_validators(response, *validators)
+    return remember_visitor(request, response)
 
 def admin_login_view(request):
     if request.method == 'POST':
@@ -956,27 +982,56 @@ def admin_login_view(request):
         form = AuthenticationForm(request)
     return render(request, 'cards/admin_login.html', {'form': form})
 
+# Users per admin-dashboard page, and how many of each user's cards are
+# rendered inline before the rest is lazy-loaded on demand.
+ADMIN_USERS_PAGE_SIZE = 50
+ADMIN_INLINE_CARDS = 3
+
+
 @user_passes_test(lambda u: u.is_superuser, login_url='/my-admin/login/')
 def admin_dashboard(request):
-    users = (
+    user_query = (request.GET.get('q') or '').strip()
+    users_qs = (
         User.objects.select_related('profile')
         .annotate(
             card_count=Count('card'),
             personal_count=Count('card', filter=Q(card__card_type=Card.TYPE_PERSONAL)),
             business_count=Count('card', filter=Q(card__card_type=Card.TYPE_BUSINESS)),
         )
-        .order_by('-date_joined')
+        # One windowed query loads the first few cards of every user on
+        # the page; the remainder is fetched by `admin_user_cards`.
+        .prefetch_related(Prefetch(
+            'card_set',
+            queryset=(
+                Card.objects.order_by('created_at')
+                .only('id', 'user_id', 'slug', 'card_type', 'is_active', 'avatar', 'created_at')
+                [:ADMIN_INLINE_CARDS]
+            ),
+            to_attr='admin_inline_cards',
+        ))
+    )
+    if user_query:
+        users_qs = users_qs.filter(
+            Q(username__icontains=user_query)
+            | Q(email__icontains=user_query)
+            | Q(first_name__icontains=user_query)
+            | Q(last_name__icontains=user_query)
+            | Q(profile__phone_number__icontains=user_query)
+        )
+    users_page = keyset_page(
+        users_qs,
+        request.GET.get('cursor') or '',
+        order_field='date_joined',
+        page_size=ADMIN_USERS_PAGE_SIZE,
     )
-    cards = Card.objects.select_related('user', 'user__profile').order_by('-created_at')
+
     feedback_entries = list(Feedback.objects.all()[:8])
-    feedback_total = Feedback.objects.count()
 
     user_records = []
-    for user in users:
+    for user in users_page.items:
         profile = getattr(user, 'profile', None)
         card_limit = getattr(profile, 'card_limit', DEFAULT_CARD_LIMIT)
-        card_limit_form = AdminCardLimitForm(initial={'card_limit': card_limit}, auto_id=f'id_user_{user.id}_%s')
-        user_cards = list(user.card_set.order_by('created_at'))
+        user_cards = user.admin_inline_cards
         primary_card_slug = user_cards[0].slug if user_cards else None
         user_records.append({
             'instance': user,
@@ -991,29 +1046,18 @@ def admin_dashboard(request):
             'card_count': user.card_count,
             'personal_count': user.personal_count,
             'business_count': user.business_count,
-            'card_limit_form': card_limit_form,
             'primary_card_slug': primary_card_slug,
             'cards': user_cards,
-            'has_live_card':    any(c.is_active for c in user_cards),
-            'has_offline_card': any(not c.is_active for c in user_cards),
+            'hidden_card_count': max(user.card_count - len(user_cards), 0),
         })
 
-    pending_requests = UpgradeRequest.objects.filter(status=UpgradeRequest.STATUS_PENDING)
-
-    # ---- Platform metrics (Sprint 3-era CardInteraction rollup) ----
-    now = timezone.now()
-    week_ago = now - timedelta(days=7)
-    total_views = CardInteraction.objects.filter(kind=CardInteraction.KIND_VIEW).count()
-    total_leads = LeadCapture.objects.count()
-    new_leads = LeadCapture.objects.filter(status=LeadCapture.STATUS_NEW).count()
-    users_this_week = User.objects.filter(date_joined__gte=week_ago).count()
-    cards_this_week = Card.objects.filter(created_at__gte=week_ago).count()
-    personal_cards = cards.filter(card_type=Card.TYPE_PERSONAL).count()
-    business_cards = cards.filter(card_type=Card.TYPE_BUSINESS).count()
+    # ---- Platform metrics (cached conditional aggregates) ----
+    metrics = platform_metrics()
 
     # ---- Top performing cards (by views) ----
     top_cards_qs = (
-        cards.annotate(view_count=Count('interactions', filter=Q(interactions__kind=CardInteraction.KIND_VIEW)))
+        Card.objects.select_related('user')
+        .annotate(view_count=Count('interactions', filter=Q(interactions__kind=CardInteraction.KIND_VIEW)))
         .order_by('-view_count')[:6]
     )
 
@@ -1024,26 +1068,43 @@ def admin_dashboard(request):
     )
 
     context = {
-        'total_users': len(user_records),
-        'total_cards': cards.count(),
-        'personal_cards': personal_cards,
-        'business_cards': business_cards,
-        'total_views': total_views,
-        'total_leads': total_leads,
-        'new_leads': new_leads,
-        'users_this_week': users_this_week,
-        'cards_this_week': cards_this_week,
-        'all_cards': cards,
+        'total_users': metrics['users']['total'],
+        'total_cards': metrics['cards']['total'],
+        'personal_cards': metrics['cards']['personal'],
+        'business_cards': metrics['cards']['business'],
+        'total_views': metrics['interactions']['views'],
+        'total_leads': metrics['leads']['total'],
+        'new_leads': metrics['leads']['new'],
+        'users_this_week': metrics['users']['this_week'],
+        'cards_this_week': metrics['cards']['this_week'],
         'all_users': user_records,
-        'pending_request_count': pending_requests.count(),
+        'users_next_cursor': users_page.next_cursor,
+        'users_is_first_page': users_page.is_first_page,
+        'user_query': user_query,
+        'card_limit_min': AdminCardLimitForm.base_fields['card_limit'].min_value,
+        'card_limit_max': AdminCardLimitForm.base_fields['card_limit'].max_value,
+        'pending_request_count': metrics['pending_requests'],
         'feedback_entries': feedback_entries,
-        'feedback_count': feedback_total,
+        'feedback_count': metrics['feedback'],
         'top_cards': top_cards_qs,
         'recent_activity': recent_activity,
     }
     return render(request, 'cards/admin_dashboard.html', context)
 
 
+@user_passes_test(lambda u: u.is_superuser, login_url='/my-admin/login/')
+def admin_user_cards(request, user_id):
+    """HTML fragment with every card a user owns — lazy-loaded by the
+    admin dashboard when a row has more cards than it renders inline."""
+    target_user = get_object_or_404(User, pk=user_id)
+    user_cards = (
+        Card.objects.filter(user=target_user)
+        .order_by('created_at')
+        .only('id', 'user_id', 'slug', 'card_type', 'is_active', 'avatar', 'created_at')
+    )
+    return render(request, 'cards/_admin_user_cards.html', {'cards': user_cards})
+
+
 @user_passes_test(lambda u: u.is_superuser, login_url='/my-admin/login/')
 def admin_set_card_limit(request, user_id):
     target_user = get_object_or_404(User, pk=user_id)
@@ -1090,6 +1151,7 @@ def admin_toggle_card_status(request, slug):
                 handled_by=request.user,
                 admin_notes='Approved via quick toggle'
             )
+        invalidate_platform_metrics()
         state = 'active' if card.is_active else 'offline'
         messages.success(request, f'Card “{card.slug}” is now {state}.')
 
@@ -1175,6 +1237,7 @@ def admin_handle_upgrade(request, request_id, action):
     else:
         messages.error(request, 'Unsupported action.')
 
+    invalidate_platform_metrics()
     return redirect('admin_messages')
 
 
@@ -1186,7 +1249,10 @@ def delete_user_admin(request, user_id):
         if target_user == request.user:
             messages.error(request, 'You cannot delete your own admin account while logged in.')
         else:
+            media = card_media_refs(Card.objects.filter(user=target_user).only('avatar', 'logo', 'image_variants'))
             target_user.delete()
+            release_media(media)
+            invalidate_platform_metrics()
             messages.success(request, f'User “{target_user.username}” has been removed.')
 
     return redirect('admin_dashboard')
@@ -1195,7 +1261,11 @@ def delete_user_admin(request, user_id):
 @user_passes_test(lambda u: u.is_superuser)
 def delete_card_admin(request, slug):
     card = get_object_or_404(Card, slug=slug)
+    media = card_media_refs([card])
     card.delete()
+    release_media(media)
+    invalidate_platform_metrics()
+    invalidate_lead_histogram(card.user_id)
     messages.success(request, f'Card “{slug}” was removed from the workspace.')
     return redirect('admin_dashboard')
 
@@ -1248,13 +1318,7 @@ def _apply_card_form_updates(card, form):
 
 
 def _extract_card_form_payload(form):
-    excluded_keys = {'avatar', 'logo', 'whatsapp_country', 'whatsapp_number', 'phone_country', 'phone_number'}
-    payload = {}
-    for key, value in form.cleaned_data.items():
-        if key in excluded_keys:
-            continue
-        payload[key] = value
-    return payload
+    return form.card_data_payload()
 
 
 def _resolve_business_highlight(card: Card, phone_display: str, phone_tel: str):
@@ -1377,43 +1441,155 @@ def _superuser_only(request):
     return request.user.is_authenticated and request.user.is_superuser
 
 
+INTERACTION_EXPORT_HEADERS = ['ID', 'Card Slug', 'Kind', 'Target', 'Country', 'Referrer', 'Created Date']
+LEAD_EXPORT_HEADERS = [
+    'ID', 'Card Slug', 'Name', 'Email', 'Phone', 'Message', 'UTM Source', 'Status',
+    'Created Date', 'Updated Date',
+]
+EXPORT_DELTA_EXTRAS = ('interactions', 'leads')
+
+
+def _format_export_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+def _build_interaction_row(interaction: CardInteraction):
+    return [
+        str(interaction.id),
+        interaction.card.slug,
+        interaction.kind,
+        interaction.target,
+        interaction.country,
+        interaction.referrer,
+        _format_export_datetime(interaction.created_at),
+    ]
+
+
+def _build_lead_row(lead: LeadCapture):
+    return [
+        str(lead.id),
+        lead.card.slug,
+        lead.name,
+        lead.email,
+        lead.phone,
+        lead.message,
+        lead.utm_source,
+        lead.status,
+        _format_export_datetime(lead.created_at),
+        _format_export_datetime(lead.updated_at),
+    ]
+
+
+def _export_window(request):
+    """Resolve the `?since=` / `?include=` export parameters.
+
+    Returns `(since, watermark, extras)`. `since` is None for a full
+    export. The watermark is stamped *before* any rows are read so a
+    row written mid-export shows up again in the next delta rather than
+    being skipped. Raises ValueError on an unparseable timestamp.
+    """
+    from django.utils.dateparse import parse_datetime
+
+    watermark = timezone.now()
+    since = None
+    raw_since = (request.GET.get('since') or '').strip()
+    if raw_since:
+        # A literal '+' in a query string decodes to a space.
+        since = parse_datetime(raw_since.replace(' ', '+'))
+        if since is None:
+            raise ValueError(raw_since)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+    requested = {part.strip() for part in (request.GET.get('include') or '').split(',')}
+    extras = [name for name in EXPORT_DELTA_EXTRAS if name in requested]
+    return since, watermark, extras
+
+
+def _export_querysets(since, extras):
+    """Querysets for one export run, narrowed to rows changed since `since`."""
+    users = User.objects.select_related('profile').order_by('id')
+    cards = Card.objects.select_related('user', 'user__profile').order_by('id')
+    interactions = leads = None
+    if 'interactions' in extras:
+        interactions = CardInteraction.objects.select_related('card').order_by('id')
+    if 'leads' in extras:
+        leads = LeadCapture.objects.select_related('card').order_by('id')
+
+    if since is not None:
+        users = users.filter(date_joined__gte=since)
+        cards = cards.filter(updated_at__gte=since)
+        if interactions is not None:
+            interactions = interactions.filter(created_at__gte=since)
+        if leads is not None:
+            leads = leads.filter(updated_at__gte=since)
+    return users, cards, interactions, leads
+
+
+def _attach_export_watermark(response, since, watermark):
+    response['X-Export-Watermark'] = watermark.isoformat()
+    if since is not None:
+        response['X-Export-Since'] = since.isoformat()
+    return response
+
+
 def export_cards_csv(request):
     if not _superuser_only(request):
         return HttpResponse('Unauthorized', status=401)
 
-    users = list(User.objects.select_related('profile').order_by('id'))
-    cards = list(Card.objects.select_related('user', 'user__profile').order_by('id'))
+    try:
+        since, watermark, extras = _export_window(request)
+    except ValueError:
+        return HttpResponse('Invalid since timestamp', status=400)
+
+    users_qs, cards_qs, interactions_qs, leads_qs = _export_querysets(since, extras)
+    users = list(users_qs)
+    cards = list(cards_qs)
     card_data_keys = _collect_card_data_keys(cards)
     headers = CARD_EXPORT_HEADERS + card_data_keys
 
+    def _csv_text(header, rows):
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        writer.writerows(rows)
+        return buffer.getvalue()
+
     zip_buffer = BytesIO()
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
-        users_buffer = StringIO()
-        users_writer = csv.writer(users_buffer)
-        users_writer.writerow(USER_EXPORT_HEADERS)
-        for user in users:
-            users_writer.writerow(_build_user_row(user))
-        archive.writestr('users.csv', users_buffer.getvalue())
-
-        cards_buffer = StringIO()
-        cards_writer = csv.writer(cards_buffer)
-        cards_writer.writerow(headers)
-        for card in cards:
-            cards_writer.writerow(_build_card_row(card, card_data_keys))
-        archive.writestr('cards.csv', cards_buffer.getvalue())
-
-    zip_buffer.seek(0)
+        archive.writestr('users.csv', _csv_text(USER_EXPORT_HEADERS, (_build_user_row(u) for u in users)))
+        archive.writestr('cards.csv', _csv_text(headers, (_build_card_row(c, card_data_keys) for c in cards)))
+        if interactions_qs is not None:
+            archive.writestr('interactions.csv', _csv_text(
+                INTERACTION_EXPORT_HEADERS,
+                (_build_interaction_row(iv) for iv in interactions_qs.iterator(chunk_size=2000)),
+            ))
+        if leads_qs is not None:
+            archive.writestr('leads.csv', _csv_text(
+                LEAD_EXPORT_HEADERS,
+                (_build_lead_row(lead) for lead in leads_qs.iterator(chunk_size=2000)),
+            ))
+        # Downstream sync passes this back as `?since=` on the next pull.
+        archive.writestr('watermark.txt', watermark.isoformat() + '\n')
+
+    filename = 'dashboard_csv_exports_delta.zip' if since is not None else 'dashboard_csv_exports.zip'
     response = HttpResponse(zip_buffer.getvalue(), content_type='application/zip')
-    response['Content-Disposition'] = 'attachment; filename="dashboard_csv_exports.zip"'
-    return response
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return _attach_export_watermark(response, since, watermark)
 
 
 def export_cards_excel(request):
     if not _superuser_only(request):
         return HttpResponse('Unauthorized', status=401)
 
-    users = list(User.objects.select_related('profile').order_by('id'))
-    cards = list(Card.objects.select_related('user', 'user__profile').order_by('id'))
+    try:
+        since, watermark, extras = _export_window(request)
+    except ValueError:
+        return HttpResponse('Invalid since timestamp', status=400)
+
+    users_qs, cards_qs, interactions_qs, leads_qs = _export_querysets(since, extras)
+    users = list(users_qs)
+    cards = list(cards_qs)
     card_data_keys = _collect_card_data_keys(cards)
     card_headers = CARD_EXPORT_HEADERS + card_data_keys
 
@@ -1429,22 +1605,66 @@ def export_cards_excel(request):
     for card in cards:
         cards_ws.append(_build_card_row(card, card_data_keys))
 
+    if interactions_qs is not None:
+        interactions_ws = wb.create_sheet(title='Interactions')
+        interactions_ws.append(INTERACTION_EXPORT_HEADERS)
+        for interaction in interactions_qs.iterator(chunk_size=2000):
+            interactions_ws.append(_build_interaction_row(interaction))
+
+    if leads_qs is not None:
+        leads_ws = wb.create_sheet(title='Leads')
+        leads_ws.append(LEAD_EXPORT_HEADERS)
+        for lead in leads_qs.iterator(chunk_size=2000):
+            leads_ws.append(_build_lead_row(lead))
+
+    export_ws = wb.create_sheet(title='Export')
+    export_ws.append(['Since', since.isoformat() if since is not None else ''])
+    export_ws.append(['Watermark', watermark.isoformat()])
+
+    filename = 'dashboard_delta.xlsx' if since is not None else 'dashboard.xlsx'
     response = HttpResponse(
         content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
-    response['Content-Disposition'] = 'attachment; filename="dashboard.xlsx"'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     wb.save(response)
-    return response
+    return _attach_export_watermark(response, since, watermark)
 
-def documentation_view(request):
+def _readme_stat():
+    """(path, mtime_ns, size) of README.md, or None when it's missing."""
     readme_path = os.path.join(settings.BASE_DIR, 'README.md')
     try:
-        with open(readme_path, 'r', encoding='utf-8') as f:
-            markdown_content = f.read()
-        html_content = markdown.markdown(markdown_content)
+        stat = os.stat(readme_path)
     except FileNotFoundError:
-        html_content = "<h1>README.md not found</h1>"
-    return render(request, 'cards/documentation.html', {'html_content': html_content})
+        return None
+    return readme_path, stat.st_mtime_ns, stat.st_size
+
+
+@lru_cache(maxsize=2)
+def _readme_html(readme_path, mtime_ns, size):
+    """README rendered once per file version; it only changes on deploy."""
+    import markdown
+
+    with open(readme_path, 'r', encoding='utf-8') as f:
+        return markdown.markdown(f.read())
+
+
+def _documentation_etag(request):
+    readme = _readme_stat()
+    if readme is None or _has_pending_messages(request):
+        return None
+    _path, mtime_ns, size = readme
+    raw = f'{mtime_ns}:{size}:{deploy_version()}:' + ':'.join(str(part) for part in _viewer_key(request))
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+
+@condition(etag_func=_documentation_etag)
+def documentation_view(request):
+    readme = _readme_stat()
+    html_content = _readme_html(*readme) if readme else "<h1>README.md not found</h1>"
+    response = render(request, 'cards/documentation.html', {'html_content': html_content})
+    # The page chrome is per viewer, so browsers revalidate (and get a 304) rather than reuse.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 def _mask_email(email: str) -> str:
     """Mask an email like Google does: 'sh•••••••3@gmail.com'."""
@@ -1823,6 +2043,25 @@ def reset_password(request):
 # Sprint 3: Analytics + Lead capture + vCard + Wallet
 # ============================================================================
 
+# The service worker drops queued beacons older than this (sw.js BEACON_MAX_AGE_MS).
+TRACK_BACKDATE_MAX = timedelta(days=7)
+
+
+def _beacon_delay(payload):
+    """How long a replayed beacon sat in the service worker's queue, or None.
+
+    `at` (the tap) and `sent` (the replay) are read from the same device
+    clock, so their difference holds even when that clock is off.
+    """
+    try:
+        delay = timedelta(milliseconds=int(payload['sent']) - int(payload['at']))
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+    if delay <= timedelta(0):
+        return None
+    return min(delay, TRACK_BACKDATE_MAX)
+
+
 @csrf_exempt
 @require_POST
 def track_interaction(request):
@@ -1850,19 +2089,23 @@ def track_interaction(request):
         return HttpResponse(status=204)
 
     try:
-        CardInteraction.objects.create(
+        interaction = CardInteraction.objects.create(
             card=card,
             kind=kind,
             target=target,
-            session_id=(request.session.session_key or '')[:64],
+            session_id=visitor_key(request)[:64],
             referrer=request.META.get('HTTP_REFERER', '')[:255],
             user_agent=request.META.get('HTTP_USER_AGENT', '')[:255],
         )
+        delay = _beacon_delay(payload)
+        if delay:
+            # Queued while offline: count it on the day it happened.
+            CardInteraction.objects.filter(pk=interaction.pk).update(created_at=interaction.created_at - delay)
     except Exception as exc:
         logger.warning("Track interaction failed for %s/%s: %s", slug, kind, exc)
         return HttpResponse(status=500)
 
-    return HttpResponse(status=204)
+    return remember_visitor(request, HttpResponse(status=204))
 
 
 @require_POST
@@ -1887,6 +2130,7 @@ def submit_lead(request, slug):
         message=message,
         utm_source=(request.POST.get('utm_source') or '')[:80],
     )
+    invalidate_lead_histogram(card.user_id)
 
     # Track interaction
     try:
@@ -1894,7 +2138,7 @@ def submit_lead(request, slug):
             card=card,
             kind=CardInteraction.KIND_LEAD,
             target='lead_form',
-            session_id=(request.session.session_key or '')[:64],
+            session_id=visitor_key(request)[:64],
         )
     except Exception:
         pass
@@ -1925,46 +2169,153 @@ def submit_lead(request, slug):
         logger.warning("Lead email delivery failed: %s", exc)
 
     messages.success(request, 'Thanks — your message was delivered.')
-    return redirect('view_card', slug=slug)
+    return remember_visitor(request, redirect('view_card', slug=slug))
+
+
+LEADS_PAGE_SIZE = 50
 
 
 @login_required
 def leads_inbox(request):
-    """Card owner's inbox of all leads across their cards."""
+    """Card owner's inbox of all leads across their cards.
+
+    Newest first, keyset-paged on (created_at, id) over the indexed
+    `owner` column; the tab counts come from the cached status histogram.
+    """
     cards = Card.objects.filter(user=request.user)
-    leads_qs = (
-        LeadCapture.objects.filter(card__user=request.user)
-        .select_related('card')
-        .order_by('-created_at')
-    )
+    leads_qs = LeadCapture.objects.filter(owner=request.user).select_related('card')
 
     status_filter = request.GET.get('status') or ''
     if status_filter in {c[0] for c in LeadCapture.STATUS_CHOICES}:
         leads_qs = leads_qs.filter(status=status_filter)
+    else:
+        status_filter = ''
 
-    new_count = LeadCapture.objects.filter(card__user=request.user, status=LeadCapture.STATUS_NEW).count()
+    page = keyset_page(leads_qs, request.GET.get('cursor') or '', page_size=LEADS_PAGE_SIZE)
+    histogram = lead_histogram(request.user.id)
+    status_tabs = [
+        (code, label, histogram.get(code, 0))
+        for code, label in LeadCapture.STATUS_CHOICES
+    ]
 
     return render(request, 'cards/leads_inbox.html', {
-        'leads': leads_qs,
+        'leads': page.items,
         'cards': cards,
         'status_filter': status_filter,
-        'new_count': new_count,
+        'new_count': histogram.get(LeadCapture.STATUS_NEW, 0),
+        'total_leads': histogram.get('total', 0),
         'status_choices': LeadCapture.STATUS_CHOICES,
+        'status_tabs': status_tabs,
+        'next_cursor': page.next_cursor,
+        'is_first_page': page.is_first_page,
     })
 
 
 @login_required
 @require_POST
 def lead_update_status(request, lead_id):
-    lead = get_object_or_404(LeadCapture, id=lead_id, card__user=request.user)
+    lead = get_object_or_404(LeadCapture, id=lead_id, owner=request.user)
     new_status = request.POST.get('status') or ''
     if new_status in {c[0] for c in LeadCapture.STATUS_CHOICES}:
         lead.status = new_status
         lead.save(update_fields=['status', 'updated_at'])
+        invalidate_lead_histogram(request.user.id)
         messages.success(request, f'Lead marked as {lead.get_status_display().lower()}.')
     return redirect('leads_inbox')
 
 
+# ==========================================================================
+# On-the-fly media resizes
+# ==========================================================================
+
+RESIZE_SOURCE_PREFIXES = ('avatars/', 'logos/')
+
+
+def _resize_source(width, height, path):
+    """Absolute source path for an allowed resize request, or None."""
+    allowed = {tuple(size) for size in getattr(settings, 'MEDIA_RESIZE_SIZES', ())}
+    if (width, height) not in allowed:
+        return None
+    name = posixpath.normpath(path)
+    if name != path or not name.startswith(RESIZE_SOURCE_PREFIXES):
+        return None
+    source = os.path.join(settings.MEDIA_ROOT, name)
+    return source if os.path.isfile(source) else None
+
+
+def _resized_media_etag(request, width, height, path):
+    source = _resize_source(width, height, path)
+    if source is None:
+        return None
+    stat = os.stat(source)
+    return hashlib.sha1(f'{path}:{width}x{height}:{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()
+
+
+@condition(etag_func=_resized_media_etag)
+def resized_media(request, width, height, path):
+    """`/media/r/<w>x<h>/<path>` — an avatar/logo fitted inside an allow-listed box.
+
+    Rendered once into MEDIA_ROOT/r/…, which nginx serves directly on
+    later requests; the cache is trimmed LRU-first to MEDIA_RESIZE_CACHE_BYTES.
+    """
+    source = _resize_source(width, height, path)
+    if source is None:
+        raise Http404('Unknown image or size.')
+
+    cached = resize_cache_path(settings.MEDIA_ROOT, width, height, path)
+    try:
+        fresh = os.stat(cached).st_mtime_ns >= os.stat(source).st_mtime_ns
+    except FileNotFoundError:
+        fresh = False
+    if fresh:
+        os.utime(cached)
+    else:
+        try:
+            render_resized(source, cached, width, height)
+        except Exception as exc:
+            logger.warning("Resize of %s to %sx%s failed: %s", path, width, height, exc)
+            raise Http404('Image could not be resized.')
+
+    handle = open(cached, 'rb')
+    if not fresh:
+        # Opened first: the open handle still serves the file if the trim evicts it.
+        note_resized(
+            settings.MEDIA_ROOT, os.fstat(handle.fileno()).st_size,
+            getattr(settings, 'MEDIA_RESIZE_CACHE_BYTES', 256 * 1024 * 1024),
+        )
+    response = FileResponse(handle, content_type=mimetypes.guess_type(cached)[0] or 'application/octet-stream')
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+# ==========================================================================
+# Service worker + offline fallback
+# ==========================================================================
+
+def service_worker(request):
+    """`/sw.js` — served from the root so its scope covers every page (see service_worker.py)."""
+    urls = precache_urls()
+    config = {
+        'version': shell_version(urls),
+        'precache': urls,
+        'offline_url': reverse('offline'),
+        'static_url': settings.STATIC_URL,
+        'track_url': reverse('track_interaction'),
+        'cdn_hosts': CDN_HOSTS,
+    }
+    response = render(request, 'cards/sw.js', {'config': json.dumps(config)},
+                      content_type='application/javascript; charset=utf-8')
+    response['Service-Worker-Allowed'] = '/'
+    # Browsers must see a new deploy's worker on the next navigation.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def offline(request):
+    """Shown by the service worker for navigations it can't serve while offline."""
+    return render(request, 'cards/offline.html')
+
+
 def physical_card(request, slug):
     """Printable ID-1 sized physical card (front + back) with QR.
 
@@ -1973,6 +2324,17 @@ def physical_card(request, slug):
         view uses) so they know they need to pay before printing.
       - Anyone else: show the public 'card unavailable' screen.
     """
+    state = card_state(slug)
+    validators = None
+    if state and state['is_active'] and not _has_pending_messages(request):
+        validators = (
+            card_etag(state, 'print', state['theme'], deploy_version(), *_viewer_key(request)),
+            card_last_modified(state),
+        )
+        not_modified = _not_modified(request, *validators)
+        if not_modified is not None:
+            return not_modified
+
     card = get_object_or_404(Card, slug=slug)
     is_owner = request.user.is_authenticated and request.user == card.user
     is_admin = request.user.is_authenticated and request.user.is_superuser
@@ -2009,12 +2371,9 @@ def physical_card(request, slug):
         if len(top_socials) == 3:
             break
 
-    theme = None
-    theme_slug = (card.card_data or {}).get('theme_slug')
-    if theme_slug:
-        theme = CardTheme.objects.filter(slug=theme_slug, is_active=True).first()
+    theme = get_theme((card.card_data or {}).get('theme_slug'))
 
-    return render(request, 'cards/physical_card.html', {
+    response = render(request, 'cards/physical_card.html', {
         'card': card,
         'whatsapp_link': whatsapp_link,
         'phone_display': phone_display,
@@ -2022,37 +2381,31 @@ def physical_card(request, slug):
         'top_socials': top_socials,
         'theme': theme,
     })
+    if validators and card.is_active:
+        _apply_validators(response, *validators)
+    return response
 
 
 def download_vcard(request, slug):
-    """Serve a .vcf file so any contacts app can save the details."""
+    """Serve a .vcf file so any contacts app can save the details.
+
+    The file only depends on the card, so it carries a strong ETag; a
+    revalidating client already has the contact and isn't counted as a
+    new save. `?photo=0` leaves out the embedded avatar thumbnail.
+    """
+    photo = request.GET.get('photo') != '0'
+    state = card_state(slug)
+    validators = None
+    if state and state['is_active']:
+        validators = (
+            card_etag(state, 'vcf', int(photo), weak=False),
+            card_last_modified(state, theme=False, deploy=False),
+        )
+        not_modified = _not_modified(request, *validators)
+        if not_modified is not None:
+            return not_modified
+
     card = get_object_or_404(Card, slug=slug, is_active=True)
-    d = card.card_data or {}
-
-    first = (d.get('firstName') or '').strip()
-    last = (d.get('lastName') or '').strip()
-    company = (d.get('company') or '').strip()
-    title = (d.get('jobTitle') or '').strip()
-    email = (d.get('email') or '').strip()
-    website = (d.get('website') or '').strip()
-    phone = (d.get('phone') or '').strip()
-    address = (d.get('address') or '').strip()
-    notes = (d.get('notes') or '').strip().replace('\n', '\\n')
-
-    lines = ['BEGIN:VCARD', 'VERSION:3.0']
-    if first or last:
-        lines.append(f'N:{last};{first};;;')
-        lines.append(f'FN:{(first + " " + last).strip()}')
-    if company: lines.append(f'ORG:{company}')
-    if title:   lines.append(f'TITLE:{title}')
-    if phone:
-        tel = phone if phone.startswith('+') else f'+{phone}'
-        lines.append(f'TEL;TYPE=CELL:{tel}')
-    if email:   lines.append(f'EMAIL;TYPE=INTERNET:{email}')
-    if website: lines.append(f'URL:{website}')
-    if address: lines.append(f'ADR:;;{address};;;;')
-    if notes:   lines.append(f'NOTE:{notes}')
-    lines.append('END:VCARD')
 
     # Track save unless owner
     if not (request.user.is_authenticated and request.user == card.user):
@@ -2061,17 +2414,193 @@ def download_vcard(request, slug):
                 card=card,
                 kind=CardInteraction.KIND_SAVE,
                 target='vcard',
-                session_id=(request.session.session_key or '')[:64],
+                session_id=visitor_key(request)[:64],
             )
         except Exception:
             pass
 
-    filename = f'{(first or "contact")}-{(last or "card")}.vcf'.replace(' ', '_')
-    response = HttpResponse('\n'.join(lines), content_type='text/vcard; charset=utf-8')
+    response = HttpResponse(vcard_text(card, photo=photo), content_type='text/vcard; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{vcard_filename(card)}"'
+    if validators:
+        _apply_validators(response, *validators)
+    return remember_visitor(request, response)
+
+
+def _vcard_stream_response(cards, filename, photo):
+    response = StreamingHttpResponse(stream_vcards(cards, photo=photo), content_type='text/vcard; charset=utf-8')
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 
+@login_required
+def download_my_vcards(request):
+    """Every card the user owns as one multi-contact .vcf, streamed."""
+    return _vcard_stream_response(
+        Card.objects.filter(user=request.user),
+        'my-cards.vcf',
+        photo=request.GET.get('photo') != '0',
+    )
+
+
+def _admin_card_selection(request):
+    """Cards picked on the admin dashboard: `?user=<id>` and/or `?card=<slug>`, repeatable."""
+    user_ids = [int(value) for value in request.GET.getlist('user') if value.isdigit()]
+    slugs = [value for value in request.GET.getlist('card') if value]
+    if not user_ids and not slugs:
+        return None
+    return Card.objects.filter(Q(user_id__in=user_ids) | Q(slug__in=slugs))
+
+
+@user_passes_test(lambda u: u.is_superuser, login_url='/my-admin/login/')
+def admin_bulk_vcards(request):
+    """Streamed .vcf for the admin's selection."""
+    cards = _admin_card_selection(request)
+    if cards is None:
+        messages.error(request, 'Select at least one user or card to export.')
+        return redirect('admin_dashboard')
+    return _vcard_stream_response(cards, 'cards.vcf', photo=request.GET.get('photo') != '0')
+
+
+PRINT_SHEET_DPIS = (150, 300, 600)
+
+
+def print_sheet_card_limit(dpi: int) -> int:
+    """Most cards the admin action renders inside a request at `dpi`.
+
+    PRINT_SHEET_MAX_CARDS is the budget at 300 DPI; render time grows with
+    the pixel count, so 600 DPI gets a quarter of it and 150 DPI four times.
+    """
+    budget = getattr(settings, 'PRINT_SHEET_MAX_CARDS', 40)
+    return max(1, budget * 300 * 300 // (dpi * dpi))
+
+
+@user_passes_test(lambda u: u.is_superuser, login_url='/my-admin/login/')
+def admin_print_sheets(request):
+    """Duplex multi-up PDF of the admin's selection, rendered to a temp file and streamed back.
+
+    Only small selections are rendered here; larger orders would outlive
+    the gunicorn worker timeout and belong to `manage.py render_print_sheets`.
+    """
+    import tempfile
+
+    from .print_sheets import jobs_for_cards, write_sheets
+
+    cards = _admin_card_selection(request)
+    if cards is None:
+        messages.error(request, 'Select at least one user or card to print.')
+        return redirect('admin_dashboard')
+    try:
+        dpi = int(request.GET.get('dpi') or 300)
+    except ValueError:
+        dpi = 300
+    if dpi not in PRINT_SHEET_DPIS:
+        dpi = 300
+    limit = print_sheet_card_limit(dpi)
+    selected = cards.count()
+    if selected > limit:
+        messages.error(
+            request,
+            f'{selected} cards is too many to render here at {dpi} DPI (limit {limit}). '
+            f'Run `python manage.py render_print_sheets --file slugs.txt -o order.pdf --dpi {dpi}` on the server instead.',
+        )
+        return redirect('admin_dashboard')
+
+    jobs = jobs_for_cards(cards.order_by('user_id', 'id'), request.build_absolute_uri('/'))
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+    try:
+        report = write_sheets(jobs, path, dpi=dpi, workers=getattr(settings, 'PRINT_SHEET_WORKERS', 2))
+        handle = open(path, 'rb')
+    finally:
+        # The open handle keeps the data readable until the response is done.
+        os.remove(path)
+    if not report.cards:
+        handle.close()
+        messages.error(request, 'None of the selected users have cards to print.')
+        return redirect('admin_dashboard')
+
+    response = FileResponse(handle, content_type='application/pdf', as_attachment=True, filename='print-sheets.pdf')
+    response['X-Print-Cards'] = str(report.cards)
+    response['X-Print-Cards-Per-Second'] = f'{report.cards_per_second:.1f}'
+    return response
+
+
+@user_passes_test(lambda u: u.is_superuser, login_url='/my-admin/login/')
+def admin_provision_cards(request):
+    """Upload a CSV of employees and create one card per valid row for the chosen owner."""
+    from .provisioning import provision_cards, read_rows
+
+    context = {
+        'active': 'provision',
+        'owner': '',
+        'card_type': Card.TYPE_PERSONAL,
+        'card_type_choices': Card.TYPE_CHOICES,
+        'dry_run': False,
+        'ignore_limit': False,
+        'report': None,
+    }
+    if request.method != 'POST':
+        return render(request, 'cards/admin_provision.html', context)
+
+    owner_ref = (request.POST.get('owner') or '').strip()
+    card_type = request.POST.get('card_type') or Card.TYPE_PERSONAL
+    context.update({
+        'owner': owner_ref,
+        'card_type': card_type,
+        'dry_run': bool(request.POST.get('dry_run')),
+        'ignore_limit': bool(request.POST.get('ignore_limit')),
+    })
+    owner = User.objects.filter(Q(username=owner_ref) | Q(email__iexact=owner_ref)).first() if owner_ref else None
+    upload = request.FILES.get('csv_file')
+    if owner is None:
+        messages.error(request, f'No user matches "{owner_ref}".')
+        return render(request, 'cards/admin_provision.html', context)
+    if upload is None:
+        messages.error(request, 'Choose a CSV file to import.')
+        return render(request, 'cards/admin_provision.html', context)
+    try:
+        rows = read_rows(upload)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        messages.error(request, f'Could not read the CSV: {exc}')
+        return render(request, 'cards/admin_provision.html', context)
+
+    report = provision_cards(
+        rows, owner,
+        card_type=card_type,
+        dry_run=context['dry_run'],
+        ignore_limit=context['ignore_limit'],
+        workers=getattr(settings, 'PROVISION_QR_WORKERS', 2),
+    )
+    context.update({
+        'report': report,
+        # Offered as a data: link so downloading it never re-runs the import.
+        'report_csv': report.as_csv(),
+        'created': report.count('created'),
+        'valid': report.count('valid'),
+        'invalid': report.count('invalid'),
+        'over_limit': report.count('over_limit'),
+        'failed': report.count('failed'),
+    })
+    return render(request, 'cards/admin_provision.html', context)
+
+
+@login_required
+def card_history(request, slug):
+    """Full change log for one card (owner only), keyset-paged newest first."""
+    card = get_object_or_404(Card, slug=slug, user=request.user)
+    page = keyset_page(
+        card.change_logs.select_related('user'),
+        request.GET.get('cursor') or '',
+        page_size=CARD_HISTORY_PAGE_SIZE,
+    )
+    return render(request, 'cards/card_history.html', {
+        'card': card,
+        'logs': expand_logs(page.items),
+        'next_cursor': page.next_cursor,
+        'is_first_page': page.is_first_page,
+    })
+
+
 @login_required
 def card_analytics(request, slug):
     """Per-card analytics dashboard (owner only)."""
@@ -2081,7 +2610,9 @@ def card_analytics(request, slug):
     # Free users see 7 days; premium users see the full 90-day window.
     analytics_is_capped = not is_premium(request.user)
     window_days = 7 if analytics_is_capped else 90
-    since = now - timedelta(days=window_days)
+    # Whole UTC days, the granularity of the visitor sketches, so every
+    # total below counts the same span.
+    since = day_window(window_days, now)
 
     qs = card.interactions.filter(created_at__gte=since)
 
@@ -2140,6 +2671,8 @@ def card_analytics(request, slug):
         'clicks': qs.filter(kind=CardInteraction.KIND_CLICK).count(),
         'saves':  qs.filter(kind=CardInteraction.KIND_SAVE).count(),
         'leads':  qs.filter(kind=CardInteraction.KIND_LEAD).count(),
+        # Merged from the per-day HyperLogLog sketches (hll.py), not COUNT(DISTINCT).
+        'visitors': unique_visitors(card.pk, since, now),
     }
 
     return render(request, 'cards/card_analytics.html', {
@@ -2530,14 +3063,9 @@ def admin_lifecycle(request):
     )
 
     now = timezone.now()
-    counts = {
-        'total':          Card.objects.count(),
-        'trial':          Card.objects.filter(lifecycle_status=Card.STATUS_TRIAL).count(),
-        'active_paid':    Card.objects.filter(lifecycle_status=Card.STATUS_ACTIVE_PAID).count(),
-        'expiring_soon':  Card.objects.filter(lifecycle_status=Card.STATUS_EXPIRING_SOON).count(),
-        'expired':        Card.objects.filter(lifecycle_status=Card.STATUS_EXPIRED).count(),
-        'admin_disabled': Card.objects.filter(lifecycle_status=Card.STATUS_ADMIN_DISABLED).count(),
-    }
+    card_metrics = platform_metrics()['cards']
+    counts = {'total': card_metrics['total']}
+    counts.update({key: card_metrics[key] for key, _label in Card.LIFECYCLE_CHOICES})
 
     return render(request, 'cards/admin_lifecycle.html', {
         'cards': cards_qs[:200],
@@ -2639,6 +3167,8 @@ def admin_lifecycle_action(request, slug, action):
     else:
         messages.error(request, f'Unknown lifecycle action: {action}')
 
+    invalidate_platform_metrics()
+
     return redirect(request.META.get('HTTP_REFERER') or reverse('admin_lifecycle'))
 
 
@@ -3082,6 +3612,7 @@ def _grant_subscription(payment: Payment):
     )
 
     for card in Card.objects.filter(user=payment.user):
+        invalidate_card_state(card.slug)
         CardLifecycleLog.objects.create(
             card=card,
             action=CardLifecycleLog.ACTION_RENEWED,
@@ -3167,6 +3698,9 @@ def _staff_required(user):
     return user.is_authenticated and (user.is_staff or user.is_superuser)
 
 
+ADMIN_PAYMENTS_PAGE_SIZE = 100
+
+
 @login_required
 def admin_payments(request):
     if not _staff_required(request.user):
@@ -3176,32 +3710,35 @@ def admin_payments(request):
     status = (request.GET.get('status') or '').strip()
     gateway = (request.GET.get('gateway') or '').strip()
 
-    qs = Payment.objects.select_related('user', 'plan').order_by('-created_at')
-    if q:
-        qs = qs.filter(
-            Q(user__username__icontains=q) |
-            Q(user__email__icontains=q) |
-            Q(bkash_payer_msisdn__icontains=q) |
-            Q(bkash_trx_id__icontains=q) |
-            Q(bkash_subscription_request_id__icontains=q)
-        )
+    qs = Payment.objects.select_related('user', 'plan')
+    search = normalize_payment_search_query(q)
+    if search:
+        # Prefix / exact match on the indexed token table instead of
+        # icontains across five columns and the auth_user join.
+        qs = qs.filter(pk__in=Subquery(
+            PaymentSearchToken.objects.filter(token__startswith=search).values('payment_id')
+        ))
     if status:
         qs = qs.filter(status=status)
     if gateway:
         qs = qs.filter(gateway=gateway)
 
-    payments = list(qs[:500])
-    total_success = sum(
-        (p.amount for p in payments if p.status == Payment.STATUS_SUCCESS),
-        Decimal('0'),
+    # Total over the whole filtered set, not just the rows on this page.
+    total_success = (
+        qs.filter(status=Payment.STATUS_SUCCESS)
+        .aggregate(total=Sum('amount'))['total']
+        or Decimal('0')
     )
 
-    rows = [{'obj': p, 'invoice': _invoice_number(p)} for p in payments]
+    page = keyset_page(qs, request.GET.get('cursor') or '', page_size=ADMIN_PAYMENTS_PAGE_SIZE)
+    rows = [{'obj': p, 'invoice': _invoice_number(p)} for p in page.items]
 
     return render(request, 'cards/admin_payments.html', {
         'active': 'payments',
         'payments': rows,
         'total_success': total_success,
+        'next_cursor': page.next_cursor,
+        'is_first_page': page.is_first_page,
         'q': q,
         'status': status,
         'gateway': gateway,
@@ -0,0 +1,104 @@
+"""Anonymous visitor key and card-view de-duplication, without the session store.
+
+`view_card` used to remember the cards a visitor had seen in
+`request.session['visited_cards']`, so every QR scan created and wrote a
+session row, and the session table grew with every passer-by. The same
+facts now live in one signed cookie (VISITOR_COOKIE):
+
+    <visitor id>:<card id>.<card id>...     (ids in base 36)
+
+  - the visitor id is a random token. It is stored in
+    `CardInteraction.session_id` for views, taps, saves and leads, so one
+    browser's interactions can still be counted together
+  - the card list holds the last VISITOR_SEEN_MAX cards this browser has
+    been counted on, newest last; a card falls off the end and may be
+    counted again, just as when a session expired
+
+The cookie is signed with a timestamp (`set_signed_cookie`) and read back
+with CARD_VIEW_DEDUP_SECONDS as its max age, so a tampered or stale
+value is treated as a new visitor. It is only rewritten when it changes.
+
+`cards.middleware.PublicSessionMiddleware` keeps the session store away
+from the public card, vCard and tracking endpoints for browsers that
+don't already carry a session cookie.
+"""
+
+import secrets
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+VISITOR_COOKIE = 'mc_v'
+VISITOR_SALT = 'cards.visitors'
+VISITOR_SEEN_MAX = 40
+
+
+def _max_age() -> int:
+    return getattr(settings, 'CARD_VIEW_DEDUP_SECONDS', settings.SESSION_COOKIE_AGE)
+
+
+@dataclass
+class Visitor:
+    id: str
+    seen: list = field(default_factory=list)
+    changed: bool = False
+
+    def dumps(self) -> str:
+        return f"{self.id}:{'.'.join(_base36(card_id) for card_id in self.seen)}"
+
+
+def _base36(number: int) -> str:
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    out = ''
+    while True:
+        number, rest = divmod(number, 36)
+        out = digits[rest] + out
+        if not number:
+            return out
+
+
+def _parse(value):
+    visitor_id, _, ids = (value or '').partition(':')
+    if not visitor_id:
+        return None
+    try:
+        seen = [int(card_id, 36) for card_id in ids.split('.') if card_id]
+    except ValueError:
+        return None
+    return Visitor(visitor_id, seen[-VISITOR_SEEN_MAX:])
+
+
+def visitor_for(request) -> Visitor:
+    """This browser's visitor, read from the cookie once per request (new when absent or invalid)."""
+    visitor = getattr(request, '_card_visitor', None)
+    if visitor is None:
+        value = request.get_signed_cookie(VISITOR_COOKIE, default=None, salt=VISITOR_SALT, max_age=_max_age())
+        visitor = _parse(value) or Visitor(secrets.token_urlsafe(12), changed=True)
+        request._card_visitor = visitor
+    return visitor
+
+
+def visitor_key(request) -> str:
+    """Value for `CardInteraction.session_id`."""
+    return visitor_for(request).id
+
+
+def first_view(request, card_id: int) -> bool:
+    """True the first time this browser views `card_id` (and remembers it)."""
+    visitor = visitor_for(request)
+    if card_id in visitor.seen:
+        return False
+    visitor.seen = (visitor.seen + [card_id])[-VISITOR_SEEN_MAX:]
+    visitor.changed = True
+    return True
+
+
+def remember_visitor(request, response):
+    """Write the visitor cookie onto `response` if this request changed it; returns `response`."""
+    visitor = getattr(request, '_card_visitor', None)
+    if visitor is not None and visitor.changed:
+        response.set_signed_cookie(
+            VISITOR_COOKIE, visitor.dumps(), salt=VISITOR_SALT, max_age=_max_age(),
+            secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+        )
+    return response
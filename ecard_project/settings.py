@@ -39,7 +39,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'cards.middleware.PublicSessionMiddleware',   # SessionMiddleware, minus anonymous public card hits
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,11 +64,24 @@ TEMPLATES = [
                 'cards.context_processors.user_plan',
                 'cards.context_processors.sidebar',
                 'cards.context_processors.live_offers',
+                'cards.context_processors.fragment_cache',
             ],
         },
     },
 ]
 
+if not DEBUG:
+    # Compile each template once per process in production. Django does
+    # this implicitly when DEBUG is off; spelling it out keeps it on if
+    # someone adds their own `loaders` later.
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'ecard_project.wsgi.application'
 
 
@@ -84,6 +97,21 @@ DATABASES = {
     'default': dj_database_url.parse(DATABASE_URL)
 }
 
+# Cache
+# Per-process LocMemCache unless REDIS_URL is set. The cached card
+# snapshots, counters and theme generation are only invalidated across
+# gunicorn workers with a shared cache; otherwise they expire by TTL.
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -138,10 +166,35 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT =  os.path.join(BASE_DIR,'staticfiles')
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Django 5.x reads STORAGES (STATICFILES_STORAGE is gone). WhiteNoise writes
+# .gz and, with `Brotli` installed, .br siblings at collectstatic time and
+# serves whichever the client accepts. The heavy assets (CSS bundle, icon
+# sprite, font subsets) carry their own content hashes, so the non-manifest
+# storage is enough and templates keep working before collectstatic.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage'},
+}
+
+# `manage.py build_css` / `build_icons` / `build_fonts` write
+# cards/dist/app.<sha256:12>.css, icons.<sha256:12>.svg and
+# fonts/*.<sha256:12>.woff2; those names change with the content, so
+# WhiteNoise can serve them with a far-future immutable Cache-Control.
+WHITENOISE_IMMUTABLE_FILE_TEST = r'^.+\.[0-9a-f]{12}\..+$'
+TAILWIND_CLI = config('TAILWIND_CLI', default='tailwindcss')
+FONT_SOURCES_DIR = config('FONT_SOURCES_DIR', default='')
+LUCIDE_ICONS_DIR = config('LUCIDE_ICONS_DIR', default=str(BASE_DIR / 'node_modules' / 'lucide-static' / 'icons'))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Boxes the /media/r/<w>x<h>/ resize endpoint will render, and the disk
+# budget for its cache under MEDIA_ROOT/r/ (least recently used evicted).
+MEDIA_RESIZE_SIZES = [
+    (48, 48), (64, 64), (128, 128), (192, 192), (256, 256), (320, 320), (512, 512),
+]
+MEDIA_RESIZE_CACHE_BYTES = config('MEDIA_RESIZE_CACHE_BYTES', default=256 * 1024 * 1024, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -225,6 +278,23 @@ ZEPTOMAIL_FROM_NAME    = config('ZEPTOMAIL_FROM_NAME',    default='MY-Card')
 
 FEATURE_EMAIL_OTP = bool(ZEPTOMAIL_TOKEN)
 
+# Admin dashboard / lifecycle counters are cached for this many seconds.
+ADMIN_METRICS_CACHE_SECONDS = config('ADMIN_METRICS_CACHE_SECONDS', default=60, cast=int)
+
+# Card ETags are built from a cached snapshot (updated_at, theme, view
+# count) that lives this long; RELEASE_VERSION (e.g. the git sha) marks
+# a deploy, falling back to the newest template/static mtime.
+CARD_STATE_CACHE_SECONDS = config('CARD_STATE_CACHE_SECONDS', default=30, cast=int)
+RELEASE_VERSION = config('RELEASE_VERSION', default='')
+
+# {% cache %} fragments in index / create_card / view_card. Keys carry the
+# release, theme and offer generations, so this is only a memory bound.
+FRAGMENT_CACHE_SECONDS = config('FRAGMENT_CACHE_SECONDS', default=60 * 60 * 24, cast=int)
+
+# CardChangeLog entries older than this are folded into monthly snapshots
+# by `manage.py compact_card_history`.
+CARD_HISTORY_RETENTION_DAYS = config('CARD_HISTORY_RETENTION_DAYS', default=180, cast=int)
+
 # Password reset OTP config
 PW_RESET_OTP_TTL_SECONDS = 600         # 10 minutes
 PW_RESET_OTP_MAX_ATTEMPTS = 5
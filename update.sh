@@ -23,6 +23,22 @@ pip install -r requirements.txt
 echo "Applying database migrations..."
 python manage.py migrate --noinput
 
+# Build the CSS bundle (Tailwind utilities + design system, purged + hashed)
+echo "Building CSS bundle..."
+python manage.py build_css
+
+# Inline-ready above-the-fold CSS for the public card pages (reads the bundle)
+echo "Extracting critical CSS..."
+python manage.py build_critical_css
+
+# Build the SVG icon sprite (Lucide + brand glyphs actually used, hashed)
+echo "Building icon sprite..."
+python manage.py build_icons
+
+# Subset the bundled fonts to Latin / Bengali WOFF2 (hashed, preloaded)
+echo "Building font subsets..."
+python manage.py build_fonts
+
 # Collect static files
 echo "Collecting static files..."
 python manage.py collectstatic --noinput